@@ -1,6 +1,6 @@
 import os
 import asyncio
-from typing import Optional, Dict, Any, AsyncGenerator
+from typing import Optional, Dict, Any, AsyncGenerator, List
 from contextlib import asynccontextmanager
 
 from pymongo import MongoClient  # Changed from motor to pymongo
@@ -8,13 +8,25 @@ from langchain_google_genai.embeddings import GoogleGenerativeAIEmbeddings
 from langchain_mongodb.retrievers import MongoDBAtlasHybridSearchRetriever
 from langchain_mongodb.vectorstores import MongoDBAtlasVectorSearch
 from dotenv import load_dotenv
+from api.utils.circuit_breaker import get_circuit_breaker
+from api.models.query_cache import QueryEmbeddingCache, RetrievalCache
+from api.utils.metrics import record_token_usage
+from api.utils.token_usage import embedding_usage
 
 load_dotenv()
 
+# Fail fast into the fallback response while Gemini embeddings or Atlas are degraded
+_embed_breaker = get_circuit_breaker("gemini_embed", slow_call_seconds=2.0)
+_search_breaker = get_circuit_breaker("vector_search", slow_call_seconds=2.0)
+
 class MongoVectorSearchEngine:
     def __init__(self):
         # Use pymongo client (not async motor)
-        self.client: MongoClient = MongoClient(os.getenv("MONGO_URL"))
+        # Client-side operation timeout so a degraded cluster can't hold a worker indefinitely
+        self.client: MongoClient = MongoClient(
+            os.getenv("MONGO_URL"),
+            timeoutMS=int(os.getenv("MONGO_TIMEOUT_MS", "10000"))
+        )
         self.database = self.client.get_database(os.getenv("MONGO_DB"))
         self.collection = self.database["chunks"]
         
@@ -29,6 +41,10 @@ class MongoVectorSearchEngine:
         self.vector_store = None
         self.hybrid_retriever = None
 
+        # Repeated questions skip the embedding call and the Atlas round trip
+        self.embedding_cache = QueryEmbeddingCache()
+        self.retrieval_cache = RetrievalCache()
+
     async def initialize(self):
         """Async initialization of vector store and retriever."""
         try:
@@ -65,12 +81,42 @@ class MongoVectorSearchEngine:
         
         return await self.hybrid_retriever.ainvoke(query, filters=filters)
 
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a query. Split from the search so each stage can be timed and hedged."""
+        embedding = self.embedding_cache.get_embedding(query)
+        if embedding is not None:
+            return embedding
+        embedding = await _embed_breaker.call(lambda: self.embedding_model.aembed_query(query))
+        record_token_usage("embed", embedding_usage(self.embedding_model.model, [query]))
+        self.embedding_cache.put_embedding(query, embedding)
+        return embedding
+
+    async def search_by_vector(self, embedding: List[float], filters: Optional[Dict[str, Any]] = None, k: int = 4):
+        """Perform vector search with a precomputed query embedding."""
+        if not self.vector_store:
+            raise RuntimeError("Vector store not initialized. Call initialize() first.")
+
+        cache_key = self.retrieval_cache.make_key(embedding, filters, k)
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        # Scores land in doc.metadata["score"]; the context packer orders by them
+        chunks = await _search_breaker.call(lambda: self.vector_store.asimilarity_search_by_vector(
+            embedding, k=k, pre_filter=filters, include_scores=True
+        ))
+        # Empty results aren't cached: a unit may just not be ingested yet
+        if chunks:
+            self.retrieval_cache.put(cache_key, list(chunks))
+        return chunks
+
     async def vector_search(self, query: str, filters: Optional[Dict[str, Any]] = None):
         """Perform vector search using the vector store."""
         if not self.vector_store:
             raise RuntimeError("Vector store not initialized. Call initialize() first.")
-        
-        return await self.vector_store.asimilarity_search(query, pre_filter=filters)
+
+        embedding = await self.embed_query(query)
+        return await self.search_by_vector(embedding, filters=filters)
 
     async def close(self):
         """Close the MongoDB client connection."""
@@ -4,64 +4,119 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 import tempfile
+import asyncio
 import os
+import time
 from typing import List, Dict, Any
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
-from api.loaders.data_retriever import get_vector_search_engine
 from api.routes.chat_routes import router as chat_router
+from api.routes.webhook_routes import router as webhook_router
+
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "10000"))
+PG_WARM_CONNECTIONS = int(os.getenv("PG_WARM_CONNECTIONS", "4"))
+
+
+async def _init_mongo():
+    """Motor client + Beanie models; returns the client so it can be pinged and closed."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from api.schemas.mongodb import __beanie_models__
+
+    mongo_client = AsyncIOMotorClient(os.getenv("MONGO_URL"), timeoutMS=MONGO_TIMEOUT_MS)
+    await init_beanie(database=mongo_client[os.getenv("MONGO_DB")], document_models=__beanie_models__)
+    return mongo_client
+
+
+async def _close_mongo(mongo_client):
+    from api.storage.mongodb.query_log import close_query_log_writer
+    await close_query_log_writer()  # write buffered query-log records while the client is still open
+    mongo_client.close()
+
+
+async def _init_postgres():
+    # Ensure schema/tables once, off the import path
+    from api.utils.get_pg_database import init_pg_database
+    await init_pg_database()
+
+
+async def _warm_postgres(_):
+    from api.utils.get_pg_database import warm_pg_pool
+    await warm_pg_pool(PG_WARM_CONNECTIONS)
+
+
+async def _close_postgres(_):
+    from api.storage.postgres.chat_message_writer import close_chat_message_writer
+    from api.utils.get_pg_database import close_pg_database
+    await close_chat_message_writer()  # drain pending chat writes before the pool goes away
+    await close_pg_database()
+
+
+async def _warm_retriever(retriever):
+    # Atlas connection pool + one query embedding (TLS and auth to both services)
+    await asyncio.gather(
+        asyncio.to_thread(retriever.client.admin.command, "ping"),
+        retriever.embed_query("warm-up"),
+    )
+
+
+async def _close_retriever(_):
+    from api.loaders.data_retriever import cleanup_vector_search_engine
+    await cleanup_vector_search_engine()
+
+
+async def _close_generator(generator):
+    if generator.response_cache is not None:
+        await generator.response_cache.flush()
+
+
+async def _init_auth():
+    # Warms the JWKS keys so the first authenticated request doesn't pay for the fetch
+    from api.utils.authenticate_user import start_auth_caches
+    await start_auth_caches()
+
+
+async def _close_auth(_):
+    from api.utils.authenticate_user import close_auth_caches
+    await close_auth_caches()
+
+
+def register_resources(registry):
+    """
+    Shared clients, initialized concurrently at startup. The retriever and the
+    generator come from the same singletons the route dependencies use, so
+    requests get the warmed instances instead of building their own.
+    """
+    from api.loaders.data_retriever import get_vector_search_engine
+    from api.models.ai_response_generator import get_response_generator
+
+    registry.register("mongo", _init_mongo, warmup=lambda client: client.admin.command("ping"), close=_close_mongo)
+    registry.register("postgres", _init_postgres, warmup=_warm_postgres, close=_close_postgres)
+    registry.register("retriever", get_vector_search_engine, warmup=_warm_retriever, close=_close_retriever)
+    registry.register("generator", get_response_generator, close=_close_generator)
+    registry.register("auth", _init_auth, close=_close_auth)
 
-# Global retriever instance
-_retriever = None
 
 # Lifespan context manager for modern FastAPI
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle application startup and shutdown events."""
-    global _retriever
+    from api.utils.resources import new_resource_registry
+    from api.models.cache_warmer import start_cache_warming, stop_cache_warming
+    registry = new_resource_registry()
     try:
-        # Startup: Initialize Beanie models first
-        from motor.motor_asyncio import AsyncIOMotorClient
-        from beanie import init_beanie
-        from api.schemas.mongodb.chunk import Chunk
-        from api.schemas.mongodb.subject import Subject
-        from api.schemas.mongodb.unit import Unit
-        from api.schemas.mongodb.source_document import SourceDocument
-        
-        mongo_url = os.getenv("MONGO_URL")
-        db_name = os.getenv("MONGO_DB")
-        
-        # Initialize Beanie with async motor client
-        mongo_client = AsyncIOMotorClient(mongo_url)
-        mongo_db = mongo_client[db_name]
-        
-        await init_beanie(
-            database=mongo_db,
-            document_models=[Chunk, Subject, Unit, SourceDocument]
-        )
-        print("✅ Beanie models initialized")
-        
-        # Then initialize data retriever
-        from api.loaders.data_retriever import MongoVectorSearchEngine
-        _retriever = MongoVectorSearchEngine()
-        await _retriever.initialize()
-        print("🚀 Data retriever initialized on startup")
-        
-        # Initialize AI response generator
-        from api.models.ai_response_generator import GeminiResponseGenerator
-        _ai_generator = GeminiResponseGenerator()
-        await _ai_generator.initialize()
-        print("🤖 AI Response Generator initialized on startup")
-        
+        register_resources(registry)
+        await registry.start()
+        # Scheduled replay of popular questions into the embedding/retrieval/answer caches
+        await start_cache_warming(await registry.get("retriever"), await registry.get("generator"))
         yield
     except Exception as e:
         print(f"❌ Failed to initialize: {e}")
         raise e
     finally:
-        # Shutdown: Cleanup if needed
-        if _retriever:
-            await _retriever.close()
+        await stop_cache_warming()
+        await registry.close()
         print("🔄 Application shutdown complete")
 
 app = FastAPI(
@@ -80,8 +135,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def stage_timing_middleware(request: Request, call_next):
+    """Collect per-stage timings for the request and report them as a Server-Timing header."""
+    from api.utils.metrics import REQUESTS_IN_FLIGHT, REQUEST_DURATION, server_timing_header, start_request_timings
+    timings = start_request_timings()
+    started = time.perf_counter()
+    status = 500
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        total_ms = (time.perf_counter() - started) * 1000
+        response.headers["Server-Timing"] = server_timing_header(timings, total_ms)
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        REQUEST_DURATION.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        ).observe(time.perf_counter() - started)
+
 # Include chat routes
 app.include_router(router=chat_router)
+app.include_router(router=webhook_router)
         
 
 @app.exception_handler(RequestValidationError)
@@ -108,10 +187,37 @@ async def root():
         "enhanced_processing": True
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    from api.utils.metrics import render_metrics, METRICS_CONTENT_TYPE
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 503 until every resource is initialized and warmed up."""
+    from api.utils.resources import get_resource_registry
+    status = get_resource_registry().status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "enhanced_processor": True}
+    """Health check endpoint. Reports "degraded" while any dependency circuit is open."""
+    from api.utils.circuit_breaker import circuit_breaker_states, CLOSED
+    from api.utils.admission import get_admission_controller
+    from api.utils.resources import get_resource_registry
+    from api.models.cache_warmer import get_cache_warmer
+    circuits = circuit_breaker_states()
+    warmer = get_cache_warmer()
+    degraded = any(state["state"] != CLOSED for state in circuits.values())
+    return {
+        "status": "degraded" if degraded else "healthy",
+        "enhanced_processor": True,
+        "circuits": circuits,
+        "admission": get_admission_controller().snapshot(),
+        "startup": get_resource_registry().status(),
+        "cache_warming": warmer.last_run if warmer else None
+    }
 
 
 if __name__ == "__main__":
@@ -4,56 +4,84 @@ Generates contextual responses based on retrieved chunks
 """
 
 import os
+import time
 import asyncio
 from typing import List, Dict, Any, Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from dotenv import load_dotenv
+from api.models.context_packer import ContextPacker
+from api.models.response_cache import ResponseCache, make_cache_key, LLM_CACHE_ENABLED
+from api.models.model_router import ModelRouter, FAST_TIER, PRO_TIER, FAST_MODEL_NAME, PRO_MODEL_NAME
+from api.utils.circuit_breaker import get_circuit_breaker
+from api.utils.metrics import record_token_usage
+from api.utils.token_usage import usage_from_response
 
 load_dotenv()
 
+# Shared by generations and summaries: both fail the same way when Gemini degrades
+_gemini_breaker = get_circuit_breaker("gemini", slow_call_seconds=15.0)
+
 class GeminiResponseGenerator:
     """
     Generates AI responses using Google Gemini with retrieved context
     """
 
-    def __init__(self, model_name: str = "gemini-1.5-pro", temperature: float = 0.3):
+    def __init__(self, model_name: str = PRO_MODEL_NAME, temperature: float = 0.3, max_tokens: int = 2048,
+                 fast_model_name: str = FAST_MODEL_NAME):
         """
         Initialize the Gemini response generator
 
         Args:
-            model_name: Gemini model to use (gemini-1.5-pro, gemini-1.5-flash, etc.)
+            model_name: Gemini model for complex questions (gemini-1.5-pro, etc.)
             temperature: Creativity level (0.0 = deterministic, 1.0 = creative)
+            max_tokens: Maximum response length
+            fast_model_name: Cheaper model for simple questions (gemini-1.5-flash, etc.)
         """
         self.model_name = model_name
+        self.fast_model_name = fast_model_name
         self.temperature = temperature
+        self.max_tokens = max_tokens
         self.llm = None
+        self.fast_llm = None
+        self.prompt = None
         self.chain = None
+        self.chains: Dict[str, Any] = {}
+        self.router = ModelRouter(models={PRO_TIER: model_name, FAST_TIER: fast_model_name})
+        self.context_packer = ContextPacker()
+        self.response_cache = ResponseCache() if LLM_CACHE_ENABLED else None
 
     async def initialize(self):
         """Initialize the LangChain components"""
         try:
-            # Initialize Gemini model
-            self.llm = ChatGoogleGenerativeAI(
-                model=self.model_name,
-                temperature=self.temperature,
-                google_api_key=os.getenv("GOOGLE_API_KEY"),
-                max_tokens=2048,  # Limit response length
-                timeout=30,  # Timeout for API calls
-            )
+            # Initialize Gemini models (pro is the default, fast serves simple questions)
+            self.llm = self._build_llm(self.model_name)
+            self.fast_llm = self._build_llm(self.fast_model_name)
 
             # Create the prompt template
-            self.chain = self._create_response_chain()
+            self.chain = self._create_response_chain(self.llm)
+            self.chains = {
+                PRO_TIER: self.chain,
+                FAST_TIER: self._create_response_chain(self.fast_llm),
+            }
 
-            print(f"✅ Gemini Response Generator initialized with {self.model_name}")
+            print(f"✅ Gemini Response Generator initialized with {self.model_name} / {self.fast_model_name}")
 
         except Exception as e:
             print(f"❌ Failed to initialize Gemini Response Generator: {e}")
             raise
 
-    def _create_response_chain(self):
+    def _build_llm(self, model_name: str) -> ChatGoogleGenerativeAI:
+        return ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=self.temperature,
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            max_tokens=self.max_tokens,  # Limit response length
+            timeout=30,  # Timeout for API calls
+        )
+
+    def _create_response_chain(self, llm):
         """Create the LangChain response generation chain"""
 
         # System prompt for RAG with Markdown formatting
@@ -66,8 +94,12 @@ class GeminiResponseGenerator:
         Retrieved Context:
         {context}
 
+        Conversation So Far:
+        {history}
+
         Guidelines:
         - Answer based primarily on the provided context
+        - Use the conversation so far to resolve follow-up questions ("it", "that", "the previous example")
         - If the context doesn't fully answer the question, say so clearly
         - Provide clear, step-by-step explanations when appropriate
         - Use examples from the context when available
@@ -92,13 +124,13 @@ class GeminiResponseGenerator:
 
         # Create prompt template
         prompt = ChatPromptTemplate.from_template(system_template)
+        self.prompt = prompt
 
-        # Create the chain: prompt -> LLM -> string output
+        # Create the chain: prompt -> LLM (the message keeps Gemini's usage metadata)
         chain = (
             RunnablePassthrough()  # Pass through all inputs
             | prompt
-            | self.llm
-            | StrOutputParser()  # Convert to string
+            | llm
         )
 
         return chain
@@ -109,7 +141,10 @@ class GeminiResponseGenerator:
         context_chunks: List[Dict[str, Any]],
         subject: str,
         unit: str,
-        max_chunks: int = 5
+        max_chunks: int = 5,
+        history: Optional[str] = None,
+        conversation_depth: int = 0,
+        model_tier: Optional[str] = None
     ) -> str:
         """
         Generate an AI response using retrieved context
@@ -120,62 +155,119 @@ class GeminiResponseGenerator:
             subject: Subject name
             unit: Unit name
             max_chunks: Maximum number of chunks to include in context
+            history: Rendered conversation memory (see ConversationContext.render)
+            conversation_depth: Number of history turns in the prompt (routing signal)
+            model_tier: Force "fast" or "pro" instead of routing by complexity
 
         Returns:
             Generated AI response
+
+        Raises:
+            CircuitOpenError: If Gemini's breaker is open; callers fall back
+            Exception: Any generation error, so callers can serve the fallback response
         """
         if not self.chain:
             raise RuntimeError("Response generator not initialized. Call initialize() first.")
 
         try:
             # Format context from chunks
-            context = self._format_context(context_chunks, max_chunks)
+            blocks = self.context_packer.pack(context_chunks, max_blocks=max_chunks) if context_chunks else []
+            context = self.context_packer.render(blocks) if blocks else "No relevant information found in the knowledge base."
+
+            # Pick the model tier from cheap local signals
+            decision = self.router.route(
+                question=question,
+                scores=[float(chunk.get("score") or 0) for chunk in context_chunks],
+                context_blocks=len(blocks),
+                context_tokens=sum(block.tokens for block in blocks),
+                conversation_depth=conversation_depth,
+                override=model_tier
+            )
 
             # Prepare inputs for the chain
             inputs = {
                 "question": question,
                 "context": context,
                 "subject": subject,
-                "unit": unit
+                "unit": unit,
+                "history": history or "No previous conversation."
             }
 
-            # Generate response
-            response = await self.chain.ainvoke(inputs)
+            # Identical rendered prompt + model parameters -> serve the cached generation
+            rendered_prompt = self.prompt.format(**inputs)
+            cache_key = None
+            if self.response_cache is not None:
+                cache_key = make_cache_key(
+                    rendered_prompt,
+                    model=decision.model_name,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens
+                )
+                cached = await self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
 
-            return response.strip()
+            # Generate response
+            started = time.perf_counter()
+            try:
+                response = await _gemini_breaker.call(lambda: self.chains[decision.tier].ainvoke(inputs))
+            except Exception:
+                self.router.record(decision, (time.perf_counter() - started) * 1000, ok=False)
+                raise
+            self.router.record(decision, (time.perf_counter() - started) * 1000)
+            response, usage = usage_from_response(response, decision.model_name, rendered_prompt)
+            record_token_usage("generate", usage)
+            response = response.strip()
+
+            if cache_key is not None and response:
+                await self.response_cache.set(cache_key, response, model_name=decision.model_name)
+
+            return response
 
         except Exception as e:
             print(f"❌ Error generating response: {e}")
-            return f"I apologize, but I encountered an error while generating a response. Please try again. Error: {str(e)}"
+            raise
 
-    def _format_context(self, chunks: List[Dict[str, Any]], max_chunks: int) -> str:
+    async def summarize_conversation(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
         """
-        Format retrieved chunks into a readable context string
+        Fold older chat turns into a rolling conversation summary
 
         Args:
-            chunks: List of chunk dictionaries
-            max_chunks: Maximum number to include
+            previous_summary: Summary so far (may be empty)
+            messages: Turns to add, oldest first, as {"sender", "content"} dicts
 
         Returns:
-            Formatted context string
+            The updated summary
         """
-        if not chunks:
-            return "No relevant information found in the knowledge base."
-
-        # Take top chunks
-        top_chunks = chunks[:max_chunks]
-
-        # Format each chunk
-        formatted_chunks = []
-        for i, chunk in enumerate(top_chunks, 1):
-            content = chunk.get("content", "").strip()
-            if content:
-                formatted_chunks.append(f"[Chunk {i}]\n{content}")
-
-        # Join with separators
-        context = "\n\n".join(formatted_chunks)
+        if not self.llm:
+            raise RuntimeError("Response generator not initialized. Call initialize() first.")
 
-        return context
+        transcript = "\n".join(
+            f"{'Student' if m['sender'] == 'user' else 'Assistant'}: {m['content']}" for m in messages
+        )
+        prompt = ChatPromptTemplate.from_template(
+            """
+            You maintain a running summary of a tutoring conversation.
+            Update the summary with the new turns. Keep the topics discussed, definitions given,
+            and any open questions. Write at most 150 words of plain prose.
+
+            Current summary:
+            {summary}
+
+            New turns:
+            {transcript}
+            """
+        )
+        # Summaries are simple compression work: use the fast tier
+        inputs = {"summary": previous_summary or "(none)", "transcript": transcript}
+        chain = prompt | (self.fast_llm or self.llm)
+        result = await _gemini_breaker.call(lambda: chain.ainvoke(inputs))
+        summary, usage = usage_from_response(
+            result, self.fast_model_name if self.fast_llm else self.model_name, prompt.format(**inputs)
+        )
+        # Summaries are refreshed in the background, after the turn that triggered them has answered
+        record_token_usage("summarize", usage, attribute_to_request=False)
+        return summary.strip()
 
     async def generate_fallback_response(
         self,
@@ -0,0 +1,281 @@
+"""
+Query-log-driven cache warming.
+
+Replays the most-asked questions per unit (see atop_questions) through the
+same embed -> search -> generate path as /chat/message, so the query-embedding,
+retrieval and answer caches are filled before students arrive. Questions are
+replayed as first turns (no conversation history), which is what the answer
+cache sees for a fresh question.
+
+Warming is deliberately gentle:
+  - at most CACHE_WARM_CONCURRENCY questions are in flight;
+  - generations are paced by a token bucket (CACHE_WARM_GENERATIONS_PER_MINUTE)
+    and capped per run (CACHE_WARM_MAX_GENERATIONS) to stay inside the Gemini quota;
+  - a generation waits while live users are queued for a generation slot;
+  - an open circuit stops the run instead of hammering a degraded dependency.
+
+Runs happen at the local times in CACHE_WARM_SCHEDULE (e.g. "07:30,12:45"),
+optionally once right after startup (CACHE_WARM_ON_STARTUP). The embedding and
+retrieval caches are per process, so each worker warms itself; the answer
+cache's MongoDB tier is shared, so only the first worker pays for generations.
+
+One-off run against the persistent answer cache:
+    python -m api.models.cache_warmer --top-n 20 --days 14
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from beanie.operators import And
+
+from api.schemas.mongodb.subject import Subject
+from api.schemas.mongodb.unit import Unit
+from api.storage.mongodb.query_log import atop_questions
+from api.utils.admission import TokenBucket, get_admission_controller
+from api.utils.circuit_breaker import CircuitOpenError
+from api.utils.metrics import request_cache_results, start_request_timings
+
+CACHE_WARM_TOP_N = int(os.getenv("CACHE_WARM_TOP_N", "20"))
+CACHE_WARM_DAYS = int(os.getenv("CACHE_WARM_DAYS", "14"))
+CACHE_WARM_MIN_COUNT = int(os.getenv("CACHE_WARM_MIN_COUNT", "2"))
+CACHE_WARM_CONCURRENCY = int(os.getenv("CACHE_WARM_CONCURRENCY", "4"))
+CACHE_WARM_GENERATIONS_PER_MINUTE = float(os.getenv("CACHE_WARM_GENERATIONS_PER_MINUTE", "30"))
+CACHE_WARM_MAX_GENERATIONS = int(os.getenv("CACHE_WARM_MAX_GENERATIONS", "300"))
+CACHE_WARM_SCHEDULE = os.getenv("CACHE_WARM_SCHEDULE", "")
+CACHE_WARM_ON_STARTUP = os.getenv("CACHE_WARM_ON_STARTUP", "false").lower() == "true"
+
+# How long a warm-up generation waits between checks for queued live traffic
+TRAFFIC_POLL_SECONDS = 0.5
+
+
+def parse_schedule(schedule: str) -> List[Tuple[int, int]]:
+    """"07:30, 12:45" -> [(7, 30), (12, 45)]"""
+    times = []
+    for part in schedule.split(","):
+        part = part.strip()
+        if part:
+            hour, minute = part.split(":")
+            times.append((int(hour), int(minute)))
+    return sorted(times)
+
+
+def seconds_until_next(times: List[Tuple[int, int]], now: Optional[datetime] = None) -> float:
+    now = now or datetime.now()
+    candidates = []
+    for hour, minute in times:
+        at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if at <= now:
+            at += timedelta(days=1)
+        candidates.append(at)
+    return (min(candidates) - now).total_seconds()
+
+
+class CacheWarmer:
+    """
+    Replays popular questions through a search engine and response generator.
+    """
+
+    def __init__(
+        self,
+        search_engine,
+        ai_generator,
+        concurrency: int = CACHE_WARM_CONCURRENCY,
+        generations_per_minute: float = CACHE_WARM_GENERATIONS_PER_MINUTE,
+        max_generations: int = CACHE_WARM_MAX_GENERATIONS,
+    ):
+        """
+        Args:
+            search_engine: MongoVectorSearchEngine (embedding + retrieval caches)
+            ai_generator: GeminiResponseGenerator (answer cache)
+            concurrency: Questions warmed at once
+            generations_per_minute: Pace of generation attempts
+            max_generations: Generation attempts per run
+        """
+        self.search_engine = search_engine
+        self.ai_generator = ai_generator
+        self.concurrency = concurrency
+        self.max_generations = max_generations
+        self._generation_rate = generations_per_minute / 60
+        self._running = asyncio.Lock()
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    async def _unit_filters(self, subject_name: str, unit_title: str) -> Optional[Dict[str, str]]:
+        subject = await Subject.find_one(Subject.name == subject_name)
+        if not subject:
+            return None
+        unit = await Unit.find_one(And(Unit.subject.id == subject.id, Unit.title == unit_title))
+        if not unit:
+            return None
+        return {"subject_id": str(subject.id), "unit_id": str(unit.id)}
+
+    async def _generation_permit(self, bucket: TokenBucket):
+        """Wait for a token from the pacing bucket and for live traffic to drain."""
+        while True:
+            taken, wait = bucket.try_take()
+            if taken:
+                break
+            await asyncio.sleep(wait)
+        admission = get_admission_controller()
+        while admission.snapshot()["queued"] > 0:
+            await asyncio.sleep(TRAFFIC_POLL_SECONDS)
+
+    async def _warm_one(self, item: Dict[str, Any], filters: Dict[str, str], bucket: TokenBucket,
+                        stats: Dict[str, int]):
+        # Own cache-result map per question, so hits and misses can be tallied
+        start_request_timings()
+        embedding = await self.search_engine.embed_query(item["text"])
+        chunks = await self.search_engine.search_by_vector(embedding, filters=filters)
+        if not chunks:
+            stats["no_context"] += 1
+            return
+        if stats["generation_attempts"] >= self.max_generations:
+            stats["skipped_budget"] += 1
+            return
+        stats["generation_attempts"] += 1
+
+        await self._generation_permit(bucket)
+        await self.ai_generator.generate_response(
+            question=item["text"],
+            context_chunks=[
+                {"content": chunk.page_content, "metadata": chunk.metadata, "score": chunk.metadata.get("score", 0)}
+                for chunk in chunks
+            ],
+            subject=item["subject"],
+            unit=item["unit"],
+        )
+        if request_cache_results().get("llm_response", "miss") == "miss":
+            stats["generated"] += 1
+        else:
+            stats["already_cached"] += 1
+
+    async def run(self, top_n: int = CACHE_WARM_TOP_N, days: int = CACHE_WARM_DAYS,
+                  min_count: int = CACHE_WARM_MIN_COUNT) -> Dict[str, Any]:
+        """Warm the caches with the top `top_n` questions per unit (a second concurrent run waits for the first)."""
+        async with self._running:
+            started = time.perf_counter()
+            items = await atop_questions(top_n, days=days, min_count=min_count)
+            stats = {"questions": len(items), "generation_attempts": 0, "generated": 0, "already_cached": 0,
+                     "no_context": 0, "unknown_unit": 0, "skipped_budget": 0, "failed": 0, "aborted": 0}
+
+            filters_by_unit: Dict[Tuple[str, str], Optional[Dict[str, str]]] = {}
+            for item in items:
+                key = (item["subject"], item["unit"])
+                if key not in filters_by_unit:
+                    filters_by_unit[key] = await self._unit_filters(*key)
+
+            bucket = TokenBucket(rate=self._generation_rate, burst=max(1, self.concurrency))
+            semaphore = asyncio.Semaphore(self.concurrency)
+            circuit_open = asyncio.Event()
+
+            async def warm(item):
+                filters = filters_by_unit[(item["subject"], item["unit"])]
+                if filters is None:
+                    stats["unknown_unit"] += 1
+                    return
+                async with semaphore:
+                    if circuit_open.is_set():
+                        stats["aborted"] += 1
+                        return
+                    try:
+                        await self._warm_one(item, filters, bucket, stats)
+                    except CircuitOpenError as e:
+                        # A dependency is degraded: leave it alone rather than adding load
+                        if not circuit_open.is_set():
+                            print(f"⚠️ Cache warming stopped: {e}")
+                        circuit_open.set()
+                        stats["aborted"] += 1
+                    except Exception as e:
+                        stats["failed"] += 1
+                        print(f"⚠️ Cache warming failed for '{item['text'][:60]}': {e}")
+
+            await asyncio.gather(*(warm(item) for item in items))
+            stats["elapsed_s"] = round(time.perf_counter() - started, 1)
+            self.last_run = {"finished_at": datetime.utcnow().isoformat(), **stats}
+            print(f"🔥 Cache warming: {stats['questions']} questions, {stats['generated']} generated, "
+                  f"{stats['already_cached']} already cached, {stats['failed']} failed in {stats['elapsed_s']}s")
+            return self.last_run
+
+    async def run_schedule(self, times: List[Tuple[int, int]], on_startup: bool = False):
+        """Run at each scheduled local time until cancelled."""
+        if on_startup:
+            await self._run_logged()
+        while True:
+            await asyncio.sleep(seconds_until_next(times))
+            await self._run_logged()
+
+    async def _run_logged(self):
+        try:
+            await self.run()
+        except Exception as e:
+            print(f"❌ Cache warming run failed: {e}")
+
+
+_warmer_instance: Optional[CacheWarmer] = None
+_schedule_task: Optional[asyncio.Task] = None
+
+
+def get_cache_warmer() -> Optional[CacheWarmer]:
+    return _warmer_instance
+
+
+async def start_cache_warming(search_engine, ai_generator) -> Optional[CacheWarmer]:
+    """Start the scheduled warm-up loop if CACHE_WARM_SCHEDULE or CACHE_WARM_ON_STARTUP is set."""
+    global _warmer_instance, _schedule_task
+    times = parse_schedule(CACHE_WARM_SCHEDULE)
+    if not times and not CACHE_WARM_ON_STARTUP:
+        return None
+    _warmer_instance = CacheWarmer(search_engine, ai_generator)
+    if times:
+        _schedule_task = asyncio.create_task(_warmer_instance.run_schedule(times, on_startup=CACHE_WARM_ON_STARTUP))
+    else:
+        _schedule_task = asyncio.create_task(_warmer_instance._run_logged())
+    print(f"🔥 Cache warming scheduled at {CACHE_WARM_SCHEDULE or 'startup'}")
+    return _warmer_instance
+
+
+async def stop_cache_warming(_=None):
+    global _warmer_instance, _schedule_task
+    if _schedule_task is not None and not _schedule_task.done():
+        _schedule_task.cancel()
+        try:
+            await _schedule_task
+        except asyncio.CancelledError:
+            pass
+    _schedule_task = None
+    _warmer_instance = None
+
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from api.loaders.data_retriever import cleanup_vector_search_engine, get_vector_search_engine
+    from api.models.ai_response_generator import get_response_generator
+    from api.schemas.mongodb import __beanie_models__
+
+    parser = argparse.ArgumentParser(description="Warm the answer cache from the query log")
+    parser.add_argument("--top-n", type=int, default=CACHE_WARM_TOP_N, help="Questions per unit")
+    parser.add_argument("--days", type=int, default=CACHE_WARM_DAYS, help="Query-log window")
+    parser.add_argument("--min-count", type=int, default=CACHE_WARM_MIN_COUNT)
+    args = parser.parse_args()
+
+    load_dotenv()
+    mongo_client = AsyncIOMotorClient(os.getenv("MONGO_URL"))
+    await init_beanie(database=mongo_client[os.getenv("MONGO_DB")], document_models=__beanie_models__)
+    generator = await get_response_generator()
+    try:
+        warmer = CacheWarmer(await get_vector_search_engine(), generator)
+        await warmer.run(top_n=args.top_n, days=args.days, min_count=args.min_count)
+    finally:
+        if generator.response_cache is not None:
+            await generator.response_cache.flush()
+        await cleanup_vector_search_engine()
+        mongo_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
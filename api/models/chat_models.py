@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 class ChatRequestModel(BaseModel):
     message: str = Field(..., description="The user message for the chat")
@@ -7,10 +7,12 @@ class ChatRequestModel(BaseModel):
     subject: str = Field(..., description="The subject of the chat message")
     unit: str = Field(..., description="The unit associated with the chat message")
     timestamp: str = Field(..., description="The timestamp of the message")
+    model_tier: Optional[Literal["fast", "pro"]] = Field(None, description="Use the fast model instead of automatic routing; \"pro\" is only honored for allowlisted users")
 
 
 class ChatResponseModel(BaseModel):
     response: str = Field(..., description="The AI-generated response to the chat message")
     sources: Optional[List[Dict[str, Any]]] = Field(None, description="List of sources used for generating the response")
     chat_id: Optional[str] = Field(None, description="The ID of the chat session")
-    message_id: Optional[int] = Field(None, description="The ID of the chat message")
\ No newline at end of file
+    message_id: Optional[int] = Field(None, description="The ID of the chat message")
+    usage: Optional[Dict[str, Any]] = Field(None, description="Token counts and estimated cost, in total and per stage")
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Token-budget-aware context packing.
+
+Retrieved chunks were split with a character overlap, so neighbours from the
+same page repeat text when pasted side by side. The packer merges runs of
+consecutive chunks (same document, same page, consecutive chunk index) into a
+single block with the duplicated overlap stripped, orders blocks by their best
+retrieval score and fills a token budget using the token counts computed at
+ingestion (falling back to a local estimate for chunks ingested before that).
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.utils.token_counter import estimate_tokens
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# Upper bound on the overlap we look for; the splitter uses 150-180 characters
+MAX_OVERLAP_CHARS = int(os.getenv("CONTEXT_MAX_OVERLAP_CHARS", "400"))
+# Shorter suffix/prefix matches are treated as coincidence, not overlap
+MIN_OVERLAP_CHARS = 20
+
+
+@dataclass
+class ContextBlock:
+    content: str
+    score: float
+    tokens: int
+    source: Optional[str] = None
+    page: Optional[int] = None
+    chunk_indexes: List[int] = field(default_factory=list)
+
+
+def _chunk_metadata(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Chunk-level metadata. Atlas search results carry the stored document's fields
+    as metadata, so the Chunk.metadata dict arrives nested under "metadata".
+    """
+    metadata = chunk.get("metadata") or {}
+    nested = metadata.get("metadata")
+    if isinstance(nested, dict):
+        return {**metadata, **nested}
+    return metadata
+
+
+def _position(metadata: Dict[str, Any]) -> Tuple[Optional[int], Optional[int]]:
+    """(page, index within page) from page_number/chunk_index_in_page or a 'page-index' chunk_id."""
+    page = metadata.get("page_number")
+    index = metadata.get("chunk_index_in_page")
+    chunk_id = metadata.get("chunk_id")
+    if (page is None or index is None) and isinstance(chunk_id, str) and "-" in chunk_id:
+        page_part, _, index_part = chunk_id.partition("-")
+        try:
+            page, index = int(page_part), int(index_part)
+        except ValueError:
+            pass
+    try:
+        return (int(page) if page is not None else None, int(index) if index is not None else None)
+    except (TypeError, ValueError):
+        return None, None
+
+
+def overlap_length(left: str, right: str, max_overlap: int = MAX_OVERLAP_CHARS) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`."""
+    limit = min(len(left), len(right), max_overlap)
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_text(left: str, right: str) -> str:
+    """Join two neighbouring chunks, dropping the overlap they share."""
+    size = overlap_length(left, right)
+    if size:
+        return left + right[size:]
+    return f"{left}\n{right}"
+
+
+class ContextPacker:
+    """
+    Builds the prompt context from retrieved chunks within a token budget.
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+
+    def build_blocks(self, chunks: List[Dict[str, Any]]) -> List[ContextBlock]:
+        """Merge contiguous chunks into blocks (unordered)."""
+        located = []
+        blocks: List[ContextBlock] = []
+        for chunk in chunks:
+            content = (chunk.get("content") or "").strip()
+            if not content:
+                continue
+            metadata = _chunk_metadata(chunk)
+            score = float(chunk.get("score") or metadata.get("score") or 0.0)
+            tokens = metadata.get("token_count") or estimate_tokens(content)
+            source = metadata.get("source") or str(metadata.get("document") or "") or None
+            page, index = _position(metadata)
+            block = ContextBlock(content=content, score=score, tokens=int(tokens), source=source, page=page,
+                                 chunk_indexes=[index] if index is not None else [])
+            if page is None or index is None:
+                blocks.append(block)
+            else:
+                located.append(((source or "", page, index), block))
+
+        # Walk each page in chunk order, extending the current block while indexes are consecutive
+        located.sort(key=lambda item: item[0])
+        current: Optional[ContextBlock] = None
+        current_key = None
+        for (source, page, index), block in located:
+            if current is not None and current_key == (source, page, index - 1):
+                current.content = merge_text(current.content, block.content)
+                current.tokens = estimate_tokens(current.content)
+                current.score = max(current.score, block.score)
+                current.chunk_indexes.append(index)
+            elif current is not None and current_key == (source, page, index):
+                # Same chunk retrieved twice (e.g. hybrid search); keep the better score
+                current.score = max(current.score, block.score)
+                continue
+            else:
+                current = block
+                blocks.append(current)
+            current_key = (source, page, index)
+        return blocks
+
+    def pack(self, chunks: List[Dict[str, Any]], max_blocks: Optional[int] = None) -> List[ContextBlock]:
+        """
+        Select blocks by descending score until the token budget is full.
+
+        Args:
+            chunks: Retrieved chunks ({"content", "metadata", "score"} dicts)
+            max_blocks: Optional cap on the number of blocks
+
+        Returns:
+            Selected blocks, best first
+        """
+        selected: List[ContextBlock] = []
+        used = 0
+        for block in sorted(self.build_blocks(chunks), key=lambda b: b.score, reverse=True):
+            if max_blocks is not None and len(selected) >= max_blocks:
+                break
+            if used + block.tokens > self.token_budget:
+                # A smaller, lower-scored block may still fit
+                continue
+            selected.append(block)
+            used += block.tokens
+        return selected
+
+    def render(self, blocks: List[ContextBlock]) -> str:
+        formatted = []
+        for i, block in enumerate(blocks, 1):
+            label = f"[Chunk {i}]" if block.page is None else f"[Chunk {i} - page {block.page}]"
+            formatted.append(f"{label}\n{block.content}")
+        return "\n\n".join(formatted)
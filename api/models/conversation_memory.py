@@ -0,0 +1,189 @@
+"""
+Token-budgeted conversation memory.
+
+Recent turns of a chat session are fetched (concurrently with retrieval) and
+packed newest-first into a fixed token budget. Turns that no longer fit are
+folded into a rolling per-session summary, which is cached in-process and
+updated incrementally in the background: each update only summarizes the
+messages that fell out of the window since the last one.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from api.schemas.postgres import ChatSession
+from api.storage.postgres.chat_messages_manager import aget_messages_page, aget_messages_between
+from api.utils.token_counter import estimate_tokens, truncate_to_tokens
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1500"))
+HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "20"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "400"))
+# Fold dropped turns into the summary only once this many have accumulated
+SUMMARY_MIN_NEW_MESSAGES = int(os.getenv("CHAT_SUMMARY_MIN_NEW_MESSAGES", "4"))
+SUMMARY_CACHE_SIZE = int(os.getenv("CHAT_SUMMARY_CACHE_SIZE", "5000"))
+# Long AI answers are clipped so a single turn can't eat the whole budget
+MAX_MESSAGE_TOKENS = int(os.getenv("CHAT_HISTORY_MAX_MESSAGE_TOKENS", "400"))
+
+
+@dataclass
+class RollingSummary:
+    text: str = ""
+    through_message_id: int = 0
+
+
+@dataclass
+class ConversationContext:
+    """What the prompt gets: an optional summary plus the recent turns that fit the budget."""
+    summary: str = ""
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    tokens: int = 0
+    # Whether the requesting user owns the session (None: not checked, e.g. the load failed)
+    session_owned: Optional[bool] = None
+
+    def is_empty(self) -> bool:
+        return not self.summary and not self.turns
+
+    def render(self) -> str:
+        """Render as plain text for the prompt's conversation section."""
+        if self.is_empty():
+            return "No previous conversation."
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of earlier conversation: {self.summary}")
+        for turn in self.turns:
+            speaker = "Student" if turn["sender"] == "user" else "Assistant"
+            parts.append(f"{speaker}: {turn['content']}")
+        return "\n".join(parts)
+
+
+class ConversationMemory:
+    """
+    Loads budgeted conversation context and maintains rolling summaries.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        max_messages: int = HISTORY_MAX_MESSAGES,
+        summary_token_budget: int = SUMMARY_TOKEN_BUDGET,
+    ):
+        if session_factory is None:
+            from api.utils.get_pg_database import ASYNC_SESSION
+            session_factory = ASYNC_SESSION
+        self._session_factory = session_factory
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.summary_token_budget = summary_token_budget
+        self._summaries: "OrderedDict[int, RollingSummary]" = OrderedDict()
+        self._updating: Dict[int, asyncio.Task] = {}
+
+    def _get_summary(self, chat_id: int) -> RollingSummary:
+        summary = self._summaries.get(chat_id)
+        if summary is None:
+            return RollingSummary()
+        self._summaries.move_to_end(chat_id)
+        return summary
+
+    def _put_summary(self, chat_id: int, summary: RollingSummary):
+        self._summaries[chat_id] = summary
+        self._summaries.move_to_end(chat_id)
+        while len(self._summaries) > SUMMARY_CACHE_SIZE:
+            self._summaries.popitem(last=False)
+
+    async def load(self, chat_id: int, user_id: str, summarizer=None) -> ConversationContext:
+        """
+        Build the budgeted context for the next prompt of a chat session.
+
+        Args:
+            chat_id: Chat session id
+            user_id: Owner of the session; other users' sessions yield an empty context
+                     with session_owned=False
+            summarizer: Object with an async `summarize_conversation(previous, messages)`
+                        used to fold dropped turns into the rolling summary (optional)
+
+        Returns:
+            The conversation context (possibly empty)
+        """
+        async with self._session_factory() as db:
+            chat_session = await db.get(ChatSession, chat_id)
+            if not chat_session or chat_session.user_id != user_id:
+                return ConversationContext(session_owned=False)
+            recent, _ = await aget_messages_page(chat_id, db, limit=self.max_messages)
+
+        summary = self._get_summary(chat_id)
+        summary_text = truncate_to_tokens(summary.text, self.summary_token_budget) if summary.text else ""
+        used = estimate_tokens(summary_text)
+
+        # recent is newest first: keep adding until the budget is exhausted
+        kept = []
+        for message in recent:
+            if message.id <= summary.through_message_id:
+                break
+            content = truncate_to_tokens(message.content, MAX_MESSAGE_TOKENS)
+            cost = estimate_tokens(content) + 2
+            if used + cost > self.token_budget:
+                break
+            kept.append({"sender": message.sender, "content": content, "id": message.id})
+            used += cost
+        kept.reverse()
+
+        # Anything older than the window and newer than the summary is pending summarization
+        if summarizer is not None:
+            oldest_kept_id = kept[0]["id"] if kept else (recent[0].id + 1 if recent else None)
+            dropped_in_page = sum(
+                1 for m in recent
+                if m.id > summary.through_message_id and (oldest_kept_id is None or m.id < oldest_kept_id)
+            )
+            if dropped_in_page >= SUMMARY_MIN_NEW_MESSAGES or (
+                len(recent) == self.max_messages and dropped_in_page > 0
+            ):
+                self._schedule_summary_update(chat_id, oldest_kept_id, summarizer)
+
+        return ConversationContext(
+            summary=summary_text,
+            turns=[{"sender": t["sender"], "content": t["content"]} for t in kept],
+            tokens=used,
+            session_owned=True,
+        )
+
+    def _schedule_summary_update(self, chat_id: int, before_id: Optional[int], summarizer):
+        task = self._updating.get(chat_id)
+        if task is not None and not task.done():
+            return
+        self._updating[chat_id] = asyncio.create_task(self._update_summary(chat_id, before_id, summarizer))
+
+    async def _update_summary(self, chat_id: int, before_id: Optional[int], summarizer):
+        try:
+            previous = self._get_summary(chat_id)
+            async with self._session_factory() as db:
+                messages = await aget_messages_between(
+                    chat_id, db, after_id=previous.through_message_id, before_id=before_id
+                )
+            if not messages:
+                return
+            text = await summarizer.summarize_conversation(
+                previous.text,
+                [{"sender": m.sender, "content": truncate_to_tokens(m.content, MAX_MESSAGE_TOKENS)} for m in messages],
+            )
+            self._put_summary(chat_id, RollingSummary(
+                text=truncate_to_tokens(text, self.summary_token_budget),
+                through_message_id=messages[-1].id,
+            ))
+        except Exception as e:
+            print(f"⚠️ Failed to update conversation summary for chat {chat_id}: {e}")
+        finally:
+            self._updating.pop(chat_id, None)
+
+
+_memory_instance: Optional[ConversationMemory] = None
+
+
+def get_conversation_memory() -> ConversationMemory:
+    global _memory_instance
+    if _memory_instance is None:
+        _memory_instance = ConversationMemory()
+    return _memory_instance
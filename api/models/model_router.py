@@ -0,0 +1,178 @@
+"""
+Complexity-based routing between the fast and pro Gemini tiers.
+
+Each request is scored from cheap local signals - question length and wording,
+how spread out the retrieval scores are, how much packed context the answer
+needs and how deep the conversation is - and sent to the fast model unless the
+score reaches the pro threshold. MODEL_ROUTER_FORCE can override the choice
+server-side; clients may only ask for the cheaper fast tier, unless their user
+id is listed in MODEL_ROUTER_PRO_USERS. Every decision is logged together with its latency outcome so the
+thresholds can be tuned from data.
+"""
+
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+from api.utils.token_counter import estimate_tokens
+
+FAST_TIER = "fast"
+PRO_TIER = "pro"
+
+FAST_MODEL_NAME = os.getenv("GEMINI_FAST_MODEL", "gemini-1.5-flash")
+PRO_MODEL_NAME = os.getenv("GEMINI_PRO_MODEL", "gemini-1.5-pro")
+# "fast" / "pro" forces a tier for every request (e.g. during an incident)
+MODEL_ROUTER_FORCE = os.getenv("MODEL_ROUTER_FORCE", "").lower() or None
+PRO_THRESHOLD = int(os.getenv("MODEL_ROUTER_PRO_THRESHOLD", "2"))
+# Comma-separated user ids allowed to force the pro tier from the client (e.g. staff, evaluations)
+PRO_OVERRIDE_USERS = frozenset(u.strip() for u in os.getenv("MODEL_ROUTER_PRO_USERS", "").split(",") if u.strip())
+
+LONG_QUESTION_TOKENS = 40
+VERY_LONG_QUESTION_TOKENS = 100
+LARGE_CONTEXT_BLOCKS = 3
+LARGE_CONTEXT_TOKENS = 1500
+DEEP_CONVERSATION_TURNS = 6
+# Top hits this close together mean the answer has to synthesize several sources
+FLAT_SCORE_SPREAD = 0.05
+LOW_TOP_SCORE = 0.6
+
+_REASONING_RE = re.compile(
+    r"\b(why|how does|how do|compare|contrast|difference|differentiate|derive|prove|justify|"
+    r"analy[sz]e|evaluate|step[- ]by[- ]step|trade-?offs?|advantages and disadvantages)\b",
+    flags=re.IGNORECASE
+)
+
+
+def client_override(requested: Optional[str], user_id: Optional[str]) -> Optional[str]:
+    """
+    The tier override a client is allowed to apply: a downgrade to fast for
+    anyone, pro only for PRO_OVERRIDE_USERS. Anything else routes normally.
+    """
+    if requested == FAST_TIER:
+        return FAST_TIER
+    if requested == PRO_TIER and user_id in PRO_OVERRIDE_USERS:
+        return PRO_TIER
+    return None
+
+
+@dataclass
+class RoutingDecision:
+    tier: str
+    model_name: str
+    score: int
+    reasons: List[str] = field(default_factory=list)
+    overridden: bool = False
+
+
+class ModelRouter:
+    """
+    Picks the Gemini tier for a request and keeps a window of recent outcomes.
+    """
+
+    def __init__(self, models: Optional[Dict[str, str]] = None, pro_threshold: int = PRO_THRESHOLD,
+                 force: Optional[str] = MODEL_ROUTER_FORCE, history_size: int = 1000):
+        """
+        Args:
+            models: Tier -> model name (defaults to GEMINI_FAST_MODEL / GEMINI_PRO_MODEL)
+            pro_threshold: Complexity score at which requests go to the pro tier
+            force: Tier to use for every request, bypassing the scoring
+            history_size: Number of recent outcomes kept for summary()
+        """
+        self.pro_threshold = pro_threshold
+        self.force = force if force in (FAST_TIER, PRO_TIER) else None
+        self.models = models or {FAST_TIER: FAST_MODEL_NAME, PRO_TIER: PRO_MODEL_NAME}
+        self._outcomes: Deque[Dict] = deque(maxlen=history_size)
+
+    def route(
+        self,
+        question: str,
+        scores: List[float],
+        context_blocks: int,
+        context_tokens: int,
+        conversation_depth: int = 0,
+        override: Optional[str] = None,
+    ) -> RoutingDecision:
+        """
+        Choose a tier for one request.
+
+        Args:
+            question: The user's question
+            scores: Retrieval scores of the retrieved chunks
+            context_blocks: Number of packed context blocks the prompt will carry
+            context_tokens: Estimated tokens of packed context
+            conversation_depth: Number of history turns included in the prompt
+            override: Explicit tier requested by the caller ("fast" / "pro")
+
+        Returns:
+            The routing decision
+        """
+        forced = override if override in (FAST_TIER, PRO_TIER) else self.force
+        if forced:
+            return RoutingDecision(tier=forced, model_name=self.models[forced], score=0,
+                                   reasons=["override"], overridden=True)
+
+        score = 0
+        reasons = []
+
+        question_tokens = estimate_tokens(question)
+        if question_tokens > VERY_LONG_QUESTION_TOKENS:
+            score += 2
+            reasons.append("very_long_question")
+        elif question_tokens > LONG_QUESTION_TOKENS:
+            score += 1
+            reasons.append("long_question")
+
+        if _REASONING_RE.search(question):
+            score += 1
+            reasons.append("reasoning_wording")
+
+        ranked = sorted(scores, reverse=True)
+        if ranked:
+            if ranked[0] < LOW_TOP_SCORE:
+                score += 1
+                reasons.append("weak_top_hit")
+            elif len(ranked) >= 3 and ranked[0] - ranked[2] < FLAT_SCORE_SPREAD:
+                score += 1
+                reasons.append("flat_scores")
+
+        if context_blocks >= LARGE_CONTEXT_BLOCKS or context_tokens > LARGE_CONTEXT_TOKENS:
+            score += 1
+            reasons.append("large_context")
+
+        if conversation_depth >= DEEP_CONVERSATION_TURNS:
+            score += 1
+            reasons.append("deep_conversation")
+
+        tier = PRO_TIER if score >= self.pro_threshold else FAST_TIER
+        return RoutingDecision(tier=tier, model_name=self.models[tier], score=score, reasons=reasons)
+
+    def record(self, decision: RoutingDecision, latency_ms: float, ok: bool = True):
+        """Log a decision with its latency outcome."""
+        outcome = {
+            "at": time.time(),
+            "tier": decision.tier,
+            "model": decision.model_name,
+            "score": decision.score,
+            "reasons": decision.reasons,
+            "overridden": decision.overridden,
+            "latency_ms": round(latency_ms, 1),
+            "ok": ok,
+        }
+        self._outcomes.append(outcome)
+        print(f"🧭 Routed to {decision.model_name} (score={decision.score}, reasons={','.join(decision.reasons) or '-'}) "
+              f"in {outcome['latency_ms']}ms{'' if ok else ' [error]'}")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-tier request count, error count and mean latency over the recent window."""
+        tiers: Dict[str, Dict[str, float]] = {}
+        for outcome in self._outcomes:
+            row = tiers.setdefault(outcome["tier"], {"requests": 0, "errors": 0, "total_latency_ms": 0.0})
+            row["requests"] += 1
+            row["errors"] += 0 if outcome["ok"] else 1
+            row["total_latency_ms"] += outcome["latency_ms"]
+        for row in tiers.values():
+            row["mean_latency_ms"] = row.pop("total_latency_ms") / row["requests"]
+        return tiers
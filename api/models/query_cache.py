@@ -0,0 +1,111 @@
+"""
+Query-side caches in front of Gemini embeddings and Atlas vector search.
+
+Both are in-process LRUs with a per-entry TTL:
+  - the query-embedding cache is keyed by the normalized question, and stores
+    vectors as packed float32 (a 3072-dim list of Python floats is ~100 KB,
+    the packed array ~12 KB);
+  - the retrieval cache is keyed by a digest of the query embedding plus the
+    search filters and k, so every phrasing that normalizes to the same
+    question shares one entry.
+
+Newly ingested chunks only show up in cached retrievals once the entry
+expires, so the retrieval TTL bounds how stale a warmed answer can be.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.utils.metrics import record_cache_lookup
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2000"))
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "2000"))
+RETRIEVAL_CACHE_TTL_SECONDS = int(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "43200"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Case-, width- and whitespace-insensitive form of a question, used as the cache and query-log key."""
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return _WHITESPACE.sub(" ", text).strip().rstrip("?!. ")
+
+
+class TTLCache:
+    """
+    Bounded LRU whose entries expire `ttl_seconds` after they were stored.
+    Lookups are counted under `name` in rag_cache_lookups_total.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: int):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                record_cache_lookup(self.name, "hit")
+                return value
+            del self._entries[key]
+        self.stats["misses"] += 1
+        record_cache_lookup(self.name, "miss")
+        return None
+
+    def put(self, key: str, value: Any):
+        self._entries[key] = (time.time() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_size": self.max_size, **self.stats}
+
+
+class QueryEmbeddingCache(TTLCache):
+    """Normalized question -> query embedding."""
+
+    def __init__(self, max_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+                 ttl_seconds: int = QUERY_EMBEDDING_CACHE_TTL_SECONDS):
+        super().__init__("query_embedding", max_size, ttl_seconds)
+
+    def get_embedding(self, question: str) -> Optional[List[float]]:
+        packed = self.get(normalize_question(question))
+        return packed.tolist() if packed is not None else None
+
+    def put_embedding(self, question: str, embedding: List[float]):
+        self.put(normalize_question(question), array("f", embedding))
+
+
+class RetrievalCache(TTLCache):
+    """(query embedding, filters, k) -> retrieved chunks."""
+
+    def __init__(self, max_size: int = RETRIEVAL_CACHE_SIZE, ttl_seconds: int = RETRIEVAL_CACHE_TTL_SECONDS):
+        super().__init__("retrieval", max_size, ttl_seconds)
+
+    @staticmethod
+    def make_key(embedding: List[float], filters: Optional[Dict[str, Any]], k: int) -> str:
+        digest = hashlib.sha256(array("f", embedding).tobytes())
+        digest.update(json.dumps([filters or {}, k], sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
@@ -0,0 +1,156 @@
+"""
+Exact-match LLM response cache.
+
+Generations are keyed by a SHA-256 of the fully rendered prompt plus the model
+parameters that affect the output. Lookups go to a byte-bounded in-memory LRU
+first, then to the persistent MongoDB tier (ResponseCacheEntry, expired by a
+TTL index), which survives restarts and is shared between workers. Persistent
+writes happen in the background so a miss never waits on them.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from api.schemas.mongodb.response_cache import ResponseCacheEntry
+from api.utils.metrics import record_cache_lookup
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_PERSISTENT = os.getenv("LLM_CACHE_PERSISTENT", "true").lower() == "true"
+
+
+def make_cache_key(prompt: str, **model_params: Any) -> str:
+    """Stable hash of a rendered prompt and the model parameters."""
+    params = json.dumps(model_params, sort_keys=True, default=str)
+    digest = hashlib.sha256()
+    digest.update(params.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier (memory LRU + MongoDB) cache of LLM responses with per-entry TTL.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+        persistent: bool = LLM_CACHE_PERSISTENT,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.persistent = persistent
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._pending_writes: set = set()
+        self.stats: Dict[str, int] = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._forget(key)
+        self._entries[key] = (expires_at, response, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.stats["evictions"] += 1
+
+    def _forget(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached response for `key`, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, response, _ = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                record_cache_lookup("llm_response", "memory_hit")
+                return response
+            self._forget(key)
+
+        if self.persistent:
+            try:
+                stored = await ResponseCacheEntry.find_one(ResponseCacheEntry.key == key)
+            except Exception as e:
+                print(f"⚠️ Response cache lookup failed: {e}")
+                stored = None
+            if stored is not None and stored.expires_at > datetime.utcnow():
+                expires_at = time.time() + (stored.expires_at - datetime.utcnow()).total_seconds()
+                self._remember(key, stored.response, expires_at)
+                self.stats["persistent_hits"] += 1
+                record_cache_lookup("llm_response", "persistent_hit")
+                self._background(ResponseCacheEntry.find_one(ResponseCacheEntry.key == key).inc({ResponseCacheEntry.hits: 1}))
+                return stored.response
+
+        self.stats["misses"] += 1
+        record_cache_lookup("llm_response", "miss")
+        return None
+
+    async def set(self, key: str, response: str, model_name: str, ttl_seconds: Optional[int] = None):
+        """Store a response in memory now and in the persistent tier in the background."""
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        self._remember(key, response, time.time() + ttl)
+        if self.persistent:
+            self._background(self._persist(key, response, model_name, ttl))
+
+    async def _persist(self, key: str, response: str, model_name: str, ttl: int):
+        now = datetime.utcnow()
+        await ResponseCacheEntry.find_one(ResponseCacheEntry.key == key).upsert(
+            {"$set": {
+                ResponseCacheEntry.response: response,
+                ResponseCacheEntry.model_name: model_name,
+                ResponseCacheEntry.size_bytes: len(response.encode("utf-8")),
+                ResponseCacheEntry.expires_at: now + timedelta(seconds=ttl),
+            }},
+            on_insert=ResponseCacheEntry(
+                key=key,
+                model_name=model_name,
+                response=response,
+                size_bytes=len(response.encode("utf-8")),
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl),
+            ),
+        )
+
+    def _background(self, coroutine):
+        async def runner():
+            try:
+                await coroutine
+            except Exception as e:
+                print(f"⚠️ Response cache write failed: {e}")
+
+        task = asyncio.create_task(runner())
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def flush(self):
+        """Wait for background persistent writes (used on shutdown)."""
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+
+    def clear_memory(self):
+        self._entries.clear()
+        self._bytes = 0
@@ -2,7 +2,7 @@ from api.models import BaseModel, Field, Optional
 
 class UserModel(BaseModel):
     id: str = Field(..., description="Unique identifier for the user provided by auth system")
-    email: str = Field(..., description="User's email address")
+    email: Optional[str] = Field(None, description="User's email address")
     first_name: str = Field(None, description="User's first name")
     last_name: str = Field(None, description="User's last name")
 
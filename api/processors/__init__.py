@@ -1,9 +1,11 @@
 from .document_processor import DocumentProcessor
 from .vector_embedder import ChunkEmbedder, QueryEmbedder
+from .text_splitter import StreamingTextSplitter
 
 
 __all__ = [
     "DocumentProcessor",
     "ChunkEmbedder",
-    "QueryEmbedder"
+    "QueryEmbedder",
+    "StreamingTextSplitter"
 ]
\ No newline at end of file
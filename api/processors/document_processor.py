@@ -1,14 +1,20 @@
 import os
 import re
 import sys
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import numpy as np
+from beanie import PydanticObjectId
+from bson import ObjectId
 from langchain_community.document_loaders import PyPDFLoader, OnlinePDFLoader, PagedPDFSplitter
 from langchain_core.documents import Document as LCDocument
 
 from api.schemas.mongodb import SourceDocument, Chunk
 from api.processors.vector_embedder import ChunkEmbedder
+from api.processors.text_splitter import StreamingTextSplitter
+from api.processors.near_duplicates import DEDUP_ENABLED, DEDUP_THRESHOLD, MinHasher, NearDuplicateIndex
+from api.utils.token_counter import estimate_tokens
+from api.utils.token_usage import embedding_usage
 
 
 # ---------------------------
@@ -116,24 +122,36 @@ class DocumentProcessor:
     End-to-end:
       1) Load PDF (local or URL).
       2) Clean & normalize per page.
-      3) Split with semantic-friendly splitter.
-      4) Embed via ChunkEmbedder.
-      5) Produce Chunk ODMs with stable metadata & chunk_ids.
+      3) Split the whole document in one streaming pass (chunks may cross pages).
+      4) Collapse near-duplicates (MinHash/LSH) against this document and the
+         subject's existing chunks.
+      5) Embed the remaining canonical chunks via ChunkEmbedder.
+      6) Produce Chunk ODMs with stable metadata & chunk_ids.
+
+    A near-duplicate of an earlier chunk of the same document is stored without
+    a vector, linked to its canonical chunk, so it stays out of the vector index
+    and out of search results; both are deleted together when the document is
+    re-ingested. A near-duplicate of a stored chunk (another document, possibly
+    another unit) copies the canonical chunk's vector instead of being embedded
+    again, so it stays searchable on its own if that document is deleted.
     """
 
-    def __init__(self, source_doc: SourceDocument):
+    def __init__(self, source_doc: SourceDocument,
+                 dedup_threshold: Optional[float] = DEDUP_THRESHOLD if DEDUP_ENABLED else None):
+        """
+        Args:
+            source_doc: Document to chunk, with its subject and unit links fetched
+            dedup_threshold: Estimated Jaccard similarity at which chunks are near-duplicates (None disables)
+        """
         self.source_doc = source_doc
         self.embedder = ChunkEmbedder()
         self._normalizer = TextNormalizer()
+        self.dedup_threshold = dedup_threshold
+        self._hasher = MinHasher() if dedup_threshold else None
+        self.dedup_report: Dict[str, Any] = {}
 
-        # Tuned to preserve paragraphs/sentences before characters
-        self._splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=180,
-            separators=["\n\n", "\n", ". ", " ", ""],
-            length_function=len,
-            is_separator_regex=False,
-        )
+        # Breaks at paragraphs/lines/sentences before words
+        self._splitter = StreamingTextSplitter(chunk_size=1000, chunk_overlap=180)
 
     # --- helpers ---
 
@@ -155,8 +173,48 @@ class DocumentProcessor:
         """
         Safely extract an id from either a Beanie Document or a Link[Document] that has been fetched.
         Assumes caller has fetched links if they were lazy.
+        Returned as a string: Chunk.subject_id/unit_id (and the search filters) are strings.
+        """
+        obj_id = getattr(obj, "id", None)
+        return str(obj_id) if obj_id is not None else None
+
+    @staticmethod
+    async def _load_canonical_signatures(subject_id: str) -> List[Dict[str, Any]]:
+        """MinHash signatures of the subject's stored canonical chunks."""
+        cursor = Chunk.get_pymongo_collection().find(
+            {"subject_id": subject_id, "canonical_chunk_id": None, "minhash": {"$ne": None}},
+            {"minhash": 1, "unit_id": 1},
+        )
+        return await cursor.to_list(None)
+
+    @staticmethod
+    async def _load_vectors(chunk_ids: List[str]) -> Dict[str, List[float]]:
+        cursor = Chunk.get_pymongo_collection().find(
+            {"_id": {"$in": [ObjectId(chunk_id) for chunk_id in chunk_ids]}},
+            {"vector_embedding": 1},
+        )
+        return {str(row["_id"]): row["vector_embedding"] for row in await cursor.to_list(None)}
+
+    async def _find_canonicals(
+        self, contents: List[str], subject_id: str, unit_id: str
+    ) -> Tuple[List[np.ndarray], List[Optional[Tuple[Tuple, float]]]]:
+        """
+        Signature of every chunk and, for near-duplicates, the canonical they match.
+        Canonical keys are ("batch", position, unit_id) or ("stored", chunk_id, unit_id).
         """
-        return getattr(obj, "id", None)
+        index = NearDuplicateIndex(self.dedup_threshold, self._hasher.num_perm)
+        for row in await self._load_canonical_signatures(subject_id):
+            index.add(("stored", str(row["_id"]), row.get("unit_id")), np.asarray(row["minhash"], dtype=np.uint32))
+
+        signatures, matches = [], []
+        for i, content in enumerate(contents):
+            signature = self._hasher.signature(content)
+            match = index.query(signature)
+            if match is None:
+                index.add(("batch", i, unit_id), signature)
+            signatures.append(signature)
+            matches.append(match)
+        return signatures, matches
 
     # --- main ---
 
@@ -167,13 +225,13 @@ class DocumentProcessor:
         min_chunk_chars: int = 200,
     ) -> List[Chunk]:
         # Allow runtime override of splitter sizing
-        if (chunk_size != self._splitter._chunk_size) or (overlap != self._splitter._chunk_overlap):
-            self._splitter = RecursiveCharacterTextSplitter(
+        if (chunk_size, overlap, min_chunk_chars) != (
+            self._splitter.chunk_size, self._splitter.chunk_overlap, self._splitter.min_chunk_chars
+        ):
+            self._splitter = StreamingTextSplitter(
                 chunk_size=chunk_size,
                 chunk_overlap=overlap,
-                separators=["\n\n", "\n", ". ", " ", ""],
-                length_function=len,
-                is_separator_regex=False,
+                min_chunk_chars=min_chunk_chars,
             )
 
         loader = self._resolve_loader(self.source_doc.source_url)
@@ -196,32 +254,50 @@ class DocumentProcessor:
         if not per_page_docs:
             return []
 
-        # 2) Split page docs into semantic chunks
-        all_chunks: List[LCDocument] = []
-        for page_doc in per_page_docs:
-            chunks = self._splitter.split_documents([page_doc])
-            # Filter tiny scraps
-            for c in chunks:
-                if len(c.page_content) >= min_chunk_chars:
-                    all_chunks.append(c)
+        # 2) Split the concatenated pages; paragraphs continue across page breaks and short
+        #    tails are merged, so only a document shorter than min_chunk_chars yields a scrap
+        all_chunks = [
+            c for c in self._splitter.split_pages(per_page_docs)
+            if len(c.page_content) >= min_chunk_chars
+        ]
 
         if not all_chunks:
             return []
 
-        # 3) Embed
+        subj_id = self._get_id_from(self.source_doc.subject)
+        unit_id = self._get_id_from(self.source_doc.unit)
         contents = [d.page_content for d in all_chunks]
-        vectors = await self.embedder.aembed_documents(contents)
+        chunk_ids = [PydanticObjectId() for _ in all_chunks]
+
+        # 3) Near-duplicates: only canonical chunks are embedded
+        if self._hasher is not None:
+            signatures, matches = await self._find_canonicals(contents, subj_id, unit_id)
+        else:
+            signatures, matches = [None] * len(contents), [None] * len(contents)
+
+        # 4) Duplicates of stored chunks copy their canonical's vector: the canonical belongs to another
+        #    document and may be deleted with it. Everything else canonical is embedded.
+        borrowed = {match[0][1] for match in matches if match and match[0][0] == "stored"}
+        stored_vectors = await self._load_vectors(sorted(borrowed)) if borrowed else {}
+        for i, match in enumerate(matches):
+            if match and match[0][0] == "stored" and not stored_vectors.get(match[0][1]):
+                matches[i] = None  # canonical was deleted meanwhile (or has no vector): embed this one instead
+
+        to_embed = [i for i, match in enumerate(matches) if match is None]
+        embedded = await self.embedder.aembed_documents([contents[i] for i in to_embed])
+        vectors: List[Optional[List[float]]] = [None] * len(contents)
+        for i, vector in zip(to_embed, embedded):
+            vectors[i] = vector
         embedding_model = self.embedder.get_model_name()
 
-        # 4) Build ODM chunk objects with stable chunk_ids and metadata
+        # 5) Build ODM chunk objects with stable chunk_ids and metadata
         chunk_odms: List[Chunk] = []
-        subj_id = self._get_id_from(self.source_doc.subject)
-        unit_id = self._get_id_from(self.source_doc.unit)
+        linked = reused = 0
 
         # Stable per-page chunk indexing
         page_to_counter = {}
 
-        for doc, vec in zip(all_chunks, vectors):
+        for i, doc in enumerate(all_chunks):
             page_num = int(doc.metadata.get("page_number", 0))
             page_to_counter.setdefault(page_num, 0)
             page_to_counter[page_num] += 1
@@ -231,17 +307,45 @@ class DocumentProcessor:
             meta = dict(doc.metadata or {})
             meta["chunk_index_in_page"] = chunk_idx
             meta["chunk_id"] = f"{page_num}-{chunk_idx}"  # stable: page-chunk
+            meta["token_count"] = estimate_tokens(doc.page_content)  # used by the context packer
+
+            canonical_id = None
+            vector = vectors[i]
+            if matches[i] is not None:
+                (origin, key, _), similarity = matches[i]
+                canonical_id = str(chunk_ids[key]) if origin == "batch" else key
+                meta["duplicate_similarity"] = round(similarity, 3)
+                if origin == "stored":
+                    vector = stored_vectors[key]
+                    reused += 1
+                else:
+                    linked += 1
 
             chunk = Chunk(
+                id=chunk_ids[i],
                 document=self.source_doc,
                 subject_id=subj_id,
                 unit_id=unit_id,
                 content=doc.page_content,
-                vector_embedding=vec,
+                vector_embedding=vector,
                 embedding_model=embedding_model,
+                canonical_chunk_id=canonical_id,
+                minhash=signatures[i].tolist() if signatures[i] is not None else None,
                 metadata=meta,
             )
             chunk_odms.append(chunk)
 
-        print(f"Created {len(chunk_odms)} clean chunks.")
+        duplicates = linked + reused
+        usage = embedding_usage(embedding_model, [contents[i] for i in to_embed])
+        self.dedup_report = {
+            "chunks": len(chunk_odms),
+            "embedded": len(to_embed),
+            "embedding_tokens": usage.input_tokens,
+            "embedding_cost_usd": round(usage.cost_usd, 6),
+            "linked_in_document": linked,
+            "reused_vector": reused,
+            "dedup_ratio": round(duplicates / len(chunk_odms), 4),
+        }
+        print(f"Created {len(chunk_odms)} clean chunks "
+              f"({duplicates} near-duplicates: {linked} linked, {reused} reusing a vector).")
         return chunk_odms
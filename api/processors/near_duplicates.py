@@ -0,0 +1,131 @@
+"""
+MinHash / LSH near-duplicate detection for chunks.
+
+Each chunk is reduced to a set of word shingles (k consecutive normalized
+words) and summarized by a MinHash signature: for each of `num_perm` hash
+permutations, the minimum permuted shingle hash. The fraction of positions
+where two signatures agree estimates the Jaccard similarity of the shingle
+sets. Signatures are split into `bands` bands of `rows` rows; chunks sharing
+any whole band are candidates, and candidates are confirmed when their
+estimated Jaccard similarity reaches the threshold. Band/row counts are picked
+so the LSH S-curve crosses the threshold, slightly below it to favour recall.
+"""
+
+import os
+import re
+import zlib
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", "5"))
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, words: int = DEDUP_SHINGLE_WORDS) -> List[str]:
+    """Overlapping `words`-word shingles of the lowercased alphanumeric tokens."""
+    tokens = _WORD_RE.findall(text.lower())
+    if len(tokens) <= words:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + words]) for i in range(len(tokens) - words + 1)]
+
+
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows <= num_perm whose S-curve midpoint (1/b)^(1/r) is closest below threshold."""
+    best, best_error = (num_perm, 1), float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        # Missing a duplicate costs an embedding; a false candidate only costs a comparison
+        error = threshold - midpoint if midpoint <= threshold else 2 * (midpoint - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    """Computes MinHash signatures with `num_perm` seeded universal hash permutations."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, shingle_words: int = DEDUP_SHINGLE_WORDS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """uint32 signature of length num_perm (all-max for text without words)."""
+        values = shingles(text, self.shingle_words)
+        if not values:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashed = np.array([zlib.crc32(value.encode("utf-8")) for value in values], dtype=np.uint64)
+        # Overflow wraps in uint64; the result is still a well-mixed permutation per seed
+        with np.errstate(over="ignore"):
+            permuted = ((hashed[:, None] * self._a + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def estimated_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over MinHash signatures. Keys are opaque (chunk ids, batch positions).
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM):
+        self.threshold = threshold
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: Hashable, signature: np.ndarray):
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, signature: np.ndarray) -> Optional[Tuple[Hashable, float]]:
+        """The most similar indexed key at or above the threshold, with its estimated similarity."""
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        best: Optional[Tuple[Hashable, float]] = None
+        for key in candidates:
+            similarity = estimated_similarity(signature, self._signatures[key])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+
+def find_near_duplicates(texts: Sequence[str], threshold: float = DEDUP_THRESHOLD,
+                         hasher: Optional[MinHasher] = None) -> List[Optional[int]]:
+    """
+    For each text, the index of an earlier near-duplicate it should collapse
+    into (None for canonical texts).
+    """
+    hasher = hasher or MinHasher()
+    index = NearDuplicateIndex(threshold, hasher.num_perm)
+    canonical_of: List[Optional[int]] = []
+    for i, text in enumerate(texts):
+        signature = hasher.signature(text)
+        match = index.query(signature)
+        if match is None:
+            index.add(i, signature)
+            canonical_of.append(None)
+        else:
+            canonical_of.append(match[0])
+    return canonical_of
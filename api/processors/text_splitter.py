@@ -0,0 +1,118 @@
+"""
+Document-level streaming text splitter.
+
+Cleaned pages are concatenated (joined by a newline, so a paragraph that runs
+over a page break reads as one) and split in a single greedy pass:
+
+  - each chunk extends as far as chunk_size allows and ends at the
+    highest-priority separator ("\\n\\n", "\\n", ". ", " ") in its second half,
+    or at a hard cut if there is none;
+  - the next chunk starts at the first separator boundary within the last
+    `chunk_overlap` characters, so overlaps begin on a line or sentence;
+  - a tail shorter than min_chunk_chars is absorbed into the last chunk
+    instead of being dropped.
+
+A page-offset map gives every chunk its first and last page.
+"""
+
+from bisect import bisect_right
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.documents import Document as LCDocument
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", ". ", " ")
+PAGE_JOINER = "\n"
+
+
+class StreamingTextSplitter:
+    """
+    Greedy single-pass splitter over a whole document with page tracking.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 180,
+        min_chunk_chars: int = 200,
+        separators: Sequence[str] = DEFAULT_SEPARATORS,
+    ):
+        """
+        Args:
+            chunk_size: Maximum characters per chunk (a short tail may push the last chunk past it)
+            chunk_overlap: Characters repeated at the start of the next chunk
+            min_chunk_chars: Tails shorter than this are merged into the previous chunk
+            separators: Break points in priority order; a chunk ends after its separator
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.min_chunk_chars = min_chunk_chars
+        self.separators = tuple(separators)
+
+    def _chunk_end(self, text: str, start: int, limit: int) -> int:
+        # Prefer the strongest separator that still leaves the chunk at least half full
+        floor = start + self.chunk_size // 2
+        for separator in self.separators:
+            i = text.rfind(separator, floor, limit)
+            if i != -1:
+                return i + len(separator)
+        return limit
+
+    def _next_start(self, text: str, start: int, end: int) -> int:
+        # Overlap begins at the first separator boundary inside the overlap window
+        window = max(end - self.chunk_overlap, start + 1)
+        for separator in self.separators:
+            i = text.find(separator, window, end)
+            if i != -1 and i + len(separator) < end:
+                return i + len(separator)
+        return end
+
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) character spans of the chunks of `text`."""
+        n = len(text)
+        start = n - len(text.lstrip())
+        spans: List[Tuple[int, int]] = []
+        while start < n:
+            limit = start + self.chunk_size
+            end = n if limit >= n else self._chunk_end(text, start, limit)
+            # Fold a short tail into this chunk rather than emitting (or dropping) a scrap
+            if end < n and n - end < 2 * self.min_chunk_chars and len(text[end:].strip()) < self.min_chunk_chars:
+                end = n
+            spans.append((start, end))
+            if end >= n:
+                break
+            start = self._next_start(text, start, end)
+            while start < n and text[start].isspace():
+                start += 1
+        return spans
+
+    def split_pages(self, pages: List[LCDocument]) -> List[LCDocument]:
+        """
+        Split cleaned page documents (metadata must include "page_number") as one
+        continuous text. Each chunk keeps the metadata of its first page plus
+        "page_number" / "page_end".
+        """
+        page_starts: List[int] = []
+        parts: List[str] = []
+        offset = 0
+        for page in pages:
+            page_starts.append(offset)
+            parts.append(page.page_content)
+            offset += len(page.page_content) + len(PAGE_JOINER)
+        text = PAGE_JOINER.join(parts)
+
+        chunks: List[LCDocument] = []
+        for start, end in self.split_spans(text):
+            content = text[start:end].strip()
+            if not content:
+                continue
+            first = pages[bisect_right(page_starts, start) - 1]
+            last = pages[bisect_right(page_starts, max(start, end - 1)) - 1]
+            metadata: Dict[str, Any] = dict(first.metadata or {})
+            metadata["page_end"] = last.metadata.get("page_number", metadata.get("page_number"))
+            chunks.append(LCDocument(page_content=content, metadata=metadata))
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[start:end].strip() for start, end in self.split_spans(text)]
@@ -4,6 +4,9 @@ from typing import List
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from lazy_object_proxy.utils import await_
 
+from api.utils.metrics import record_token_usage
+from api.utils.token_usage import embedding_usage
+
 
 class ChunkEmbedder:
     """
@@ -39,6 +42,7 @@ class ChunkEmbedder:
 
         print(f"Embedding {len(texts)} chunks of text...")
         vectors = await self.embedder.aembed_documents(texts)
+        record_token_usage("embed_documents", embedding_usage(self.model_name, texts))
         print("Embedding complete.")
         return vectors
 
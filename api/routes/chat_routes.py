@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from api.utils import authenticate_user
 from api.schemas import *
 from api.models import *
@@ -8,6 +10,25 @@ from api.schemas.mongodb.subject import Subject
 from beanie.operators import And
 from api.loaders.data_retriever import get_vector_search_dependency
 from api.models.ai_response_generator import get_ai_response_dependency  # AI response generator
+from api.storage.postgres.chat_message_writer import get_chat_message_writer
+from api.storage.postgres.chat_messages_manager import aget_messages_page
+from api.storage.postgres.chat_session_manager import aget_chat_session_summaries, auser_owns_chat_session
+from api.storage.postgres.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from api.storage.mongodb.query_log import get_query_log_writer
+from api.schemas.postgres import ChatSession
+from api.utils.get_pg_database import ASYNC_SESSION, get_async_pg_db
+from api.models.conversation_memory import ConversationContext, get_conversation_memory
+from api.models.model_router import client_override
+from api.utils.deadline import Deadline, DeadlineExceeded, hedged
+from api.utils.circuit_breaker import CircuitOpenError
+from api.utils.admission import AdmissionRejected, get_admission_controller
+from api.utils.metrics import record_request_usage, request_cache_results, request_usage, stage_timer
+import asyncio
+import os
+import time
+
+# Longest we wait for conversation memory once retrieval is done
+MEMORY_WAIT_SECONDS = float(os.getenv("CHAT_MEMORY_WAIT_SECONDS", "1.0"))
 
 router = APIRouter(
     prefix="/chat",
@@ -15,6 +36,105 @@ router = APIRouter(
 )
 
 
+async def _load_conversation(chat_id: str, user_id: str, ai_generator) -> ConversationContext:
+    """Budgeted history for persisted sessions; temporary client ids have none."""
+    if not chat_id.isdigit():
+        return ConversationContext()
+    try:
+        return await get_conversation_memory().load(int(chat_id), user_id, summarizer=ai_generator)
+    except Exception as e:
+        # Memory is best-effort: answer without history rather than failing the request
+        print(f"⚠️ Failed to load conversation memory for chat {chat_id}: {e}")
+        return ConversationContext()
+
+
+async def _session_owned(chat_id: int, user_id: str, conversation: ConversationContext,
+                         memory_task: asyncio.Task) -> bool:
+    """Whether `user_id` owns the chat session; reuses the memory load's check when it finished."""
+    if conversation.session_owned is None and memory_task.done() and not memory_task.cancelled():
+        conversation = memory_task.result()
+    if conversation.session_owned is not None:
+        return conversation.session_owned
+    # Memory timed out or failed: check ownership directly
+    async with ASYNC_SESSION() as db:
+        return await auser_owns_chat_session(chat_id, user_id, db)
+
+
+def _chat_not_found(chat_id: str) -> HTTPException:
+    return HTTPException(status_code=404, detail=f"Chat session {chat_id} not found")
+
+
+async def _resolve_catalog(subject_name: str, unit_title: str):
+    """Look up the Subject and Unit a chat message is scoped to (404 if either is unknown)."""
+    subject = await Subject.find_one(Subject.name == subject_name)
+    if not subject:
+        raise HTTPException(status_code=404, detail=f"Subject '{subject_name}' not found")
+
+    specific_unit = await Unit.find_one(
+        And(
+            Unit.subject.id == subject.id,
+            Unit.title == unit_title
+        )
+    )
+
+    if not specific_unit:
+        raise HTTPException(status_code=404, detail=f"Unit '{unit_title}' not found for subject '{subject_name}'")
+    return subject, specific_unit
+
+
+async def _await_conversation(memory_task: asyncio.Task, deadline: Deadline) -> ConversationContext:
+    """Wait briefly for the concurrently loading memory; answer without it if it's late."""
+    timeout = min(MEMORY_WAIT_SECONDS, deadline.remaining())
+    try:
+        with stage_timer("memory"):
+            return await asyncio.wait_for(asyncio.shield(memory_task), timeout=timeout)
+    except asyncio.TimeoutError:
+        print("⏱️ Conversation memory not ready in time; answering without history")
+        return ConversationContext()
+
+
+async def _retrieve(request_data: ChatRequestModel, search_engine, deadline: Deadline):
+    """
+    Catalog lookup, query embedding and vector search under the request deadline.
+    Returns the retrieved chunks, the reason if a stage ran out of time or its
+    dependency's circuit is open, and the validated (subject, unit) names
+    (None if the catalog lookup didn't finish).
+    """
+    scope = None
+    try:
+        # Validate subject and unit exist
+        subject, specific_unit = await deadline.run(
+            "catalog", _resolve_catalog(request_data.subject, request_data.unit)
+        )
+        scope = (subject.name, specific_unit.title)
+
+        # Use filters to narrow search to specific subject/unit
+        filters = {
+            "subject_id": str(subject.id),
+            "unit_id": str(specific_unit.id)
+        }
+
+        # Embed and search as separate stages; both are idempotent, so slow attempts get hedged
+        embedding = await deadline.run(
+            "embed", hedged("embed", lambda: search_engine.embed_query(request_data.message))
+        )
+        relevant_chunks = await deadline.run(
+            "search", hedged("search", lambda: search_engine.search_by_vector(embedding, filters=filters))
+        )
+        return relevant_chunks, None, scope
+    except (DeadlineExceeded, CircuitOpenError) as e:
+        print(f"⏱️ {e}; degrading to fallback response")
+        return [], str(e), scope
+
+
+def _too_many_requests(rejection: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=rejection.reason,
+        headers={"Retry-After": str(rejection.retry_after)}
+    )
+
+
 @router.post("/message")
 async def chat_message(
     request_data: ChatRequestModel,
@@ -23,33 +143,26 @@ async def chat_message(
     ai_generator=Depends(get_ai_response_dependency)      # AI response generator
 ):
     """Handle chat messages. Expect a ChatRequestModel (Pydantic) in the body."""
+    started = time.perf_counter()
+
+    # Per-user rate and concurrency limits before any work is done
+    admission = get_admission_controller()
     try:
-        # Validate subject and unit exist
-        subject = await Subject.find_one(Subject.name == request_data.subject)
-        if not subject:
-            raise HTTPException(status_code=404, detail=f"Subject '{request_data.subject}' not found")
-
-        specific_unit = await Unit.find_one(
-            And(
-                Unit.subject.id == subject.id,
-                Unit.title == request_data.unit
-            )
-        )
+        admission.enter(user.id)
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
 
-        if not specific_unit:
-            raise HTTPException(status_code=404, detail=f"Unit '{request_data.unit}' not found for subject '{request_data.subject}'")
+    # One budget for the whole request, split across catalog -> embed -> search -> generate
+    deadline = Deadline()
+    memory_task = asyncio.create_task(_load_conversation(request_data.chat_id, user.id, ai_generator))
 
-        # Use filters to narrow search to specific subject/unit
-        filters = {
-            "subject_id": str(subject.id),
-            "unit_id": str(specific_unit.id)
-        }
+    try:
+        relevant_chunks, degraded_reason, scope = await _retrieve(request_data, search_engine, deadline)
 
-        # Perform vector search with filters
-        relevant_chunks = await search_engine.vector_search(
-            query=request_data.message,
-            filters=filters
-        )
+        # Conversation memory was loading concurrently; don't let it eat the generation budget
+        conversation = await _await_conversation(memory_task, deadline)
+        if conversation.session_owned is False:
+            raise _chat_not_found(request_data.chat_id)
 
         # Generate AI response using retrieved chunks
         if relevant_chunks:
@@ -57,23 +170,71 @@ async def chat_message(
                 {
                     "content": chunk.page_content,
                     "metadata": chunk.metadata,
-                    "score": getattr(chunk, 'score', 0) if hasattr(chunk, 'score') else 0
+                    "score": chunk.metadata.get("score", 0)
                 }
                 for chunk in relevant_chunks
             ]
 
-            ai_response = await ai_generator.generate_response(
+            # Generation slots are capped globally and shared fairly between users
+            async with admission.generation_slot(user.id, timeout=deadline.remaining()):
+                try:
+                    ai_response = await deadline.run("generate", ai_generator.generate_response(
+                        question=request_data.message,
+                        context_chunks=context_chunks,
+                        subject=request_data.subject,
+                        unit=request_data.unit,
+                        history=conversation.render(),
+                        conversation_depth=len(conversation.turns),
+                        model_tier=client_override(request_data.model_tier, user.id)
+                    ))
+                except (DeadlineExceeded, CircuitOpenError) as e:
+                    print(f"⏱️ {e}; degrading to fallback response")
+                    degraded_reason = str(e)
+                except Exception as e:
+                    # Generation failed: answer with the fallback instead of an error string
+                    degraded_reason = f"Response generation failed: {e}"
+
+        if not relevant_chunks or degraded_reason:
+            ai_response = await ai_generator.generate_fallback_response(
                 question=request_data.message,
-                context_chunks=context_chunks,
                 subject=request_data.subject,
-                unit=request_data.unit
+                unit=request_data.unit,
+                error_message=degraded_reason or "No relevant chunks found in vector search"
             )
-        else:
-            ai_response = await ai_generator.generate_fallback_response(
-                question=request_data.message,
+
+        # Tokens and cost of this turn (embed + generate), attributed to the unit. Metric labels
+        # only ever take catalog names, never raw client input
+        usage = request_usage()
+        record_request_usage(getattr(user, "id", None), *(scope or ("unknown", "unknown")))
+
+        # Persist the turn write-behind: the response never waits on a Postgres commit.
+        # Temporary client-side ids (e.g. "temp-<ts>") have no chat session to attach to.
+        if request_data.chat_id.isdigit():
+            # Only into the user's own session (memory may not have confirmed it in time)
+            if not await _session_owned(int(request_data.chat_id), user.id, conversation, memory_task):
+                raise _chat_not_found(request_data.chat_id)
+            get_chat_message_writer().enqueue_turn(
+                chat_id=int(request_data.chat_id),
+                query=request_data.message,
+                response=ai_response,
+                sources=[
+                    {"content": chunk.page_content, "metadata": chunk.metadata}
+                    for chunk in relevant_chunks
+                ],
+                user_metadata={"user_id": user.id, "subject": request_data.subject, "unit": request_data.unit},
+                usage=usage
+            )
+
+        # Compact query-log record; the cache warmer replays the most-asked questions
+        query_log = get_query_log_writer()
+        if query_log is not None:
+            query_log.append(
                 subject=request_data.subject,
                 unit=request_data.unit,
-                error_message="No relevant chunks found in vector search"
+                question=request_data.message,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                cache=request_cache_results(),
+                degraded=degraded_reason is not None
             )
 
         return {
@@ -83,11 +244,82 @@ async def chat_message(
             "subject": request_data.subject,
             "unit": request_data.unit,
             "chunks_found": len(relevant_chunks),
-            "chunks": [chunk.page_content for chunk in relevant_chunks[:3]]
+            "chunks": [chunk.page_content for chunk in relevant_chunks[:3]],
+            "degraded": degraded_reason is not None,
+            "usage": usage
         }
 
     except HTTPException:
         raise
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
     except Exception as e:
         # Return a controlled 500 error rather than raising arbitrary exceptions
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission.leave(user.id)
+        if not memory_task.done():
+            memory_task.cancel()
+
+
+@router.get("/{chat_id}/history")
+async def chat_history(
+    chat_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    user=Depends(authenticate_user),
+    db: AsyncSession = Depends(get_async_pg_db)
+):
+    """Page through a chat session's messages, newest first."""
+    chat_session = await db.get(ChatSession, chat_id)
+    if not chat_session or chat_session.user_id != user.id:
+        raise HTTPException(status_code=404, detail=f"Chat session {chat_id} not found")
+
+    try:
+        messages, next_cursor = await aget_messages_page(chat_id, db, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "chat_id": chat_id,
+        "messages": [
+            {
+                "id": message.id,
+                "sender": message.sender,
+                "content": message.content,
+                "chunks": message.chunks,
+                "created_at": message.created_at.isoformat(),
+            }
+            for message in messages
+        ],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+
+
+@router.get("/sessions")
+async def chat_sessions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    user=Depends(authenticate_user),
+    db: AsyncSession = Depends(get_async_pg_db)
+):
+    """Sidebar listing: the user's sessions with last-message preview and message count."""
+    try:
+        sessions, next_cursor = await aget_chat_session_summaries(user.id, db, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "sessions": [
+            {
+                **session,
+                "created_at": session["created_at"].isoformat() if session["created_at"] else None,
+                "updated_at": session["updated_at"].isoformat() if session["updated_at"] else None,
+                "last_message_at": session["last_message_at"].isoformat() if session["last_message_at"] else None,
+            }
+            for session in sessions
+        ],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Request
+from api.utils.user_profile_store import apply_clerk_user_event
+from dotenv import load_dotenv
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+load_dotenv()
+
+CLERK_WEBHOOK_SECRET = os.getenv("CLERK_WEBHOOK_SECRET")
+WEBHOOK_TOLERANCE_SECONDS = 5 * 60
+
+router = APIRouter(
+    prefix="/webhooks",
+    tags=["webhooks"]
+)
+
+
+def verify_svix_signature(secret: str, headers, body: bytes) -> None:
+    """
+    Verify a Clerk (Svix) webhook signature.
+
+    Clerk signs `{svix-id}.{svix-timestamp}.{body}` with HMAC-SHA256 using the
+    base64 secret after the `whsec_` prefix; `svix-signature` carries one or more
+    space-separated `v1,<base64 digest>` entries.
+
+    Raises:
+        HTTPException: 400 if the headers are missing, stale or no signature matches
+    """
+    msg_id = headers.get("svix-id")
+    timestamp = headers.get("svix-timestamp")
+    signatures = headers.get("svix-signature")
+    if not (msg_id and timestamp and signatures):
+        raise HTTPException(status_code=400, detail="Missing webhook signature headers")
+
+    try:
+        if abs(time.time() - int(timestamp)) > WEBHOOK_TOLERANCE_SECONDS:
+            raise HTTPException(status_code=400, detail="Webhook timestamp outside tolerance")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook timestamp")
+
+    key = base64.b64decode(secret.split("_", 1)[1] if secret.startswith("whsec_") else secret)
+    signed_content = f"{msg_id}.{timestamp}.".encode("utf-8") + body
+    expected = base64.b64encode(hmac.new(key, signed_content, hashlib.sha256).digest()).decode()
+
+    for entry in signatures.split(" "):
+        version, _, signature = entry.partition(",")
+        if version == "v1" and hmac.compare_digest(signature, expected):
+            return
+    raise HTTPException(status_code=400, detail="Invalid webhook signature")
+
+
+@router.post("/clerk")
+async def clerk_webhook(request: Request):
+    """Keep ragApp.users in sync with Clerk `user.created/updated/deleted` events."""
+    if not CLERK_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Clerk webhook secret not configured")
+
+    body = await request.body()
+    verify_svix_signature(CLERK_WEBHOOK_SECRET, request.headers, body)
+
+    try:
+        event = json.loads(body)
+        event_type = event["type"]
+        data = event.get("data") or {}
+    except (ValueError, KeyError):
+        raise HTTPException(status_code=400, detail="Malformed webhook payload")
+
+    try:
+        user_id = await apply_clerk_user_event(event_type, data)
+    except Exception as e:
+        print(f"❌ Failed to apply Clerk event {event_type}: {e}")
+        # Non-2xx makes Clerk retry the delivery
+        raise HTTPException(status_code=500, detail="Failed to apply webhook event")
+
+    return {"received": True, "type": event_type, "user_id": user_id}
@@ -8,5 +8,7 @@ from .subject import Subject
 from .unit import Unit
 from .source_document import SourceDocument
 from .chunk import Chunk
+from .response_cache import ResponseCacheEntry
+from .query_log import QueryLogEntry
 
-__beanie_models__ = [Subject, Unit, SourceDocument, Chunk]
\ No newline at end of file
+__beanie_models__ = [Subject, Unit, SourceDocument, Chunk, ResponseCacheEntry, QueryLogEntry]
\ No newline at end of file
@@ -1,6 +1,6 @@
 # schemas/chunk.py
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from beanie import Document, Indexed, Link, PydanticObjectId
 from pydantic import Field
@@ -24,9 +24,10 @@ class Chunk(Document):
         description="The text content of the chunk."
     )
 
-    vector_embedding: List[float] = Field(
-        ...,
-        description="The vector representation of the chunk's content."
+    vector_embedding: Optional[List[float]] = Field(
+        None,
+        description="The vector representation of the chunk's content. "
+                    "None for near-duplicates of an earlier chunk of the same document, which stay out of the vector index."
     )
 
     embedding_model: str = Field(
@@ -34,6 +35,16 @@ class Chunk(Document):
         description="The name/version of the model used to generate the embedding."
     )
 
+    canonical_chunk_id: Optional[str] = Field(
+        None,
+        description="Id of the chunk this one is a near-duplicate of (linked without a vector, or its vector was copied)."
+    )
+
+    minhash: Optional[List[int]] = Field(
+        None,
+        description="MinHash signature of the content, used to detect near-duplicates at ingestion."
+    )
+
     metadata: Dict[str, Any] = Field(
         default_factory=dict,
         description="Flexible field for chunk-specific metadata (e.g., page number, chunk index)."
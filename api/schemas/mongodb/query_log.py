@@ -0,0 +1,39 @@
+# schemas/query_log.py
+import os
+from datetime import datetime
+from typing import Dict
+
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+
+QUERY_LOG_TTL_DAYS = int(os.getenv("QUERY_LOG_TTL_DAYS", "30"))
+
+
+class QueryLogEntry(Document):
+    """
+    One answered chat question, kept compact for cache-warming analysis.
+    """
+
+    subject: str = Field(..., description="Subject name as sent by the client.")
+
+    unit: str = Field(..., description="Unit title as sent by the client.")
+
+    question: str = Field(..., description="Normalized question (see normalize_question).", max_length=1000)
+
+    text: str = Field(..., description="The question as asked.", max_length=1000)
+
+    latency_ms: float = Field(..., description="Time to answer, in milliseconds.")
+
+    cache: Dict[str, str] = Field(default_factory=dict, description="Cache name -> lookup result for this request.")
+
+    degraded: bool = Field(False, description="Whether the fallback response was served.")
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "query_log"
+        indexes = [
+            IndexModel([("created_at", 1)], expireAfterSeconds=QUERY_LOG_TTL_DAYS * 86400),
+            IndexModel([("subject", 1), ("unit", 1), ("question", 1)]),
+        ]
@@ -0,0 +1,33 @@
+# schemas/response_cache.py
+from datetime import datetime
+
+from beanie import Document, Indexed
+from pydantic import Field
+from pymongo import IndexModel
+
+
+class ResponseCacheEntry(Document):
+    """
+    Persistent tier of the exact-match LLM response cache.
+    Keyed by a hash of the fully rendered prompt plus model parameters.
+    """
+
+    key: Indexed(str, unique=True) = Field(..., description="SHA-256 of the rendered prompt and model parameters.")
+
+    model_name: str = Field(..., description="Model that produced the response.")
+
+    response: str = Field(..., description="The cached generation.")
+
+    size_bytes: int = Field(0, description="UTF-8 size of the response, for size accounting.")
+
+    hits: int = Field(0, description="Number of times this entry was served.")
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    expires_at: datetime = Field(..., description="Entry is removed by the TTL index after this time.")
+
+    class Settings:
+        name = "llm_response_cache"
+        indexes = [
+            IndexModel([("expires_at", 1)], expireAfterSeconds=0)
+        ]
@@ -4,6 +4,7 @@ from enum import Enum
 
 from beanie import Document, Link, PydanticObjectId
 from pydantic import Field, model_validator
+from pymongo import IndexModel
 
 from .subject import Subject
 from .unit import Unit
@@ -26,6 +27,15 @@ class SourceDocument(Document):
 
     processing_status: ProcessingStatus = Field(description="Current processing status of the document", default=ProcessingStatus.PENDING)
 
+    # Ingestion work-queue lease (see api/storage/mongodb/ingestion_queue.py)
+    lease_owner: Optional[str] = Field(default=None, description="Worker currently holding the processing lease")
+    lease_expires_at: Optional[datetime] = Field(default=None, description="When the current lease expires and may be reclaimed")
+    heartbeat_at: Optional[datetime] = Field(default=None, description="Last heartbeat from the lease owner")
+    retry_count: int = Field(default=0, description="Number of failed processing attempts")
+    last_error: Optional[str] = Field(default=None, description="Error message from the last failed attempt")
+    next_attempt_at: Optional[datetime] = Field(default=None, description="Earliest time a FAILED document may be retried (exponential backoff)")
+    checkpoint: Dict[str, Any] = Field(default_factory=dict, description="Progress checkpoint used to resume after a crash")
+
     metadata: Optional[Dict[str, Any]] = Field(description="Additional metadata about the document", default_factory=dict)
 
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Timestamp when the document was created")
@@ -41,5 +51,7 @@ class SourceDocument(Document):
         indexes = [
             "subject",
             "unit",
-            "processing_status"
+            "processing_status",
+            "source_url",
+            IndexModel([("processing_status", 1), ("lease_expires_at", 1)])
         ]
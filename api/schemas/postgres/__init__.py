@@ -1,5 +1,5 @@
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, JSON, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, JSON, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -7,6 +7,7 @@ BASE = declarative_base()
 
 from .chat_sessions import ChatSession
 from .chat_messages import ChatMessage
+from .users import Users
 
-__all__ = ["ChatSession", "ChatMessage"]
+__all__ = ["ChatSession", "ChatMessage", "Users"]
 __pg_models__ = __all__
\ No newline at end of file
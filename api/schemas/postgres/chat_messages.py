@@ -1,11 +1,15 @@
-from api.schemas.postgres import Column, DateTime, ForeignKey, Text, Enum, JSON, Integer
+from api.schemas.postgres import Column, DateTime, ForeignKey, Text, Enum, JSON, Integer, Index
 from api.schemas.postgres import relationship
 from api.schemas.postgres import BASE
 from datetime import datetime
 
 class ChatMessage(BASE):
     __tablename__ = "chat_messages"
-    __table_args__ = ({"schema": "ragApp"})
+    __table_args__ = (
+        # Keyset pagination over a session's history: WHERE chat_id = ? AND (created_at, id) < (?, ?)
+        Index("ix_chat_messages_chat_id_created_at_id", "chat_id", "created_at", "id"),
+        {"schema": "ragApp"},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     chat_id = Column(Integer, ForeignKey("ragApp.chat_sessions.id"), nullable=False)
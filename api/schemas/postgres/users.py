@@ -9,7 +9,8 @@ class Users(BASE):
     __table_args__ = ({"schema": "ragApp"})
 
     id = Column(String, primary_key=True, index=True)
-    email = Column(String, unique=True, nullable=False, index=True)
+    # NULL when the auth provider has no email for the user (NULLs never collide on the unique index)
+    email = Column(String, unique=True, nullable=True, index=True)
     first_name = Column(String, nullable=True)
     last_name = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
@@ -0,0 +1,302 @@
+"""
+Lease-based ingestion work queue over the source_documents collection.
+
+Workers (on one or many machines) atomically claim a SourceDocument with
+find_one_and_update, keep the lease alive with heartbeats while the document
+is chunked/embedded, and release it as COMPLETED or FAILED. Leases whose owner
+stopped heartbeating are reclaimed by other workers once they expire, and a
+per-document checkpoint lets a reclaimed document resume without re-embedding
+work that already landed. The lease is re-confirmed right before chunks are
+inserted, so a worker that lost it can't add a second copy of a document's
+chunks, and FAILED documents are retried with exponential backoff.
+"""
+
+import asyncio
+import os
+import socket
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+from api.processors import DocumentProcessor
+from api.schemas.mongodb import Chunk, SourceDocument
+from api.schemas.mongodb.source_document import ProcessingStatus
+
+LEASE_SECONDS = int(os.getenv("INGEST_LEASE_SECONDS", "300"))
+HEARTBEAT_SECONDS = int(os.getenv("INGEST_HEARTBEAT_SECONDS", "60"))
+MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+RETRY_BACKOFF_SECONDS = int(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "60"))
+RETRY_BACKOFF_MAX_SECONDS = int(os.getenv("INGEST_RETRY_BACKOFF_MAX_SECONDS", "3600"))
+
+# Checkpoint stages, in order
+STAGE_CHUNKS_INSERTED = "chunks_inserted"
+
+
+def default_worker_id() -> str:
+    """Host-qualified unique worker id, e.g. 'ingest-01:4242:1a2b3c4d'."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class IngestionQueue:
+    """
+    Claims, heartbeats and settles SourceDocument leases for a single worker.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        lease_seconds: int = LEASE_SECONDS,
+        heartbeat_seconds: int = HEARTBEAT_SECONDS,
+        max_retries: int = MAX_RETRIES,
+        retry_backoff_seconds: int = RETRY_BACKOFF_SECONDS,
+        retry_backoff_max_seconds: int = RETRY_BACKOFF_MAX_SECONDS,
+    ):
+        """
+        Args:
+            worker_id: Unique lease owner id (defaults to host:pid:random)
+            lease_seconds: How long a claim is valid without a heartbeat
+            heartbeat_seconds: Interval between lease renewals while processing
+            max_retries: Failed attempts after which a document is no longer retried
+            retry_backoff_seconds: Delay before the first retry; doubles with every failure
+            retry_backoff_max_seconds: Upper bound on the retry delay
+        """
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.retry_backoff_max_seconds = retry_backoff_max_seconds
+
+    @property
+    def _collection(self):
+        return SourceDocument.get_pymongo_collection()
+
+    def _lease_filter(self, document_id) -> dict:
+        return {"_id": document_id, "lease_owner": self.worker_id}
+
+    async def claim(self) -> Optional[SourceDocument]:
+        """
+        Atomically claim the next available document.
+
+        Eligible documents are PENDING ones, PROCESSING ones whose lease expired
+        (owner crashed) and FAILED ones still under the retry limit whose
+        backoff has elapsed.
+
+        Returns:
+            The claimed SourceDocument, or None when the queue is drained
+        """
+        now = datetime.utcnow()
+        raw = await self._collection.find_one_and_update(
+            {
+                "$or": [
+                    {"processing_status": ProcessingStatus.PENDING.value},
+                    {"processing_status": ProcessingStatus.PROCESSING.value, "lease_expires_at": {"$lt": now}},
+                    {
+                        "processing_status": ProcessingStatus.FAILED.value,
+                        "retry_count": {"$lt": self.max_retries},
+                        "next_attempt_at": {"$not": {"$gt": now}},
+                    },
+                ]
+            },
+            {"$set": {
+                "processing_status": ProcessingStatus.PROCESSING.value,
+                "lease_owner": self.worker_id,
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                "heartbeat_at": now,
+                "updated_at": now,
+            }},
+            sort=[("retry_count", 1), ("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if raw is None:
+            return None
+        return SourceDocument.model_validate(raw)
+
+    async def heartbeat(self, document_id) -> bool:
+        """
+        Extend the lease on a document we own.
+
+        Returns:
+            False if the lease was lost (expired and reclaimed by another worker)
+        """
+        now = datetime.utcnow()
+        result = await self._collection.update_one(
+            self._lease_filter(document_id),
+            {"$set": {
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                "heartbeat_at": now,
+            }},
+        )
+        return result.matched_count == 1
+
+    async def confirm_lease(self, document_id) -> bool:
+        """
+        Check that we still hold an unexpired lease and extend it, atomically.
+        Called right before writing results, since heartbeats are minutes apart.
+
+        Returns:
+            False if the lease expired or was taken over
+        """
+        now = datetime.utcnow()
+        result = await self._collection.update_one(
+            {**self._lease_filter(document_id), "lease_expires_at": {"$gt": now}},
+            {"$set": {
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                "heartbeat_at": now,
+            }},
+        )
+        return result.matched_count == 1
+
+    async def save_checkpoint(self, document_id, stage: str, **progress) -> bool:
+        """Record resumable progress for a document we own."""
+        result = await self._collection.update_one(
+            self._lease_filter(document_id),
+            {"$set": {
+                "checkpoint": {"stage": stage, "at": datetime.utcnow(), **progress},
+                "updated_at": datetime.utcnow(),
+            }},
+        )
+        return result.matched_count == 1
+
+    async def complete(self, document_id) -> bool:
+        """Mark a document COMPLETED and release the lease."""
+        result = await self._collection.update_one(
+            self._lease_filter(document_id),
+            {"$set": {
+                "processing_status": ProcessingStatus.COMPLETED.value,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "last_error": None,
+                "next_attempt_at": None,
+                "updated_at": datetime.utcnow(),
+            }},
+        )
+        return result.matched_count == 1
+
+    def retry_delay(self, retry_count: int) -> float:
+        """Seconds to wait before retrying a document that has failed `retry_count` times before."""
+        return min(self.retry_backoff_seconds * 2 ** retry_count, self.retry_backoff_max_seconds)
+
+    async def fail(self, document_id, error: str, retry_count: int = 0) -> bool:
+        """
+        Mark a document FAILED, bump its retry count, schedule the next attempt and release the lease.
+
+        Args:
+            document_id: Document we hold the lease on
+            error: Error message to record
+            retry_count: Failures before this one (sets the backoff)
+        """
+        now = datetime.utcnow()
+        result = await self._collection.update_one(
+            self._lease_filter(document_id),
+            {
+                "$set": {
+                    "processing_status": ProcessingStatus.FAILED.value,
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                    "last_error": error[:2000],
+                    "next_attempt_at": now + timedelta(seconds=self.retry_delay(retry_count)),
+                    "updated_at": now,
+                },
+                "$inc": {"retry_count": 1},
+            },
+        )
+        return result.matched_count == 1
+
+
+class IngestionWorker:
+    """
+    Drains the ingestion queue: claim -> chunk/embed -> insert -> complete.
+    """
+
+    def __init__(self, queue: Optional[IngestionQueue] = None, chunk_size: int = 800, overlap: int = 150):
+        self.queue = queue or IngestionQueue()
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    async def _heartbeat_loop(self, document_id, lease_lost: asyncio.Event):
+        while True:
+            await asyncio.sleep(self.queue.heartbeat_seconds)
+            if not await self.queue.heartbeat(document_id):
+                print(f"⚠️ [{self.queue.worker_id}] Lost lease on document {document_id}")
+                lease_lost.set()
+                return
+
+    async def _process(self, document: SourceDocument, lease_lost: asyncio.Event):
+        chunk_filter = {"document.$id": document.id}
+
+        # Resume: chunks already landed before a crash, only the status update is missing
+        if document.checkpoint.get("stage") == STAGE_CHUNKS_INSERTED:
+            existing = await Chunk.find(chunk_filter).count()
+            if existing == document.checkpoint.get("chunk_count"):
+                print(f"⏩ [{self.queue.worker_id}] Document {document.id} already ingested, resuming at completion")
+                return
+
+        # Drop partial output from an interrupted attempt so re-runs stay idempotent
+        await Chunk.find(chunk_filter).delete()
+
+        document.subject = await document.subject.fetch()
+        document.unit = await document.unit.fetch()
+        processor = DocumentProcessor(document)
+        chunks = await processor.process_and_create_chunks(chunk_size=self.chunk_size, overlap=self.overlap)
+
+        # The heartbeat only notices a takeover minutes later: confirm (and extend) the lease
+        # right before writing, so a worker that lost it can't duplicate the new owner's chunks
+        if lease_lost.is_set() or not await self.queue.confirm_lease(document.id):
+            raise RuntimeError("Lease lost while processing; abandoning result")
+
+        if chunks:
+            await Chunk.insert_many(chunks)
+        else:
+            print(f"No chunks created for document ID {document.id}.")
+        await self.queue.save_checkpoint(document.id, STAGE_CHUNKS_INSERTED, chunk_count=len(chunks),
+                                         dedup=processor.dedup_report)
+
+    async def run_once(self) -> bool:
+        """
+        Claim and process a single document.
+
+        Returns:
+            False when there was nothing left to claim
+        """
+        document = await self.queue.claim()
+        if document is None:
+            return False
+
+        print(f"🔒 [{self.queue.worker_id}] Claimed document {document.id} (attempt {document.retry_count + 1})")
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat_loop(document.id, lease_lost))
+        try:
+            await self._process(document, lease_lost)
+            if await self.queue.complete(document.id):
+                print(f"✅ [{self.queue.worker_id}] Completed document {document.id}")
+        except Exception as e:
+            traceback.print_exc()
+            await self.queue.fail(document.id, str(e), retry_count=document.retry_count)
+            print(f"❌ [{self.queue.worker_id}] Failed document {document.id}: {e}")
+        finally:
+            heartbeat.cancel()
+        return True
+
+    async def run(self, idle_exit: bool = True, poll_seconds: float = 10.0) -> int:
+        """
+        Process documents until the queue is drained.
+
+        Args:
+            idle_exit: Return once nothing is claimable; otherwise keep polling
+            poll_seconds: Sleep between polls when idle and idle_exit is False
+
+        Returns:
+            Number of documents processed by this worker
+        """
+        processed = 0
+        while True:
+            if await self.run_once():
+                processed += 1
+                continue
+            if idle_exit:
+                return processed
+            await asyncio.sleep(poll_seconds)
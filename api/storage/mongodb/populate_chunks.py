@@ -1,18 +1,26 @@
+import argparse
 import asyncio
 import os
 import sys
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
-from api.processors import DocumentProcessor
 from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
 from api.schemas.mongodb import Chunk, SourceDocument, Subject, Unit
+from api.storage.mongodb.ingestion_queue import IngestionQueue, IngestionWorker, default_worker_id
 from dotenv import load_dotenv
 load_dotenv()
 
 
-async def populate_chunks():
+async def populate_chunks(concurrency: int = 1, worker_id: str = None, follow: bool = False):
+    """
+    Drain the ingestion queue with `concurrency` lease-holding workers.
+
+    Safe to run on several machines at once: every document is claimed
+    atomically, and documents left PROCESSING by a crashed worker are
+    reclaimed once their lease expires.
+    """
     client = AsyncIOMotorClient(os.getenv("MONGO_URL"))
     await init_beanie(
         client[os.getenv("MONGO_DB")],
@@ -24,25 +32,22 @@ async def populate_chunks():
         ]
     )
 
-    all_documents = await SourceDocument.find_all().to_list()
-    print(f"Found {len(all_documents)} documents in the database.")
-
-    for document in all_documents:
-        document.subject = await document.subject.fetch()
-        document.unit = await document.unit.fetch()
-        processor = DocumentProcessor(document)
-        chunks = await processor.process_and_create_chunks(chunk_size=800, overlap=150)
-        print("Emedding Dimension:", len(chunks[0].vector_embedding))
-        if not chunks:
-            print(f"No chunks created for document ID {document.id}. Skipping insertion.")
-            continue
-        try:
-            await Chunk.insert_many(chunks)
-            document.processing_status = "completed"
-            await document.save()
-            print(f"Inserted {len(chunks)} chunks for document ID {document.id}.")
-        except Exception as e:
-            print(f"Error inserting chunks for document ID {document.id}: {e}")
+    base_id = worker_id or default_worker_id()
+    workers = [
+        IngestionWorker(IngestionQueue(worker_id=f"{base_id}/{i}"))
+        for i in range(concurrency)
+    ]
+    try:
+        processed = await asyncio.gather(*(w.run(idle_exit=not follow) for w in workers))
+        print(f"Queue drained. Processed {sum(processed)} documents with {concurrency} workers.")
+    finally:
+        client.close()
+
 
 if __name__ == "__main__":
-    asyncio.run(populate_chunks())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chunk and embed pending source documents.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Workers to run in this process")
+    parser.add_argument("--worker-id", default=None, help="Lease owner id prefix (defaults to host:pid)")
+    parser.add_argument("--follow", action="store_true", help="Keep polling for new work instead of exiting when idle")
+    args = parser.parse_args()
+    asyncio.run(populate_chunks(args.concurrency, args.worker_id, args.follow))
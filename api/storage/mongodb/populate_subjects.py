@@ -11,21 +11,24 @@ from api.schemas.mongodb import Subject
 
 load_dotenv()
 
+# Canonical subject catalog, shared with sync_catalog.py
+SUBJECT_CATALOG = [
+    {"name": "Generative AI", "subject_code": "ML1705", "description": "Generative AI"},
+    {"name": "Edge AI", "subject_code": "ML1704", "description": "Edge AI"},
+    {"name": "Image Processing and Vision Techniques", "subject_code": "ML1703",
+     "description": "Image Processing and Vision Techniques"},
+    {"name": "Statistical Natural Language Processing", "subject_code": "ML1701",
+     "description": "Statistical NLP"},
+    {"name": "Speech Processing", "subject_code": "ML1722", "description": "Speech Processing"},
+]
+
 async def populate_subjects():
     # Initialize the database with Beanie
     client = AsyncIOMotorClient(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
     await init_beanie(database=client[os.getenv("MONGO_DB")], document_models=[Subject])
 
     # Create subject documents using the Beanie model
-    subjects = [
-        Subject(name="Generative AI", subject_code="ML1705", description="Generative AI"),
-        Subject(name="Edge AI", subject_code="ML1704", description="Edge AI"),
-        Subject(name="Image Processing and Vision Techniques", subject_code="ML1703",
-                description="Image Processing and Vision Techniques"),
-        Subject(name="Statistical Natural Language Processing", subject_code="ML1701",
-                description="Statistical NLP"),
-        Subject(name="Speech Processing", subject_code="ML1722", description="Speech Processing"),
-    ]
+    subjects = [Subject(**entry) for entry in SUBJECT_CATALOG]
 
     # Insert all subjects
     inserted_count = 0
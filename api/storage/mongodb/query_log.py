@@ -0,0 +1,178 @@
+"""
+Query log: compact records of answered chat questions.
+
+The chat route appends one record per answer (subject, unit, normalized
+question, latency, per-cache lookup results) without waiting; a background
+task inserts them in batches. atop_questions() aggregates the log into the
+most-asked questions per unit, which the cache warmer replays.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from api.models.query_cache import normalize_question
+from api.schemas.mongodb.query_log import QueryLogEntry
+
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "true").lower() == "true"
+QUERY_LOG_BATCH_SIZE = int(os.getenv("QUERY_LOG_BATCH_SIZE", "200"))
+QUERY_LOG_FLUSH_INTERVAL = float(os.getenv("QUERY_LOG_FLUSH_INTERVAL", "2.0"))
+QUERY_LOG_MAX_PENDING = int(os.getenv("QUERY_LOG_MAX_PENDING", "5000"))
+MAX_QUESTION_CHARS = 1000
+
+
+class QueryLogWriter:
+    """
+    Buffers query-log records in memory and inserts them with insert_many.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = QUERY_LOG_BATCH_SIZE,
+        flush_interval: float = QUERY_LOG_FLUSH_INTERVAL,
+        max_pending: int = QUERY_LOG_MAX_PENDING,
+    ):
+        """
+        Args:
+            batch_size: Pending records that trigger an immediate flush
+            flush_interval: Maximum seconds a record waits in the buffer
+            max_pending: Buffer bound; records beyond it are dropped (the log is best-effort)
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: List[QueryLogEntry] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.dropped = 0
+        self.written = 0
+
+    def append(
+        self,
+        subject: str,
+        unit: str,
+        question: str,
+        latency_ms: float,
+        cache: Optional[Dict[str, str]] = None,
+        degraded: bool = False,
+    ):
+        """Queue one answered question without waiting. Never raises: the log is best-effort."""
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        try:
+            text = question.strip()
+            self._pending.append(QueryLogEntry(
+                subject=subject,
+                unit=unit,
+                # Truncate after normalizing: NFKC/casefold can lengthen the text ("ß" -> "ss")
+                question=normalize_question(text)[:MAX_QUESTION_CHARS],
+                text=text[:MAX_QUESTION_CHARS],
+                latency_ms=round(latency_ms, 1),
+                cache=cache or {},
+                degraded=degraded,
+            ))
+        except Exception as e:
+            self.dropped += 1
+            print(f"⚠️ Failed to queue query log record: {e}")
+            return
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            await QueryLogEntry.insert_many(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            print(f"⚠️ Failed to write {len(batch)} query log records: {e}")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write whatever is still buffered."""
+        if self._task and not self._task.done():
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+        self._task = None
+        await self.flush()
+        print(f"📝 Query log writer stopped ({self.written} written, {self.dropped} dropped)")
+
+
+async def atop_questions(top_n: int, days: int = 14, min_count: int = 2) -> List[Dict[str, Any]]:
+    """
+    Most-asked questions per unit over the last `days` days.
+
+    Questions are grouped by their normalized form and replayed with the
+    phrasing students used most often, since the answer cache is keyed by the
+    exact prompt.
+
+    Returns:
+        [{"subject", "unit", "question", "text", "count"}], busiest first within each unit
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    pipeline = [
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            "_id": {"subject": "$subject", "unit": "$unit", "question": "$question", "text": "$text"},
+            "count": {"$sum": 1},
+        }},
+        {"$sort": {"count": -1}},
+        {"$group": {
+            "_id": {"subject": "$_id.subject", "unit": "$_id.unit", "question": "$_id.question"},
+            "count": {"$sum": "$count"},
+            "text": {"$first": "$_id.text"},
+        }},
+        {"$match": {"count": {"$gte": min_count}}},
+        {"$sort": {"count": -1}},
+        {"$group": {
+            "_id": {"subject": "$_id.subject", "unit": "$_id.unit"},
+            "questions": {"$push": {"question": "$_id.question", "text": "$text", "count": "$count"}},
+        }},
+        {"$project": {"questions": {"$slice": ["$questions", top_n]}}},
+    ]
+    rows = await QueryLogEntry.aggregate(pipeline).to_list()
+    return [
+        {"subject": row["_id"]["subject"], "unit": row["_id"]["unit"], **question}
+        for row in rows
+        for question in row["questions"]
+    ]
+
+
+_writer_instance: Optional[QueryLogWriter] = None
+
+
+def get_query_log_writer() -> Optional[QueryLogWriter]:
+    """Global query-log writer (started lazily on first use), or None when QUERY_LOG_ENABLED is false."""
+    global _writer_instance
+    if not QUERY_LOG_ENABLED:
+        return None
+    if _writer_instance is None:
+        _writer_instance = QueryLogWriter()
+    _writer_instance.start()
+    return _writer_instance
+
+
+async def close_query_log_writer():
+    global _writer_instance
+    if _writer_instance is not None:
+        await _writer_instance.stop()
+        _writer_instance = None
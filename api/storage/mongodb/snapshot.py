@@ -0,0 +1,366 @@
+"""
+Knowledge-base snapshots: export and import subjects, units, source documents
+and chunks without re-running the GCS -> PDF -> embed pipeline.
+
+A snapshot is a directory:
+
+    manifest.json             format version, counts, embedding dims/models and
+                              Atlas Search / Vector Search index definitions
+    subjects.parquet          one row per document: _id + canonical extended JSON
+    units.parquet               (small collections; lossless for ObjectId/DBRef/datetime)
+    source_documents.parquet
+    chunks.parquet            chunk columns (ids, content, metadata, minhash, ...) plus
+                              vector_row, the row of its embedding in chunks.f32 (-1 if none)
+    chunks.f32                embeddings as contiguous little-endian float32 rows
+
+Export streams each collection in batches into Parquet (zstd) and appends the
+embeddings to chunks.f32, so memory stays flat whatever the corpus size.
+Import memory-maps chunks.f32, decodes the next Parquet batch in a thread
+while the previous one is written with unordered insert_many, and never calls
+the embedding API. Re-importing into a partially restored database skips
+documents that already exist. Beanie indexes are created after the data is in,
+and Atlas Search indexes recorded in the manifest (e.g. chunk_search_index, the
+vector index retrieval depends on) are recreated if the target lacks them.
+--drop deletes the documents but keeps the collections, so existing indexes,
+including search indexes, survive.
+
+Usage:
+    python -m api.storage.mongodb.snapshot export --out snapshots/2026-10-19
+    python -m api.storage.mongodb.snapshot import --from snapshots/2026-10-19 [--drop]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from beanie import init_beanie
+from bson import ObjectId, json_util
+from bson.json_util import CANONICAL_JSON_OPTIONS
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from api.schemas.mongodb import __beanie_models__
+
+load_dotenv()
+
+SNAPSHOT_FORMAT = "rag-kb-snapshot"
+SNAPSHOT_VERSION = 1
+DOCUMENT_COLLECTIONS = ("subjects", "units", "source_documents")
+CHUNK_COLLECTION = "chunks"
+EMBEDDINGS_FILE = "chunks.f32"
+BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "5000"))
+
+# Chunk fields with their own Parquet column; everything else goes to "extra"
+_CHUNK_COLUMNS = ("_id", "subject_id", "unit_id", "content", "embedding_model", "canonical_chunk_id",
+                  "created_at", "metadata", "minhash", "vector_embedding")
+
+DOCUMENT_SCHEMA = pa.schema([("_id", pa.string()), ("document", pa.string())])
+CHUNK_SCHEMA = pa.schema([
+    ("_id", pa.string()),
+    ("subject_id", pa.string()),
+    ("unit_id", pa.string()),
+    ("content", pa.string()),
+    ("embedding_model", pa.string()),
+    ("canonical_chunk_id", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("metadata", pa.string()),
+    ("minhash", pa.list_(pa.uint32())),
+    ("vector_row", pa.int64()),
+    ("extra", pa.string()),
+])
+
+
+def _to_json(value: Any) -> str:
+    return json_util.dumps(value, json_options=CANONICAL_JSON_OPTIONS)
+
+
+# ---------------------------
+# Export
+# ---------------------------
+
+async def _export_documents(collection, path: str, batch_size: int) -> int:
+    count = 0
+    with pq.ParquetWriter(path, DOCUMENT_SCHEMA, compression="zstd") as writer:
+        batch: List[Dict[str, Any]] = []
+        async for doc in collection.find({}, batch_size=batch_size):
+            batch.append({"_id": str(doc["_id"]), "document": _to_json(doc)})
+            if len(batch) >= batch_size:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=DOCUMENT_SCHEMA))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=DOCUMENT_SCHEMA))
+            count += len(batch)
+    return count
+
+
+async def _export_chunks(collection, out_dir: str, batch_size: int) -> Dict[str, Any]:
+    dims: Optional[int] = None
+    vector_rows = 0
+    count = 0
+    models = set()
+    with pq.ParquetWriter(os.path.join(out_dir, f"{CHUNK_COLLECTION}.parquet"), CHUNK_SCHEMA, compression="zstd") as writer, \
+            open(os.path.join(out_dir, EMBEDDINGS_FILE), "wb") as vectors_file:
+        rows: List[Dict[str, Any]] = []
+        vectors: List[List[float]] = []
+
+        def flush():
+            nonlocal rows, vectors
+            if vectors:
+                np.asarray(vectors, dtype="<f4").tofile(vectors_file)
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=CHUNK_SCHEMA))
+            rows, vectors = [], []
+
+        async for doc in collection.find({}, batch_size=batch_size):
+            vector = doc.get("vector_embedding")
+            vector_row = -1
+            if vector:
+                if dims is None:
+                    dims = len(vector)
+                elif len(vector) != dims:
+                    raise ValueError(f"Chunk {doc['_id']} has {len(vector)} dims, expected {dims}")
+                vectors.append(vector)
+                vector_row = vector_rows
+                vector_rows += 1
+            if doc.get("embedding_model"):
+                models.add(doc["embedding_model"])
+            rows.append({
+                "_id": str(doc["_id"]),
+                "subject_id": doc.get("subject_id"),
+                "unit_id": doc.get("unit_id"),
+                "content": doc.get("content"),
+                "embedding_model": doc.get("embedding_model"),
+                "canonical_chunk_id": doc.get("canonical_chunk_id"),
+                "created_at": doc.get("created_at"),
+                "metadata": _to_json(doc.get("metadata") or {}),
+                "minhash": doc.get("minhash"),
+                "vector_row": vector_row,
+                "extra": _to_json({k: v for k, v in doc.items() if k not in _CHUNK_COLUMNS}),
+            })
+            count += 1
+            if len(rows) >= batch_size:
+                flush()
+        if rows:
+            flush()
+
+    return {"count": count, "vector_rows": vector_rows, "dims": dims, "models": sorted(models)}
+
+
+async def _search_indexes(collection) -> List[Dict[str, Any]]:
+    """Atlas Search / Vector Search index definitions ([] where search indexes aren't supported)."""
+    try:
+        indexes = await collection.list_search_indexes().to_list(None)
+    except (OperationFailure, NotImplementedError, AttributeError):
+        return []
+    return [
+        {"name": index["name"], "type": index.get("type", "search"),
+         "definition": index.get("latestDefinition", index.get("definition"))}
+        for index in indexes
+    ]
+
+
+async def export_snapshot(database, out_dir: str, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """Write a snapshot of the knowledge base to `out_dir` and return its manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+    counts = {}
+    for name in DOCUMENT_COLLECTIONS:
+        counts[name] = await _export_documents(database[name], os.path.join(out_dir, f"{name}.parquet"), batch_size)
+    chunks = await _export_chunks(database[CHUNK_COLLECTION], out_dir, batch_size)
+    counts[CHUNK_COLLECTION] = chunks["count"]
+    search_indexes = {}
+    for name in (*DOCUMENT_COLLECTIONS, CHUNK_COLLECTION):
+        indexes = await _search_indexes(database[name])
+        if indexes:
+            search_indexes[name] = indexes
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "collections": counts,
+        "embeddings": {
+            "file": EMBEDDINGS_FILE,
+            "dtype": "float32",
+            "byte_order": "little",
+            "rows": chunks["vector_rows"],
+            "dims": chunks["dims"],
+            "models": chunks["models"],
+        },
+        "search_indexes": search_indexes,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"📦 Exported {counts} to {out_dir} in {time.perf_counter() - started:.1f}s")
+    return manifest
+
+
+# ---------------------------
+# Import
+# ---------------------------
+
+async def _insert(collection, documents: List[Dict[str, Any]]) -> int:
+    """insert_many that tolerates documents already present (resumed or repeated imports)."""
+    if not documents:
+        return 0
+    try:
+        result = await collection.insert_many(documents, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in errors):
+            raise
+        return e.details.get("nInserted", 0)
+
+
+def _load_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(snapshot_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot {manifest.get('format')} v{manifest.get('version')}")
+    return manifest
+
+
+def _open_embeddings(snapshot_dir: str, manifest: Dict[str, Any]) -> Optional[np.ndarray]:
+    spec = manifest["embeddings"]
+    if not spec["rows"]:
+        return None
+    path = os.path.join(snapshot_dir, spec["file"])
+    expected = spec["rows"] * spec["dims"] * 4
+    if os.path.getsize(path) != expected:
+        raise ValueError(f"{path} is {os.path.getsize(path)} bytes, manifest expects {expected}")
+    return np.memmap(path, dtype="<f4", mode="r", shape=(spec["rows"], spec["dims"]))
+
+
+def _chunk_documents(batch: pa.RecordBatch, embeddings: Optional[np.ndarray]) -> List[Dict[str, Any]]:
+    documents = []
+    for row in batch.to_pylist():
+        doc = json_util.loads(row["extra"])
+        doc.update({
+            "_id": ObjectId(row["_id"]),
+            "subject_id": row["subject_id"],
+            "unit_id": row["unit_id"],
+            "content": row["content"],
+            "embedding_model": row["embedding_model"],
+            "canonical_chunk_id": row["canonical_chunk_id"],
+            "created_at": row["created_at"],
+            "metadata": json_util.loads(row["metadata"]),
+            "minhash": row["minhash"],
+            "vector_embedding": embeddings[row["vector_row"]].tolist() if row["vector_row"] >= 0 else None,
+        })
+        documents.append(doc)
+    return documents
+
+
+async def _import_documents(collection, path: str, batch_size: int) -> int:
+    inserted = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        documents = [json_util.loads(value) for value in batch.column("document").to_pylist()]
+        inserted += await _insert(collection, documents)
+    return inserted
+
+
+async def _import_chunks(collection, snapshot_dir: str, embeddings: Optional[np.ndarray], batch_size: int) -> int:
+    batches = pq.ParquetFile(os.path.join(snapshot_dir, f"{CHUNK_COLLECTION}.parquet")).iter_batches(batch_size=batch_size)
+
+    def next_documents() -> Optional[List[Dict[str, Any]]]:
+        batch = next(batches, None)
+        return _chunk_documents(batch, embeddings) if batch is not None else None
+
+    # Decode batch N+1 (Parquet + memmap reads) while batch N is being written
+    inserted = 0
+    pending: Optional[asyncio.Task] = None
+    while True:
+        documents = await asyncio.to_thread(next_documents)
+        if pending is not None:
+            inserted += await pending
+        if documents is None:
+            return inserted
+        pending = asyncio.create_task(_insert(collection, documents))
+
+
+async def _ensure_search_indexes(database, manifest: Dict[str, Any]) -> List[str]:
+    """Create the manifest's search indexes that the target collections lack. Returns the names created."""
+    created = []
+    for name, indexes in manifest.get("search_indexes", {}).items():
+        existing = {index["name"] for index in await _search_indexes(database[name])}
+        for index in indexes:
+            if index["name"] in existing:
+                continue
+            try:
+                await database[name].create_search_index(
+                    {"name": index["name"], "type": index["type"], "definition": index["definition"]}
+                )
+                created.append(index["name"])
+            except OperationFailure as e:
+                print(f"⚠️ Could not create search index {name}.{index['name']}: {e}; "
+                      f"vector search returns nothing until it exists")
+    return created
+
+
+async def import_snapshot(database, snapshot_dir: str, drop: bool = False,
+                          batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Load a snapshot into `database`. Returns the number of documents inserted per collection."""
+    manifest = _load_manifest(snapshot_dir)
+    embeddings = _open_embeddings(snapshot_dir, manifest)
+    started = time.perf_counter()
+
+    if drop:
+        # Delete rather than drop: dropping chunks would also drop its Atlas Vector Search index
+        for name in (*DOCUMENT_COLLECTIONS, CHUNK_COLLECTION):
+            await database[name].delete_many({})
+
+    inserted = {}
+    for name in DOCUMENT_COLLECTIONS:
+        inserted[name] = await _import_documents(database[name], os.path.join(snapshot_dir, f"{name}.parquet"), batch_size)
+    inserted[CHUNK_COLLECTION] = await _import_chunks(database[CHUNK_COLLECTION], snapshot_dir, embeddings, batch_size)
+    elapsed = time.perf_counter() - started
+
+    # Secondary indexes are cheaper to build once the data is in
+    await init_beanie(database=database, document_models=__beanie_models__)
+    created = await _ensure_search_indexes(database, manifest)
+    if created:
+        print(f"🔎 Created search indexes {created} (they build asynchronously on Atlas)")
+
+    rate = inserted[CHUNK_COLLECTION] / elapsed if elapsed else 0
+    print(f"📥 Imported {inserted} from {snapshot_dir} in {elapsed:.1f}s ({rate:.0f} chunks/s); "
+          f"snapshot listed {manifest['collections']}")
+    return inserted
+
+
+async def main(args):
+    client = AsyncIOMotorClient(os.getenv("MONGO_URL"))
+    database = client[os.getenv("MONGO_DB")]
+    try:
+        if args.command == "export":
+            await export_snapshot(database, args.out, batch_size=args.batch_size)
+        else:
+            await import_snapshot(database, args.source, drop=args.drop, batch_size=args.batch_size)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a knowledge-base snapshot.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write subjects, units, source documents and chunks")
+    export_parser.add_argument("--out", required=True, help="Snapshot directory to create")
+    import_parser = commands.add_parser("import", help="Load a snapshot (no embedding calls)")
+    import_parser.add_argument("--from", dest="source", required=True, help="Snapshot directory")
+    import_parser.add_argument("--drop", action="store_true",
+                               help="Delete the documents of the four collections first (collections, indexes "
+                                    "and Atlas Search indexes are kept; missing search indexes are recreated)")
+    for command in (export_parser, import_parser):
+        command.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,221 @@
+"""
+Catalog sync: reconcile subjects, units and source documents with the GCS bucket.
+
+Replaces the per-blob populate_units / populate_source_documents scripts.
+Everything is preloaded in bulk, the desired state is computed in memory from
+the bucket manifest and only the missing/changed documents are written with
+idempotent bulk upserts, so a sync costs a handful of round trips regardless
+of how many files the bucket holds.
+"""
+
+import asyncio
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from beanie import init_beanie
+from bson import DBRef
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from api.loaders.gcs_loader import get_all_files_from_bucket
+from api.schemas.mongodb import Subject, Unit, SourceDocument
+from api.schemas.mongodb.source_document import ProcessingStatus
+from api.storage.mongodb.populate_subjects import SUBJECT_CATALOG
+
+load_dotenv()
+
+_ROMAN_TO_INT = {'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5, 'VI': 6, 'VII': 7, 'VIII': 8, 'IX': 9, 'X': 10}
+
+
+def get_order_index(unit_name: str) -> int:
+    """Extract the unit number from names like 'Unit 1.pdf', 'UNIT II.pdf'. Defaults to 0."""
+    name_without_ext = os.path.splitext(unit_name)[0]
+
+    numbers = re.findall(r'\d+', name_without_ext)
+    if numbers:
+        return int(numbers[0])
+
+    roman_match = re.search(r'\b(VIII|VII|VI|IV|IX|V|X|I{1,3})\b', name_without_ext)
+    if roman_match:
+        return _ROMAN_TO_INT[roman_match.group(1)]
+
+    return 0
+
+
+def parse_manifest(file_map: Dict[str, str]) -> List[Tuple[str, str, str]]:
+    """
+    Turn the bucket manifest into (subject_name, unit_title, public_url) triples.
+
+    Only blobs laid out as '<Subject>/<Unit file>' are considered.
+    """
+    entries = []
+    for blob_name, public_url in file_map.items():
+        parts = blob_name.split("/")
+        if len(parts) != 2 or not parts[1]:
+            print(f"Skipping blob with unexpected layout: '{blob_name}'")
+            continue
+        entries.append((parts[0].strip(), parts[1], public_url))
+    return entries
+
+
+async def sync_subjects() -> Dict[str, Subject]:
+    """
+    Upsert the subject catalog in one bulk write and return subjects keyed by lower-cased name.
+    """
+    collection = Subject.get_pymongo_collection()
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"subject_code": entry["subject_code"]},
+            {
+                "$set": {"name": entry["name"], "description": entry.get("description")},
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        )
+        for entry in SUBJECT_CATALOG
+    ]
+    if operations:
+        result = await collection.bulk_write(operations, ordered=False)
+        print(f"Subjects: {result.upserted_count} inserted, {result.modified_count} updated")
+
+    subjects = await Subject.find_all().to_list()
+    return {subject.name.lower(): subject for subject in subjects}
+
+
+async def load_units(subject_ids: list) -> Dict[Tuple[str, str], Unit]:
+    """Fetch every unit of the given subjects in a single query, keyed by (subject_id, title)."""
+    units = await Unit.find({"subject.$id": {"$in": subject_ids}}).to_list()
+    return {(str(unit.subject.ref.id), unit.title): unit for unit in units}
+
+
+async def sync_catalog(dry_run: bool = False) -> Dict[str, int]:
+    """
+    Reconcile Subject, Unit and SourceDocument collections with the bucket manifest.
+
+    Args:
+        dry_run: Compute and report the pending writes without applying them
+
+    Returns:
+        Counters describing what was (or would be) written
+    """
+    stats = {"manifest": 0, "skipped": 0, "units_upserted": 0, "documents_upserted": 0, "documents_relinked": 0}
+
+    manifest = parse_manifest(get_all_files_from_bucket(os.getenv("GCS_BUCKET_NAME"), os.getenv("GCP_PROJECT_ID")))
+    stats["manifest"] = len(manifest)
+
+    # 1) Subjects: one bulk upsert + one read
+    subjects_by_name = await sync_subjects() if not dry_run else {
+        s.name.lower(): s for s in await Subject.find_all().to_list()
+    }
+
+    resolved = []
+    for subject_name, unit_title, public_url in manifest:
+        subject = subjects_by_name.get(subject_name.lower())
+        if not subject:
+            print(f"Subject '{subject_name}' not in catalog. Skipping '{unit_title}'.")
+            stats["skipped"] += 1
+            continue
+        resolved.append((subject, unit_title, public_url))
+
+    # 2) Units: one read, one bulk upsert for the missing ones, one re-read
+    subject_ids = [s.id for s in subjects_by_name.values()]
+    units = await load_units(subject_ids)
+    now = datetime.utcnow()
+
+    unit_ops = []
+    pending_unit_keys = set()
+    for subject, unit_title, _ in resolved:
+        key = (str(subject.id), unit_title)
+        if key in units or key in pending_unit_keys:
+            continue
+        pending_unit_keys.add(key)
+        subject_ref = DBRef(Subject.get_collection_name(), subject.id)
+        unit_ops.append(UpdateOne(
+            {"subject": subject_ref, "title": unit_title},
+            {"$setOnInsert": {
+                "subject": subject_ref,
+                "title": unit_title,
+                "description": f"Auto-generated unit for {unit_title} under subject {subject.name}.",
+                "order_index": get_order_index(unit_title),
+                "created_at": now,
+            }},
+            upsert=True,
+        ))
+
+    stats["units_upserted"] = len(unit_ops)
+    if unit_ops and not dry_run:
+        await Unit.get_pymongo_collection().bulk_write(unit_ops, ordered=False)
+        units = await load_units(subject_ids)
+
+    # 3) Source documents: one read by URL, one bulk upsert for new/relinked ones
+    urls = [public_url for _, _, public_url in resolved]
+    existing_docs = await SourceDocument.find({"source_url": {"$in": urls}}).to_list()
+    docs_by_url = {doc.source_url: doc for doc in existing_docs}
+
+    doc_ops = []
+    for subject, unit_title, public_url in resolved:
+        unit = units.get((str(subject.id), unit_title))
+        if unit is None:
+            # Only possible in dry-run mode, where the unit has not been written yet
+            stats["documents_upserted"] += 1
+            continue
+
+        subject_ref = DBRef(Subject.get_collection_name(), subject.id)
+        unit_ref = DBRef(Unit.get_collection_name(), unit.id)
+        existing = docs_by_url.get(public_url)
+
+        if existing is None:
+            stats["documents_upserted"] += 1
+            doc_ops.append(UpdateOne(
+                {"source_url": public_url},
+                {"$setOnInsert": {
+                    "subject": subject_ref,
+                    "unit": unit_ref,
+                    "source_url": public_url,
+                    "file_type": "application/pdf",
+                    "processing_status": ProcessingStatus.PENDING.value,
+                    "metadata": {},
+                    "created_at": now,
+                    "updated_at": now,
+                }},
+                upsert=True,
+            ))
+        elif existing.subject.ref.id != subject.id or existing.unit.ref.id != unit.id:
+            stats["documents_relinked"] += 1
+            doc_ops.append(UpdateOne(
+                {"_id": existing.id},
+                {"$set": {"subject": subject_ref, "unit": unit_ref, "updated_at": now}},
+            ))
+
+    if doc_ops and not dry_run:
+        await SourceDocument.get_pymongo_collection().bulk_write(doc_ops, ordered=False)
+
+    print(
+        f"Catalog sync{' (dry run)' if dry_run else ''}: {stats['manifest']} files, "
+        f"{stats['skipped']} skipped, {stats['units_upserted']} units, "
+        f"{stats['documents_upserted']} new documents, {stats['documents_relinked']} relinked"
+    )
+    return stats
+
+
+async def main(dry_run: bool = False):
+    client = AsyncIOMotorClient(os.getenv("MONGO_URL"))
+    await init_beanie(
+        client[os.getenv("MONGO_DB")],
+        document_models=[Subject, Unit, SourceDocument]
+    )
+    try:
+        await sync_catalog(dry_run=dry_run)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(dry_run="--dry-run" in sys.argv))
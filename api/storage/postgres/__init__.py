@@ -1,9 +1,23 @@
-from .chat_session_manager import get_chat_session, create_chat_session
-from .chat_messages_manager import get_messages_by_chat_id, create_message
+from .chat_session_manager import get_chat_session, create_chat_session, aget_chat_session, acreate_chat_session, aget_chat_session_summaries
+from .chat_messages_manager import get_messages_by_chat_id, create_message, aget_messages_by_chat_id, acreate_message, aget_messages_page, aget_messages_between
+from .user_manager import get_user_by_id, upsert_user, delete_user, aget_user_by_id, aupsert_user, adelete_user
 
 __all__ = [
     "get_chat_session",
     "create_chat_session",
     "get_messages_by_chat_id",
-    "create_message"
+    "create_message",
+    "aget_chat_session",
+    "acreate_chat_session",
+    "aget_chat_session_summaries",
+    "aget_messages_by_chat_id",
+    "acreate_message",
+    "aget_messages_page",
+    "aget_messages_between",
+    "get_user_by_id",
+    "upsert_user",
+    "delete_user",
+    "aget_user_by_id",
+    "aupsert_user",
+    "adelete_user"
 ]
\ No newline at end of file
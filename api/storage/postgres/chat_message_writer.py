@@ -0,0 +1,227 @@
+"""
+Write-behind persistence for chat messages.
+
+The chat route enqueues each turn (user query + AI response with its sources)
+as one queue item and returns immediately; a background task flushes the queue
+to ragApp.chat_messages with multi-row INSERTs, either when `batch_size` rows
+are pending or every `flush_interval` seconds, whichever comes first. A failed
+flush (e.g. a brief Postgres outage or pool timeout) is retried with
+exponential backoff before the batch is given up on. Pending rows are drained
+on shutdown.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from api.schemas.postgres import ChatMessage, ChatSession
+
+CHAT_WRITE_BATCH_SIZE = int(os.getenv("CHAT_WRITE_BATCH_SIZE", "200"))
+CHAT_WRITE_FLUSH_INTERVAL = float(os.getenv("CHAT_WRITE_FLUSH_INTERVAL", "0.5"))
+CHAT_WRITE_MAX_PENDING = int(os.getenv("CHAT_WRITE_MAX_PENDING", "10000"))
+CHAT_WRITE_RETRIES = int(os.getenv("CHAT_WRITE_RETRIES", "5"))
+CHAT_WRITE_RETRY_BACKOFF = float(os.getenv("CHAT_WRITE_RETRY_BACKOFF", "0.5"))
+
+# Queue sentinel asking the background task to drain and exit
+_STOP = object()
+
+
+class ChatMessageWriter:
+    """
+    Buffers chat message rows in an in-process queue and flushes them in batches.
+    Queue items are lists of rows that are written (or dropped) together.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        batch_size: int = CHAT_WRITE_BATCH_SIZE,
+        flush_interval: float = CHAT_WRITE_FLUSH_INTERVAL,
+        max_pending: int = CHAT_WRITE_MAX_PENDING,
+        retries: int = CHAT_WRITE_RETRIES,
+        retry_backoff: float = CHAT_WRITE_RETRY_BACKOFF,
+    ):
+        """
+        Args:
+            session_factory: Callable returning an AsyncSession (defaults to ASYNC_SESSION)
+            batch_size: Maximum rows per INSERT
+            flush_interval: Maximum seconds a row waits in the queue
+            max_pending: Queue bound (in items); items beyond it are dropped with a warning
+            retries: Extra attempts for a batch that fails with a non-integrity error
+            retry_backoff: Delay before the first retry; doubles on every further attempt
+        """
+        if session_factory is None:
+            from api.utils.get_pg_database import ASYNC_SESSION
+            session_factory = ASYNC_SESSION
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _put(self, rows: List[Dict[str, Any]]) -> bool:
+        try:
+            self._queue.put_nowait(rows)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += len(rows)
+            print(f"⚠️ Chat write queue full, dropping {len(rows)} message(s) for chat {rows[0].get('chat_id')}")
+            return False
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        """Queue a single chat_messages row without waiting. Returns False if it was dropped."""
+        return self._put([row])
+
+    def enqueue_turn(
+        self,
+        chat_id: int,
+        query: str,
+        response: str,
+        sources: Optional[List[Dict[str, Any]]] = None,
+        user_metadata: Optional[Dict[str, Any]] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Queue a full chat turn: the user's query followed by the AI response and its sources.
+        Token usage, if given, is stored in the AI message's user_metadata under "usage".
+        Both rows are one queue item, so a full queue drops the whole turn, never half of it.
+        Returns False if it was dropped.
+        """
+        now = datetime.now()
+        response_metadata = {**(user_metadata or {}), "usage": usage} if usage is not None else user_metadata
+        return self._put([
+            {
+                "chat_id": chat_id, "sender": "user", "content": query,
+                "chunks": None, "user_metadata": user_metadata, "created_at": now,
+            },
+            {
+                "chat_id": chat_id, "sender": "ai", "content": response,
+                "chunks": sources, "user_metadata": response_metadata, "created_at": datetime.now(),
+            },
+        ])
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        chat_ids = {row["chat_id"] for row in rows}
+        async with self._session_factory() as db:
+            await db.execute(insert(ChatMessage), rows)
+            await db.execute(
+                update(ChatSession).where(ChatSession.id.in_(chat_ids)).values(updated_at=datetime.now())
+            )
+            await db.commit()
+
+    async def _flush(self, items: List[List[Dict[str, Any]]]):
+        rows = [row for item in items for row in item]
+        for attempt in range(self.retries + 1):
+            try:
+                await self._insert(rows)
+                self.written += len(rows)
+                return
+            except IntegrityError:
+                # One bad turn (e.g. unknown chat_id) must not sink the batch; isolate it
+                for item in items:
+                    try:
+                        await self._insert(item)
+                        self.written += len(item)
+                    except Exception as e:
+                        self.dropped += len(item)
+                        print(f"❌ Dropping {len(item)} chat message(s) for chat {item[0].get('chat_id')}: {e}")
+                return
+            except Exception as e:
+                # Transient (outage, pool timeout): these turns were already answered, so retry
+                if attempt == self.retries:
+                    self.dropped += len(rows)
+                    print(f"❌ Failed to flush {len(rows)} chat messages after {attempt + 1} attempts: {e}")
+                    return
+                delay = self.retry_backoff * 2 ** attempt
+                print(f"⚠️ Chat message flush failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _collect_batch(self) -> List[List[Dict[str, Any]]]:
+        batch = []
+        first = await self._queue.get()
+        if first is _STOP:
+            self._stopping = True
+            return batch
+        batch.append(first)
+        rows = len(first)
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        while rows < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                self._stopping = True
+                break
+            batch.append(item)
+            rows += len(item)
+        return batch
+
+    async def _run(self):
+        while not self._stopping:
+            batch = await self._collect_batch()
+            if batch:
+                await self._flush(batch)
+        await self.drain()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def drain(self):
+        """Flush everything currently queued."""
+        while not self._queue.empty():
+            batch, rows = [], 0
+            while not self._queue.empty() and rows < self.batch_size:
+                item = self._queue.get_nowait()
+                if item is not _STOP:
+                    batch.append(item)
+                    rows += len(item)
+            if batch:
+                await self._flush(batch)
+
+    async def stop(self):
+        """Stop the background task after it has flushed every pending write."""
+        if self._task and not self._task.done():
+            await self._queue.put(_STOP)
+            await self._task
+        else:
+            await self.drain()
+        self._task = None
+        print(f"💾 Chat message writer stopped ({self.written} written, {self.dropped} dropped)")
+
+
+_writer_instance: Optional[ChatMessageWriter] = None
+
+
+def get_chat_message_writer() -> ChatMessageWriter:
+    """Global write-behind writer (started lazily on first use)."""
+    global _writer_instance
+    if _writer_instance is None:
+        _writer_instance = ChatMessageWriter()
+    _writer_instance.start()
+    return _writer_instance
+
+
+async def close_chat_message_writer():
+    global _writer_instance
+    if _writer_instance is not None:
+        await _writer_instance.stop()
+        _writer_instance = None
@@ -1,33 +1,29 @@
-from api.models import ChatResponseModel
-from api.schemas.postgres import ChatMessage, ChatSession
-from typing import List
+from api.schemas.postgres import ChatMessage
+from api.storage.postgres.pagination import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from datetime import datetime
+from typing import List, Optional, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select, tuple_
 from sqlalchemy.exc import NoReferenceError
 import traceback
 
-def create_message(chat_session: ChatSession, chat_response: ChatResponseModel, db: Session) -> ChatMessage:
+def create_message(chat_id: int, sender: str, content: str, db: Session,
+                   chunks: Optional[Any] = None, user_metadata: Optional[dict] = None) -> ChatMessage:
     try:
-        id = chat_session.id
-        print(f"Recieved Session ID: {id}")
-
         new_message = ChatMessage(
-            chat_id=id,
-            query=chat_response.query,
-            response=chat_response.response,
-            chunks=chat_response.sources,
-            user_metadata=chat_response.user_metadata
+            chat_id=chat_id,
+            sender=sender,
+            content=content,
+            chunks=chunks,
+            user_metadata=user_metadata
         )
-        print(f"Creating new message: {new_message}")
         db.add(new_message)
-        print("Added new message to session")
         db.commit()
-        print("Committed new message to database")
         db.refresh(new_message)
-        print(f"Refreshed new message: {new_message}")
         return new_message
     except Exception as e:
+        db.rollback()
         print(e)
         traceback.print_exc()
 
@@ -39,4 +35,118 @@ def get_messages_by_chat_id(chat_id: int, db: Session) -> List[ChatMessage]:
         return all_messages
     except Exception as e:
         print(e)
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+
+
+async def acreate_message(chat_id: int, sender: str, content: str, db: AsyncSession,
+                          chunks: Optional[Any] = None, user_metadata: Optional[dict] = None) -> ChatMessage:
+    """
+    Async version of create_message.
+
+    Args:
+        chat_id (int): The chat session the message belongs to.
+        sender (str): "user" or "ai".
+        content (str): Message text.
+        db (AsyncSession): The async database session.
+        chunks: Optional retrieved sources attached to an AI message.
+        user_metadata (dict): Optional free-form metadata.
+    """
+    new_message = ChatMessage(
+        chat_id=chat_id,
+        sender=sender,
+        content=content,
+        chunks=chunks,
+        user_metadata=user_metadata
+    )
+    try:
+        db.add(new_message)
+        await db.commit()
+        # expire_on_commit=False keeps generated columns loaded, no refresh round trip needed
+        return new_message
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def aget_messages_by_chat_id(chat_id: int, db: AsyncSession) -> List[ChatMessage]:
+    """
+    Async version of get_messages_by_chat_id.
+
+    Raises:
+        NoReferenceError: If the session has no messages.
+    """
+    result = await db.execute(
+        select(ChatMessage).where(ChatMessage.chat_id == chat_id).order_by(desc(ChatMessage.created_at))
+    )
+    all_messages = list(result.scalars().all())
+    if not all_messages:
+        raise NoReferenceError("No messages found for this chat session")
+    return all_messages
+
+
+async def aget_messages_page(
+    chat_id: int,
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[ChatMessage], Optional[str]]:
+    """
+    Keyset-paginated history of a chat session, newest first.
+
+    Each page is a bounded range scan on (chat_id, created_at, id), so its cost
+    does not depend on how long the conversation is.
+
+    Args:
+        chat_id (int): The chat session.
+        db (AsyncSession): The async database session.
+        limit (int): Page size, capped at MAX_PAGE_SIZE.
+        cursor (str): Opaque cursor from the previous page, or None for the newest page.
+
+    Returns:
+        The page of messages and the cursor of the next (older) page, or None at the start.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    statement = select(ChatMessage).where(ChatMessage.chat_id == chat_id)
+
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(position["t"])
+            message_id = int(position["i"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {e}")
+        statement = statement.where(tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(created_at, message_id))
+
+    statement = statement.order_by(desc(ChatMessage.created_at), desc(ChatMessage.id)).limit(limit + 1)
+    rows = list((await db.execute(statement)).scalars().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(t=last.created_at, i=last.id)
+    return rows, next_cursor
+
+
+async def aget_messages_between(
+    chat_id: int,
+    db: AsyncSession,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = MAX_PAGE_SIZE,
+) -> List[ChatMessage]:
+    """
+    Messages of a chat session with after_id < id < before_id, oldest first.
+
+    Used to fold turns that fell out of the prompt window into the rolling summary.
+    """
+    statement = select(ChatMessage).where(ChatMessage.chat_id == chat_id)
+    if after_id is not None:
+        statement = statement.where(ChatMessage.id > after_id)
+    if before_id is not None:
+        statement = statement.where(ChatMessage.id < before_id)
+    statement = statement.order_by(ChatMessage.created_at, ChatMessage.id).limit(limit)
+    return list((await db.execute(statement)).scalars().all())
@@ -1,7 +1,14 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import NoReferenceError
 from api.schemas.postgres import ChatSession, ChatMessage
-from sqlalchemy import desc
+from api.storage.postgres.pagination import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import desc, select, func, true, tuple_
+
+# Characters of the last message shown under each session in the sidebar
+PREVIEW_CHARS = 120
 
 def create_chat_session(user_id: str, title: str, db: Session) -> ChatSession:
     """"
@@ -37,3 +44,119 @@ def get_chat_session(user_id: str, db: Session) -> list[ChatSession]:
         return sessions
     except Exception as e:
         raise e
+
+
+async def acreate_chat_session(user_id: str, title: str, db: AsyncSession) -> ChatSession:
+    """
+    Async version of create_chat_session.
+
+    Args:
+        user_id (str): The ID of the user.
+        title (str): The title of the chat session.
+        db (AsyncSession): The async database session.
+    """
+    new_session = ChatSession(user_id=user_id, title=title)
+    try:
+        db.add(new_session)
+        await db.commit()
+        return new_session
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def aget_chat_session(user_id: str, db: AsyncSession) -> list[ChatSession]:
+    """
+    Async version of get_chat_session.
+    Args:
+        user_id (str): The ID of the user.
+        db (AsyncSession): The async database session.
+    """
+    result = await db.execute(
+        select(ChatSession).where(ChatSession.user_id == user_id).order_by(desc(ChatSession.updated_at))
+    )
+    sessions = list(result.scalars().all())
+    if not sessions:
+        raise NoReferenceError("No chat sessions found for this user")
+    return sessions
+
+
+async def auser_owns_chat_session(chat_id: int, user_id: str, db: AsyncSession) -> bool:
+    """True if the chat session exists and belongs to `user_id`."""
+    owner = await db.scalar(select(ChatSession.user_id).where(ChatSession.id == chat_id))
+    return owner is not None and owner == user_id
+
+
+async def aget_chat_session_summaries(
+    user_id: str,
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of a user's chat sessions for the sidebar, most recently updated first.
+
+    Title, last-message preview and message count come back from a single
+    statement (LATERAL joins against the chat_messages index) instead of
+    lazy-loading each session's messages.
+
+    Args:
+        user_id (str): The ID of the user.
+        db (AsyncSession): The async database session.
+        limit (int): Page size, capped at MAX_PAGE_SIZE.
+        cursor (str): Opaque cursor from the previous page, or None for the first page.
+
+    Returns:
+        The page of session summaries and the cursor of the next page (None on the last page).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    last_message = (
+        select(ChatMessage.content.label("content"), ChatMessage.created_at.label("created_at"))
+        .where(ChatMessage.chat_id == ChatSession.id)
+        .order_by(desc(ChatMessage.created_at), desc(ChatMessage.id))
+        .limit(1)
+        .lateral("last_message")
+    )
+    message_count = (
+        select(func.count().label("message_count"))
+        .where(ChatMessage.chat_id == ChatSession.id)
+        .lateral("message_count")
+    )
+
+    statement = (
+        select(
+            ChatSession.id,
+            ChatSession.title,
+            ChatSession.created_at,
+            ChatSession.updated_at,
+            func.left(last_message.c.content, PREVIEW_CHARS).label("last_message_preview"),
+            last_message.c.created_at.label("last_message_at"),
+            message_count.c.message_count,
+        )
+        .select_from(ChatSession)
+        .outerjoin(last_message, true())
+        .join(message_count, true())
+        .where(ChatSession.user_id == user_id)
+    )
+
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            updated_at = datetime.fromisoformat(position["t"])
+            session_id = int(position["i"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {e}")
+        statement = statement.where(tuple_(ChatSession.updated_at, ChatSession.id) < tuple_(updated_at, session_id))
+
+    statement = statement.order_by(desc(ChatSession.updated_at), desc(ChatSession.id)).limit(limit + 1)
+    rows = [dict(row._mapping) for row in (await db.execute(statement)).all()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(t=rows[-1]["updated_at"], i=rows[-1]["id"])
+    return rows, next_cursor
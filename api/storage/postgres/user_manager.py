@@ -1,6 +1,10 @@
 from api.models.user_model import UserEditModel, UserModel
 from api.schemas.postgres import Users
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime
 from fastapi import HTTPException
 from sqlalchemy.exc import NoReferenceError
 
@@ -28,6 +32,18 @@ def create_user(user: UserModel, db: Session):
     except Exception as e:
         raise e
 
+def upsert_user(user: UserModel, db: Session):
+    """
+    Insert or refresh a user profile in a single statement (used by the Clerk sync).
+    """
+    try:
+        db_user = db.execute(_upsert_user_statement(user)).scalar_one()
+        db.commit()
+        return db_user
+    except Exception as e:
+        db.rollback()
+        raise e
+
 def update_user(user_id: str, user: UserEditModel, db: Session):
     try:
         db_user = db.query(Users).filter(Users.id == user_id).first()
@@ -49,6 +65,45 @@ def delete_user(user_id: str, db: Session):
             raise NoReferenceError("User not found")
         db.delete(db_user)
         db.commit()
-        return {"detail": "User deleted successfully", "user": db_user.model_dump_json()}
+        return {"detail": "User deleted successfully", "user": db_user.id}
     except Exception as e:
-        raise e
\ No newline at end of file
+        raise e
+
+def _upsert_user_statement(user: UserModel):
+    values = user.model_dump()
+    now = datetime.now()
+    statement = insert(Users).values(**values, created_at=now, updated_at=now)
+    return statement.on_conflict_do_update(
+        index_elements=[Users.id],
+        set_={
+            "email": statement.excluded.email,
+            "first_name": statement.excluded.first_name,
+            "last_name": statement.excluded.last_name,
+            "updated_at": now,
+        },
+    ).returning(Users)
+
+
+async def aget_user_by_id(user_id: str, db: AsyncSession):
+    db_user = await db.get(Users, user_id)
+    if not db_user:
+        raise NoReferenceError("User not found")
+    return db_user
+
+
+async def aupsert_user(user: UserModel, db: AsyncSession):
+    try:
+        db_user = (await db.execute(_upsert_user_statement(user))).scalar_one()
+        await db.commit()
+        return db_user
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def adelete_user(user_id: str, db: AsyncSession):
+    result = await db.execute(delete(Users).where(Users.id == user_id))
+    await db.commit()
+    if result.rowcount == 0:
+        raise NoReferenceError("User not found")
+    return {"detail": "User deleted successfully", "user": user_id}
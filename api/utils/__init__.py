@@ -3,7 +3,7 @@ from fastapi import HTTPException
 import logging
 
 from .authenticate_user import  authenticate_user
-from .get_pg_database import get_pg_db
+from .get_pg_database import get_pg_db, get_async_pg_db
 from .get_mongo_database import get_mongo_db
 
-__all__ = ["authenticate_user", "get_pg_db", "get_mongo_db"]
\ No newline at end of file
+__all__ = ["authenticate_user", "get_pg_db", "get_async_pg_db", "get_mongo_db"]
\ No newline at end of file
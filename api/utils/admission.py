@@ -0,0 +1,235 @@
+"""
+Admission control for chat generations.
+
+Three limits are applied to /chat/message:
+
+- a per-user token bucket (sustained rate plus a burst allowance),
+- a per-user cap on concurrent requests,
+- a global cap on in-flight Gemini generations, shared fairly: waiters are
+  queued per user and slots are handed out round-robin across users, so one
+  user with many queued requests can't starve the others. The wait is bounded;
+  when it runs out the request is rejected with a Retry-After estimate.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+USER_RATE_PER_SECOND = float(os.getenv("ADMISSION_USER_RATE_PER_SECOND", "0.5"))
+USER_BURST = float(os.getenv("ADMISSION_USER_BURST", "5"))
+USER_MAX_CONCURRENT = int(os.getenv("ADMISSION_USER_MAX_CONCURRENT", "2"))
+MAX_INFLIGHT_GENERATIONS = int(os.getenv("ADMISSION_MAX_INFLIGHT_GENERATIONS", "32"))
+QUEUE_WAIT_SECONDS = float(os.getenv("ADMISSION_QUEUE_WAIT_SECONDS", "5"))
+# Idle per-user state kept before the least recently seen users are dropped
+MAX_TRACKED_USERS = int(os.getenv("ADMISSION_MAX_TRACKED_USERS", "10000"))
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """Refills at `rate` tokens per second up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_take(self) -> Tuple[bool, float]:
+        """Take one token. Returns (taken, seconds until one is available)."""
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+class FairSemaphore:
+    """
+    Counting semaphore whose waiters are served round-robin by key (user id).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        # Smoothed time a slot is held, used for Retry-After estimates
+        self._mean_hold_seconds = 5.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    def estimated_wait(self) -> float:
+        return self._mean_hold_seconds * (self.waiting + 1) / max(1, self.capacity)
+
+    async def acquire(self, key: str, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a slot. Returns False if none was granted."""
+        if self.in_use < self.capacity and not self._waiters:
+            self.in_use += 1
+            return True
+        if timeout <= 0:
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._abandon(key, future)
+        except asyncio.CancelledError:
+            if self._abandon(key, future):
+                self.release()
+            raise
+
+    def _abandon(self, key: str, future: asyncio.Future) -> bool:
+        """Drop a waiter that gave up. Returns True if the slot was handed to it anyway."""
+        if future.done() and not future.cancelled():
+            return True
+        future.cancel()
+        queue = self._waiters.get(key)
+        if queue is not None:
+            try:
+                queue.remove(future)
+            except ValueError:
+                pass
+            if not queue:
+                del self._waiters[key]
+        return False
+
+    def release(self, held_seconds: Optional[float] = None):
+        if held_seconds is not None:
+            self._mean_hold_seconds = 0.9 * self._mean_hold_seconds + 0.1 * held_seconds
+        # Hand the slot straight to the next user in rotation
+        while self._waiters:
+            key, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            if queue:
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            if not future.done():
+                future.set_result(True)
+                return
+        self.in_use -= 1
+
+
+class AdmissionController:
+    """
+    Per-user rate and concurrency limits plus the fair global generation cap.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float = USER_RATE_PER_SECOND,
+        burst: float = USER_BURST,
+        user_max_concurrent: int = USER_MAX_CONCURRENT,
+        max_inflight_generations: int = MAX_INFLIGHT_GENERATIONS,
+        queue_wait_seconds: float = QUEUE_WAIT_SECONDS,
+    ):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.user_max_concurrent = user_max_concurrent
+        self.queue_wait_seconds = queue_wait_seconds
+        self.generations = FairSemaphore(max_inflight_generations)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._active: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {"admitted": 0, "rate_limited": 0, "concurrency_limited": 0, "queue_timeouts": 0}
+
+    def _bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.rate_per_second, self.burst)
+            self._evict_idle()
+        self._buckets.move_to_end(user_id)
+        return bucket
+
+    def _evict_idle(self):
+        # A full bucket with nothing in flight is indistinguishable from a new one
+        while len(self._buckets) > MAX_TRACKED_USERS:
+            user_id, bucket = next(iter(self._buckets.items()))
+            if not bucket.is_full() or self._active.get(user_id):
+                break
+            del self._buckets[user_id]
+
+    def enter(self, user_id: str):
+        """
+        Admit a request for `user_id`. Pair with leave() once the request finishes.
+
+        Raises:
+            AdmissionRejected: If the user is over their concurrency or rate limit
+        """
+        if self._active.get(user_id, 0) >= self.user_max_concurrent:
+            self.stats["concurrency_limited"] += 1
+            raise AdmissionRejected("Too many concurrent requests", retry_after=1)
+        taken, wait = self._bucket(user_id).try_take()
+        if not taken:
+            self.stats["rate_limited"] += 1
+            raise AdmissionRejected("Rate limit exceeded", retry_after=wait)
+        self._active[user_id] = self._active.get(user_id, 0) + 1
+        self.stats["admitted"] += 1
+
+    def leave(self, user_id: str):
+        remaining = self._active.get(user_id, 0) - 1
+        if remaining > 0:
+            self._active[user_id] = remaining
+        else:
+            self._active.pop(user_id, None)
+
+    @asynccontextmanager
+    async def generation_slot(self, user_id: str, timeout: Optional[float] = None):
+        """
+        Hold one of the global generation slots, waiting fairly for at most `timeout` seconds.
+
+        Raises:
+            AdmissionRejected: If no slot frees up in time
+        """
+        wait = self.queue_wait_seconds if timeout is None else min(timeout, self.queue_wait_seconds)
+        if not await self.generations.acquire(user_id, wait):
+            self.stats["queue_timeouts"] += 1
+            raise AdmissionRejected("Server is at capacity", retry_after=self.generations.estimated_wait())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.generations.release(held_seconds=time.monotonic() - started)
+
+    def snapshot(self) -> Dict:
+        return {
+            "inflight_generations": self.generations.in_use,
+            "max_inflight_generations": self.generations.capacity,
+            "queued": self.generations.waiting,
+            "active_users": len(self._active),
+            **self.stats,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
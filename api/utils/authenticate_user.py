@@ -1,8 +1,17 @@
 from clerk_backend_api import Clerk
-from jwt import PyJWKClient
+from clerk_backend_api.models import ClerkErrors
+from jwt import PyJWKClient, PyJWK
 from dotenv import load_dotenv
 from api.models import UserModel
+from api.utils.user_profile_store import ProfileUnavailableError, resolve_user_profile
+from api.utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from api.utils.metrics import record_cache_lookup, stage_timer
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
 import os
+import time
 import jwt
 import warnings
 from fastapi import HTTPException, Depends
@@ -12,30 +21,218 @@ warnings.filterwarnings("always")
 load_dotenv()
 
 CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL")
+JWKS_REFRESH_SECONDS = int(os.getenv("JWKS_REFRESH_SECONDS", "600"))
+JWKS_MIN_REFETCH_SECONDS = int(os.getenv("JWKS_MIN_REFETCH_SECONDS", "30"))
+JWKS_MISSING_KIDS_SIZE = 1024
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_UNAVAILABLE_RETRY_AFTER = int(os.getenv("AUTH_UNAVAILABLE_RETRY_AFTER", "5"))
 security = HTTPBearer()
 
+# Clerk's 4xx responses (unknown user, bad request) are the caller's problem, not an outage.
+# Both modules share this breaker, so they must create it with the same arguments
+_clerk_breaker = get_circuit_breaker("clerk", slow_call_seconds=3.0, ignored_exceptions=(ClerkErrors,))
+
+
+class JWKSCache:
+    """
+    Long-lived JWKS key cache.
+
+    Keys are refreshed in the background every `refresh_seconds`, and an unknown
+    `kid` (key rotation) triggers an immediate refetch: the first miss of a kid
+    always refetches, repeated misses of the same kid at most once per
+    `min_refetch_seconds`, and concurrent misses share one fetch. Network
+    fetches run in a worker thread so the event loop is never blocked.
+    """
+
+    def __init__(self, jwks_url: str, refresh_seconds: int = JWKS_REFRESH_SECONDS,
+                 min_refetch_seconds: int = JWKS_MIN_REFETCH_SECONDS):
+        self.jwks_url = jwks_url
+        self.refresh_seconds = refresh_seconds
+        self.min_refetch_seconds = min_refetch_seconds
+        self._client = PyJWKClient(jwks_url, cache_jwk_set=False, cache_keys=False)
+        self._keys: Dict[str, PyJWK] = {}
+        # Start time of the last completed fetch
+        self._fetch_started_at = 0.0
+        # Unknown kid -> when it last triggered a refetch
+        self._missing_kids: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _fetch(self):
+        started = time.monotonic()
+        jwk_set = await _clerk_breaker.call(lambda: asyncio.to_thread(self._client.get_jwk_set, True))
+        self._keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+        self._fetch_started_at = started
+
+    async def refresh(self):
+        """Refetch the key set."""
+        async with self._lock:
+            await self._fetch()
+
+    def _may_refetch(self, kid: str) -> bool:
+        """Allow a refetch for a kid not seen missing within `min_refetch_seconds`, and remember it."""
+        now = time.monotonic()
+        last = self._missing_kids.get(kid)
+        if last is not None and now - last < self.min_refetch_seconds:
+            return False
+        self._missing_kids[kid] = now
+        self._missing_kids.move_to_end(kid)
+        while len(self._missing_kids) > JWKS_MISSING_KIDS_SIZE:
+            self._missing_kids.popitem(last=False)
+        return True
+
+    async def get_signing_key(self, kid: str) -> PyJWK:
+        key = self._keys.get(kid)
+        if key is None and self._may_refetch(kid):
+            # Unknown kid: keys were probably rotated
+            noticed_at = time.monotonic()
+            async with self._lock:
+                # Skip if a fetch finished while we waited and brought the key, or started
+                # after the miss (so it already saw the current key set)
+                if kid not in self._keys and self._fetch_started_at < noticed_at:
+                    await self._fetch()
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.PyJWKClientError(f"Unable to find a signing key that matches: {kid}")
+        self._missing_kids.pop(kid, None)
+        return key
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ JWKS background refresh failed: {e}")
+
+    async def start(self):
+        """Warm the key set and start the background refresh task."""
+        await self.refresh()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified tokens -> user id, each valid until its `exp` claim.
+    Tokens are keyed by their SHA-256 digest so raw credentials are not kept in memory.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[str]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            record_cache_lookup("auth_token", "miss")
+            return None
+        expires_at, user_id = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            record_cache_lookup("auth_token", "expired")
+            return None
+        self._entries.move_to_end(key)
+        record_cache_lookup("auth_token", "hit")
+        return user_id
+
+    def put(self, token: str, expires_at: float, user_id: str):
+        key = self._key(token)
+        self._entries[key] = (expires_at, user_id)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+_jwks_cache: Optional[JWKSCache] = None
+_token_cache = VerifiedTokenCache()
+_clerk_client: Optional[Clerk] = None
+
+
+def get_jwks_cache() -> JWKSCache:
+    global _jwks_cache
+    if _jwks_cache is None:
+        _jwks_cache = JWKSCache(CLERK_JWKS_URL)
+    return _jwks_cache
+
+
+def get_clerk_client() -> Clerk:
+    """Shared Clerk client, reused across requests so its HTTP connections stay pooled."""
+    global _clerk_client
+    if _clerk_client is None:
+        _clerk_client = Clerk(bearer_auth=os.getenv("CLERK_API_KEY"))
+    return _clerk_client
+
+
+async def start_auth_caches():
+    """Warm the JWKS cache on startup and begin background refresh."""
+    await get_jwks_cache().start()
+
+
+async def close_auth_caches():
+    """Stop background refresh and release the shared Clerk client."""
+    global _clerk_client
+    if _jwks_cache:
+        await _jwks_cache.close()
+    _token_cache.clear()
+    if _clerk_client is not None:
+        await _clerk_client.__aexit__(None, None, None)
+        _clerk_client = None
+
+
+async def verify_token(jwt_token: str) -> dict:
+    """Verify a Clerk session JWT against the cached JWKS and return its claims."""
+    kid = jwt.get_unverified_header(jwt_token).get("kid")
+    signing_key = await get_jwks_cache().get_signing_key(kid)
+    return jwt.decode(
+        jwt_token,
+        signing_key.key,
+        algorithms=["RS256"],
+        audience=None,  # Set if you use audience
+        options={"verify_exp": True}
+    )
+
+
 async def authenticate_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     jwt_token = credentials.credentials
-    clerk_api_key = os.getenv("CLERK_API_KEY")
+
     try:
-        # Fetch JWKS and verify JWT
-        jwks_client = PyJWKClient(CLERK_JWKS_URL)
-        signing_key = jwks_client.get_signing_key_from_jwt(jwt_token)
-        claims = jwt.decode(
-            jwt_token,
-            signing_key.key,
-            algorithms=["RS256"],
-            audience=None,  # Set if you use audience
-            options={"verify_exp": True}
+        with stage_timer("auth"):
+            user_id = _token_cache.get(jwt_token)
+            if user_id is None:
+                claims = await verify_token(jwt_token)
+                user_id = claims.get("sub")
+                _token_cache.put(jwt_token, float(claims.get("exp", 0)), user_id)
+            return await resolve_user_profile(user_id)
+    except CircuitOpenError as e:
+        # Clerk is down and we can't verify this user locally: tell the client to come back
+        print(f"Authentication unavailable: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication service temporarily unavailable",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+    except (ProfileUnavailableError, jwt.PyJWKClientConnectionError) as e:
+        # Infrastructure failure (database, Clerk API, JWKS endpoint), not a bad token
+        print(f"Authentication unavailable: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication service temporarily unavailable",
+            headers={"Retry-After": str(AUTH_UNAVAILABLE_RETRY_AFTER)}
         )
-        user_id = claims.get("sub")
-        async with Clerk(bearer_auth=os.getenv("CLERK_API_KEY")) as clerk:
-            user = await clerk.users.get_async(user_id=user_id)
-            user_id = user.id
-            user_first_name = user.first_name
-            user_last_name = user.last_name
-            user_email_address = user.email_addresses[0].email_address
-            return UserModel(id=user_id, first_name=user_first_name, last_name=user_last_name, email=user_email_address)
     except Exception as e:
         print(f"Authentication failed: {e}")
-        raise HTTPException(status_code=401, detail="Authentication failed")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Authentication failed")
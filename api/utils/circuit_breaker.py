@@ -0,0 +1,223 @@
+"""
+Per-dependency circuit breakers.
+
+Each upstream (Gemini generation, Gemini embeddings, Atlas vector search,
+Clerk) gets a breaker that keeps a rolling time window of call outcomes. When
+the error rate or the slow-call rate in that window crosses its threshold the
+breaker opens and calls fail immediately with CircuitOpenError, which callers
+turn into their existing fallback paths instead of waiting out a timeout.
+After `open_seconds` a limited number of probe calls are let through
+(half-open); a successful probe closes the breaker, a failed one reopens it.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_SLOW_CALL_RATE = float(os.getenv("CIRCUIT_SLOW_CALL_RATE", "0.8"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+CIRCUIT_HALF_OPEN_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "1"))
+
+
+class CircuitOpenError(Exception):
+    """The dependency's breaker is open; the call was not attempted."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed -> open -> half-open breaker over a rolling window of outcomes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slow_call_seconds: float,
+        window_seconds: float = CIRCUIT_WINDOW_SECONDS,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        slow_call_rate: float = CIRCUIT_SLOW_CALL_RATE,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+        half_open_calls: int = CIRCUIT_HALF_OPEN_CALLS,
+        ignored_exceptions: Tuple[Type[BaseException], ...] = (),
+    ):
+        """
+        Args:
+            name: Dependency name, used in errors and the monitoring snapshot
+            slow_call_seconds: Calls taking at least this long count as slow
+            window_seconds: Length of the rolling outcome window
+            min_calls: Outcomes needed in the window before the breaker may trip
+            failure_rate: Error fraction that opens the breaker
+            slow_call_rate: Slow-call fraction that opens the breaker
+            open_seconds: How long the breaker stays open before probing
+            half_open_calls: Concurrent probe calls allowed while half-open
+            ignored_exceptions: Errors that are the caller's fault (e.g. not found)
+                                and say nothing about the dependency's health
+        """
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.ignored_exceptions = ignored_exceptions
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        # (finished_at, ok, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self.stats: Dict[str, int] = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    def _prune(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def _rates(self) -> Tuple[int, float, float]:
+        total = len(self._outcomes)
+        if not total:
+            return 0, 0.0, 0.0
+        failures = sum(1 for _, ok, _ in self._outcomes if not ok)
+        slow = sum(1 for _, _, is_slow in self._outcomes if is_slow)
+        return total, failures / total, slow / total
+
+    def _open(self, now: float, reason: str):
+        self.state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self.stats["opened"] += 1
+        print(f"🔌 Circuit '{self.name}' opened ({reason})")
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def _acquire(self):
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < self.open_seconds:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.retry_after())
+            self.state = HALF_OPEN
+            self._probes_in_flight = 0
+            print(f"🔌 Circuit '{self.name}' half-open, probing")
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_calls:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._probes_in_flight += 1
+
+    def _record(self, ok: bool, slow: bool, probe: bool):
+        now = time.monotonic()
+        self.stats["calls"] += 1
+        self.stats["failures"] += 0 if ok else 1
+        self.stats["slow_calls"] += 1 if slow else 0
+
+        if probe:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if self.state != HALF_OPEN:
+                return
+            if ok and not slow:
+                self.state = CLOSED
+                self._outcomes.clear()
+                print(f"🔌 Circuit '{self.name}' closed")
+            else:
+                self._open(now, "probe failed" if not ok else "probe slow")
+            return
+
+        self._outcomes.append((now, ok, slow))
+        self._prune(now)
+        if self.state != CLOSED:
+            return
+        total, error_rate, slow_rate = self._rates()
+        if total < self.min_calls:
+            return
+        if error_rate >= self.failure_rate:
+            self._open(now, f"error rate {error_rate:.0%}")
+        elif slow_rate >= self.slow_call_rate:
+            self._open(now, f"slow-call rate {slow_rate:.0%}")
+
+    async def call(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `call` through the breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker is open (the call is not attempted)
+        """
+        self._acquire()
+        probe = self.state == HALF_OPEN
+        started = time.monotonic()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # Cancelled by a deadline or a winning hedge. Only a call that was
+            # already slow says something about the dependency.
+            elapsed = time.monotonic() - started
+            if elapsed >= self.slow_call_seconds:
+                self._record(ok=True, slow=True, probe=probe)
+            elif probe:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            raise
+        except self.ignored_exceptions:
+            self._record(ok=True, slow=False, probe=probe)
+            raise
+        except Exception:
+            self._record(ok=False, slow=time.monotonic() - started >= self.slow_call_seconds, probe=probe)
+            raise
+        self._record(ok=True, slow=time.monotonic() - started >= self.slow_call_seconds, probe=probe)
+        return result
+
+    def snapshot(self) -> Dict:
+        """State and rolling-window rates for monitoring."""
+        self._prune(time.monotonic())
+        total, error_rate, slow_rate = self._rates()
+        return {
+            "state": self.state,
+            "window_calls": total,
+            "error_rate": round(error_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "retry_after_seconds": round(self.retry_after(), 1),
+            **self.stats,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str, slow_call_seconds: Optional[float] = None, **kwargs) -> CircuitBreaker:
+    """
+    Shared breaker for a dependency, created on first use.
+
+    The slow-call threshold can be overridden per dependency with
+    CIRCUIT_<NAME>_SLOW_SECONDS (e.g. CIRCUIT_GEMINI_SLOW_SECONDS).
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        env_slow = os.getenv(f"CIRCUIT_{name.upper()}_SLOW_SECONDS")
+        slow = float(env_slow) if env_slow else (slow_call_seconds if slow_call_seconds is not None else 5.0)
+        breaker = _breakers[name] = CircuitBreaker(name, slow_call_seconds=slow, **kwargs)
+    return breaker
+
+
+def circuit_breaker_states() -> Dict[str, Dict]:
+    """Snapshot of every registered breaker, keyed by dependency name."""
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
@@ -0,0 +1,175 @@
+"""
+Per-request deadlines and hedged upstream calls.
+
+A Deadline is created when a chat request arrives and split across the
+pipeline stages (catalog -> embed -> search -> generate). Each stage gets its
+share of whatever time is left, so a fast stage hands its unused budget to the
+ones after it. Idempotent reads (query embedding, vector search) are hedged:
+if the first attempt is slower than the observed p95 for that call, a second
+one is started and whichever finishes first wins.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from api.utils.metrics import observe_stage
+
+T = TypeVar("T")
+
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "20"))
+
+# Relative share of the remaining budget each stage may use
+STAGE_SHARES: Dict[str, float] = {
+    "catalog": float(os.getenv("DEADLINE_SHARE_CATALOG", "0.05")),
+    "embed": float(os.getenv("DEADLINE_SHARE_EMBED", "0.10")),
+    "search": float(os.getenv("DEADLINE_SHARE_SEARCH", "0.15")),
+    "generate": float(os.getenv("DEADLINE_SHARE_GENERATE", "0.70")),
+}
+
+# Never hedge sooner than this, even if p95 is tiny
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "0.05"))
+# Samples required before p95 is trusted for hedging
+HEDGE_MIN_SAMPLES = 20
+
+
+class DeadlineExceeded(Exception):
+    """A pipeline stage ran out of its share of the request budget."""
+
+    def __init__(self, stage: str, budget: float):
+        super().__init__(f"Stage '{stage}' exceeded its {budget:.2f}s budget")
+        self.stage = stage
+        self.budget = budget
+
+
+class Deadline:
+    """
+    Time budget for one request, handed out stage by stage.
+    """
+
+    def __init__(self, total_seconds: float = CHAT_DEADLINE_SECONDS, shares: Optional[Dict[str, float]] = None):
+        self.total_seconds = total_seconds
+        self.shares = dict(shares or STAGE_SHARES)
+        self._expires_at = time.monotonic() + total_seconds
+        self._done: set = set()
+
+    def remaining(self) -> float:
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget_for(self, stage: str) -> float:
+        """
+        Seconds available to `stage`: its share of the time left, relative to the
+        stages that have not run yet. The last stage gets everything that remains.
+        """
+        pending = {name: share for name, share in self.shares.items() if name not in self._done}
+        share = pending.get(stage)
+        total_share = sum(pending.values())
+        if share is None or total_share <= 0:
+            return self.remaining()
+        return self.remaining() * share / total_share
+
+    async def run(self, stage: str, awaitable: Awaitable[T], budget: Optional[float] = None) -> T:
+        """
+        Await `awaitable` within the stage budget.
+
+        Raises:
+            DeadlineExceeded: If the stage does not finish in time
+        """
+        budget = self.budget_for(stage) if budget is None else min(budget, self.remaining())
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            if budget <= 0:
+                raise asyncio.TimeoutError()
+            result = await asyncio.wait_for(awaitable, timeout=budget)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(stage, budget)
+        finally:
+            self._done.add(stage)
+            observe_stage(stage, time.perf_counter() - started, outcome)
+
+
+class LatencyTracker:
+    """Rolling window of call latencies used to decide when to hedge."""
+
+    def __init__(self, window: int = 500):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    tracker = _trackers.get(name)
+    if tracker is None:
+        tracker = _trackers[name] = LatencyTracker()
+    return tracker
+
+
+async def hedged(name: str, call: Callable[[], Awaitable[T]], max_attempts: int = 2) -> T:
+    """
+    Run an idempotent call, starting a backup attempt once the first one is
+    slower than the observed p95 for `name`. Returns the first successful result.
+
+    Args:
+        name: Latency-tracker key, e.g. "embed" or "search"
+        call: Factory producing a fresh awaitable per attempt
+        max_attempts: Total attempts including the first
+
+    Returns:
+        Result of the first attempt to succeed
+    """
+    tracker = get_latency_tracker(name)
+    p95 = tracker.percentile(95)
+
+    async def attempt():
+        started = time.monotonic()
+        result = await call()
+        tracker.observe(time.monotonic() - started)
+        return result
+
+    attempts = 1
+    pending = {asyncio.ensure_future(attempt())}
+    last_error: Optional[BaseException] = None
+    try:
+        while pending:
+            can_hedge = p95 is not None and attempts < max_attempts
+            timeout = max(p95, HEDGE_MIN_DELAY_SECONDS) if can_hedge else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"⏱️ Hedging '{name}' after {timeout * 1000:.0f}ms (p95)")
+                pending.add(asyncio.ensure_future(attempt()))
+                attempts += 1
+                continue
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+            # Every attempt so far failed: use the spare attempt as a retry
+            if not pending and attempts < max_attempts:
+                pending.add(asyncio.ensure_future(attempt()))
+                attempts += 1
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -1,5 +1,8 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from typing import AsyncGenerator
 from dotenv import load_dotenv
 import os
 
@@ -7,21 +10,93 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("POSTGRES_PSYCOPG_URL")
 
-ENGINE = create_engine(url=DATABASE_URL)
+# Pool sizing for the async engine. Chat requests hold a connection only for the
+# duration of a query, so a small pool with some overflow covers many workers.
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "10"))
+PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", "20"))
+PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", "10"))
+PG_POOL_RECYCLE = int(os.getenv("PG_POOL_RECYCLE", "1800"))
+
+
+def _async_database_url() -> str:
+    """
+    POSTGRES_ASYNC_URL if set, otherwise POSTGRES_PSYCOPG_URL with the driver
+    swapped to asyncpg.
+    """
+    explicit = os.getenv("POSTGRES_ASYNC_URL")
+    if explicit:
+        return explicit
+    return make_url(DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
 
-with ENGINE.connect() as connection:
-    try:
-        connection.execute(text('CREATE SCHEMA IF NOT EXISTS "ragApp"'))
-        connection.commit()
-        print("Schema 'rag_app' ensured.")
-    except Exception as e:
-        print(f"Error creating schema: {e}")
+
+# Engines are lazy: nothing connects until the first query or init_pg_database()
+ENGINE = create_engine(url=DATABASE_URL, pool_pre_ping=True)
 
 SESSION = sessionmaker(bind=ENGINE, autoflush=False, autocommit=False)
 
+ASYNC_ENGINE = create_async_engine(
+    _async_database_url(),
+    pool_size=PG_POOL_SIZE,
+    max_overflow=PG_MAX_OVERFLOW,
+    pool_timeout=PG_POOL_TIMEOUT,
+    pool_recycle=PG_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+ASYNC_SESSION = async_sessionmaker(bind=ASYNC_ENGINE, autoflush=False, expire_on_commit=False)
+
+
+async def init_pg_database():
+    """Ensure the ragApp schema and tables exist. Called once from the app lifespan."""
+    from api.schemas.postgres import BASE
+
+    def _create_indexes(sync_connection):
+        # create_all only creates indexes together with new tables; add any that
+        # were introduced after the table already existed
+        for table in BASE.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=sync_connection, checkfirst=True)
+
+    async with ASYNC_ENGINE.begin() as connection:
+        await connection.execute(text('CREATE SCHEMA IF NOT EXISTS "ragApp"'))
+        await connection.run_sync(BASE.metadata.create_all)
+        await connection.run_sync(_create_indexes)
+        # users.email became nullable (missing emails are NULL, not "", so they can't collide)
+        await connection.execute(text('ALTER TABLE "ragApp".users ALTER COLUMN email DROP NOT NULL'))
+        await connection.execute(text('UPDATE "ragApp".users SET email = NULL WHERE email = \'\''))
+        # chat_sessions.updated_at is the keyset-pagination sort key and became NOT NULL
+        await connection.execute(text(
+            'UPDATE "ragApp".chat_sessions SET updated_at = COALESCE(created_at, now()) WHERE updated_at IS NULL'
+        ))
+        await connection.execute(text('ALTER TABLE "ragApp".chat_sessions ALTER COLUMN updated_at SET NOT NULL'))
+    print("Schema 'ragApp' ensured.")
+
+
+async def warm_pg_pool(connections: int = PG_POOL_SIZE):
+    """Open `connections` pooled connections up front so first requests don't pay for the handshakes."""
+    import asyncio
+
+    async def ping():
+        async with ASYNC_ENGINE.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(max(1, connections))))
+
+
+async def close_pg_database():
+    await ASYNC_ENGINE.dispose()
+    ENGINE.dispose()
+
+
 def get_pg_db():
     session = SESSION()
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+async def get_async_pg_db() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency yielding an AsyncSession from the tuned async pool."""
+    async with ASYNC_SESSION() as session:
+        yield session
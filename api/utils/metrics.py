@@ -0,0 +1,206 @@
+"""
+Request and stage metrics.
+
+Stage latencies (auth, catalog, embed, search, memory, generate, ...) are
+recorded into Prometheus histograms and, for the request being served, into a
+per-request timing map that the HTTP middleware turns into a Server-Timing
+header. Cache lookups are counted by cache and result, and in-flight gauges
+(HTTP requests, queued/in-flight generations, circuit states) are refreshed
+when /metrics is scraped.
+
+Model token usage is counted by stage, model and direction (input/output),
+with its estimated cost; the chat route then attributes each request's usage
+to its (catalog-validated) subject/unit. Per-user totals are kept with each
+persisted chat message (user_metadata["usage"] next to the user id), not in
+Prometheus, where one label per user grows without bound;
+TOKEN_METRICS_PER_USER=true adds user-labelled series for small deployments.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from api.utils.token_usage import TokenUsage
+
+TOKEN_METRICS_PER_USER = os.getenv("TOKEN_METRICS_PER_USER", "false").lower() == "true"
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+STAGE_DURATION = Histogram(
+    "rag_stage_duration_seconds",
+    "Latency of each request pipeline stage",
+    ["stage", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+REQUEST_DURATION = Histogram(
+    "rag_http_request_duration_seconds",
+    "End-to-end HTTP request latency",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "rag_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+REQUESTS_IN_FLIGHT = Gauge("rag_http_requests_in_flight", "HTTP requests currently being served")
+GENERATIONS_IN_FLIGHT = Gauge("rag_generations_in_flight", "Gemini generations holding an admission slot")
+GENERATIONS_QUEUED = Gauge("rag_generations_queued", "Requests waiting for a generation slot")
+CIRCUIT_OPEN = Gauge("rag_circuit_open", "1 while a dependency circuit is not closed", ["dependency"])
+MODEL_TOKENS = Counter(
+    "rag_model_tokens_total",
+    "Model tokens by stage, model and direction; source is reported (usage metadata) or estimated",
+    ["stage", "model", "direction", "source"],
+)
+MODEL_COST = Counter("rag_model_cost_usd_total", "Estimated model spend in USD", ["stage", "model"])
+UNIT_TOKENS = Counter("rag_unit_tokens_total", "Chat tokens per subject, unit and model",
+                      ["subject", "unit", "model", "direction"])
+UNIT_COST = Counter("rag_unit_cost_usd_total", "Estimated chat spend per subject, unit and model",
+                    ["subject", "unit", "model"])
+USER_TOKENS = Counter("rag_user_tokens_total", "Chat tokens per user and model", ["user", "model", "direction"])
+USER_COST = Counter("rag_user_cost_usd_total", "Estimated chat spend per user and model", ["user", "model"])
+
+# Stage name -> accumulated milliseconds for the request being served
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+# Cache name -> result of its latest lookup in the request being served
+_request_cache_results: ContextVar[Optional[Dict[str, str]]] = ContextVar("request_cache_results", default=None)
+# Stage name -> token usage accumulated by the request being served
+_request_usage: ContextVar[Optional[Dict[str, Dict[str, Any]]]] = ContextVar("request_usage", default=None)
+
+
+def start_request_timings() -> Dict[str, float]:
+    """Begin collecting stage timings (plus cache results and token usage) for the current request."""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    _request_cache_results.set({})
+    _request_usage.set({})
+    return timings
+
+
+def request_cache_results() -> Dict[str, str]:
+    """Cache lookups made so far by the current request, e.g. {"retrieval": "hit"}."""
+    return dict(_request_cache_results.get() or {})
+
+
+def observe_stage(stage: str, seconds: float, outcome: str = "ok"):
+    """Record one stage duration in the histogram and the current request's timings."""
+    STAGE_DURATION.labels(stage=stage, outcome=outcome).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds * 1000
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a block as `stage`; the outcome label is "error" if it raises."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - started, outcome)
+
+
+def record_cache_lookup(cache: str, result: str):
+    CACHE_LOOKUPS.labels(cache=cache, result=result).inc()
+    results = _request_cache_results.get()
+    if results is not None:
+        results[cache] = result
+
+
+def record_token_usage(stage: str, usage: TokenUsage, attribute_to_request: bool = True):
+    """
+    Count a model call's tokens and cost under `stage`.
+
+    Args:
+        stage: Pipeline stage that made the call (embed, generate, summarize, embed_documents, ...)
+        usage: Tokens reported by the model, or estimated
+        attribute_to_request: Also add it to the current request's usage (False for background work)
+    """
+    source = "estimated" if usage.estimated else "reported"
+    MODEL_TOKENS.labels(stage=stage, model=usage.model, direction="input", source=source).inc(usage.input_tokens)
+    MODEL_TOKENS.labels(stage=stage, model=usage.model, direction="output", source=source).inc(usage.output_tokens)
+    MODEL_COST.labels(stage=stage, model=usage.model).inc(usage.cost_usd)
+
+    stages = _request_usage.get()
+    if attribute_to_request and stages is not None:
+        entry = stages.setdefault(stage, {"model": usage.model, "input_tokens": 0, "output_tokens": 0,
+                                          "cost_usd": 0.0, "estimated": False})
+        entry["model"] = usage.model
+        entry["input_tokens"] += usage.input_tokens
+        entry["output_tokens"] += usage.output_tokens
+        entry["cost_usd"] += usage.cost_usd
+        entry["estimated"] = entry["estimated"] or usage.estimated
+
+
+def request_usage() -> Dict[str, Any]:
+    """Token usage of the current request: totals plus a per-stage breakdown."""
+    stages = {stage: {**entry, "cost_usd": round(entry["cost_usd"], 8)}
+              for stage, entry in (_request_usage.get() or {}).items()}
+    input_tokens = sum(entry["input_tokens"] for entry in stages.values())
+    output_tokens = sum(entry["output_tokens"] for entry in stages.values())
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "cost_usd": round(sum(entry["cost_usd"] for entry in stages.values()), 8),
+        "estimated": any(entry["estimated"] for entry in stages.values()),
+        "stages": stages,
+    }
+
+
+def record_request_usage(user_id: Optional[str], subject: str, unit: str):
+    """
+    Attribute the current request's token usage to its subject/unit (and, if
+    TOKEN_METRICS_PER_USER, its user).
+
+    Args:
+        user_id: Requesting user
+        subject: Catalog subject name ("unknown" if it wasn't validated)
+        unit: Catalog unit title ("unknown" if it wasn't validated)
+    """
+    for entry in (_request_usage.get() or {}).values():
+        model = entry["model"]
+        for direction in ("input", "output"):
+            tokens = entry[f"{direction}_tokens"]
+            UNIT_TOKENS.labels(subject=subject, unit=unit, model=model, direction=direction).inc(tokens)
+            if TOKEN_METRICS_PER_USER and user_id:
+                USER_TOKENS.labels(user=user_id, model=model, direction=direction).inc(tokens)
+        UNIT_COST.labels(subject=subject, unit=unit, model=model).inc(entry["cost_usd"])
+        if TOKEN_METRICS_PER_USER and user_id:
+            USER_COST.labels(user=user_id, model=model).inc(entry["cost_usd"])
+
+
+def server_timing_header(timings: Dict[str, float], total_ms: Optional[float] = None) -> str:
+    """Render timings as a Server-Timing header value (stage;dur=ms, ...)."""
+    parts = [f"{stage};dur={ms:.1f}" for stage, ms in timings.items()]
+    if total_ms is not None:
+        parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def _refresh_gauges():
+    from api.utils.admission import get_admission_controller
+    from api.utils.circuit_breaker import circuit_breaker_states, CLOSED
+
+    admission = get_admission_controller().snapshot()
+    GENERATIONS_IN_FLIGHT.set(admission["inflight_generations"])
+    GENERATIONS_QUEUED.set(admission["queued"])
+    for name, state in circuit_breaker_states().items():
+        CIRCUIT_OPEN.labels(dependency=name).set(0 if state["state"] == CLOSED else 1)
+
+
+def render_metrics() -> bytes:
+    """Prometheus text exposition of every registered metric."""
+    _refresh_gauges()
+    return generate_latest()
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,159 @@
+"""
+Startup resource registry.
+
+Long-lived clients (Mongo/Beanie, Postgres pools, the vector search engine, the
+Gemini generator, the JWKS cache) are registered once with a factory and an
+optional warm-up and close hook. start() initializes every component
+concurrently, honouring declared dependencies, and each component is built
+exactly once: concurrent get() calls share the same in-flight task. Warm-up
+calls then run in parallel, and only after they finish does the registry
+report ready. Per-component init and warm-up times are kept for /health.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+PENDING = "pending"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+@dataclass
+class Component:
+    name: str
+    factory: Callable[[], Awaitable[Any]]
+    warmup: Optional[Callable[[Any], Awaitable[Any]]] = None
+    close: Optional[Callable[[Any], Awaitable[Any]]] = None
+    depends_on: Tuple[str, ...] = ()
+    state: str = PENDING
+    instance: Any = None
+    init_ms: Optional[float] = None
+    warmup_ms: Optional[float] = None
+    error: Optional[str] = None
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class ResourceRegistry:
+    """
+    Builds, warms and closes the application's shared resources.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, Component] = {}
+        self.ready = False
+        self.startup_ms: Optional[float] = None
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[Any]],
+        warmup: Optional[Callable[[Any], Awaitable[Any]]] = None,
+        close: Optional[Callable[[Any], Awaitable[Any]]] = None,
+        depends_on: Tuple[str, ...] = (),
+    ):
+        """
+        Args:
+            name: Component name
+            factory: Coroutine function returning the instance
+            warmup: Called with the instance after every component is up (failures are logged, not fatal)
+            close: Called with the instance on shutdown, in reverse registration order
+            depends_on: Components that must be initialized before this one
+        """
+        if name in self._components:
+            raise ValueError(f"Resource '{name}' is already registered")
+        self._components[name] = Component(name=name, factory=factory, warmup=warmup, close=close,
+                                           depends_on=tuple(depends_on))
+
+    async def get(self, name: str) -> Any:
+        """The component's instance, initializing it (once) if needed."""
+        component = self._components[name]
+        if component._task is None:
+            component._task = asyncio.create_task(self._initialize(component))
+        return await asyncio.shield(component._task)
+
+    async def _initialize(self, component: Component) -> Any:
+        if component.depends_on:
+            await asyncio.gather(*(self.get(dependency) for dependency in component.depends_on))
+        component.state = STARTING
+        started = time.perf_counter()
+        try:
+            component.instance = await component.factory()
+        except Exception as e:
+            component.state = FAILED
+            component.error = str(e)
+            raise
+        finally:
+            component.init_ms = (time.perf_counter() - started) * 1000
+        component.state = READY
+        return component.instance
+
+    async def _warm(self, component: Component):
+        started = time.perf_counter()
+        try:
+            await component.warmup(component.instance)
+        except Exception as e:
+            component.error = f"warm-up failed: {e}"
+            print(f"⚠️ Warm-up of '{component.name}' failed: {e}")
+        finally:
+            component.warmup_ms = (time.perf_counter() - started) * 1000
+
+    async def start(self):
+        """Initialize every component concurrently, then warm them up and mark the registry ready."""
+        started = time.perf_counter()
+        await asyncio.gather(*(self.get(name) for name in self._components))
+        await asyncio.gather(*(self._warm(c) for c in self._components.values() if c.warmup is not None))
+        self.startup_ms = (time.perf_counter() - started) * 1000
+        self.ready = True
+        for component in self._components.values():
+            warm = f", warm-up {component.warmup_ms:.0f}ms" if component.warmup_ms is not None else ""
+            print(f"  • {component.name}: init {component.init_ms:.0f}ms{warm}")
+        print(f"✅ Resources ready in {self.startup_ms:.0f}ms")
+
+    async def close(self):
+        """Close started components in reverse registration order."""
+        self.ready = False
+        for component in reversed(list(self._components.values())):
+            if component._task is not None and not component._task.done():
+                component._task.cancel()
+            if component.state != READY or component.close is None:
+                continue
+            try:
+                await component.close(component.instance)
+            except Exception as e:
+                print(f"⚠️ Failed to close '{component.name}': {e}")
+            component.state = PENDING
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "startup_ms": round(self.startup_ms, 1) if self.startup_ms is not None else None,
+            "components": {
+                c.name: {
+                    "state": c.state,
+                    "init_ms": round(c.init_ms, 1) if c.init_ms is not None else None,
+                    "warmup_ms": round(c.warmup_ms, 1) if c.warmup_ms is not None else None,
+                    "error": c.error,
+                }
+                for c in self._components.values()
+            },
+        }
+
+
+_registry: Optional[ResourceRegistry] = None
+
+
+def get_resource_registry() -> ResourceRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ResourceRegistry()
+    return _registry
+
+
+def new_resource_registry() -> ResourceRegistry:
+    """Replace the global registry with an empty one (one per application lifespan)."""
+    global _registry
+    _registry = ResourceRegistry()
+    return _registry
@@ -0,0 +1,29 @@
+"""
+Cheap local token estimates.
+
+Gemini's tokenizer isn't available offline, so budgets are planned with a
+characters-per-token heuristic (~4 for English prose), which is close enough
+for deciding how much context fits into a prompt.
+"""
+
+import math
+import os
+
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4.0"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated token count of `text` (0 for empty text)."""
+    if not text:
+        return 0
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Trim `text` to roughly `max_tokens`, cutting at the last whitespace."""
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > max_chars // 2 else cut).rstrip() + " ..."
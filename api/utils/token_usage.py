@@ -0,0 +1,104 @@
+"""
+Token and cost accounting for model calls.
+
+Gemini chat responses carry usage metadata (prompt and output token counts);
+the embedding endpoints don't report usage, so embedding calls - and any
+generation whose response lacks metadata - are counted with the local
+estimate from token_counter and flagged as estimated.
+
+Costs come from a per-model price table in USD per million (input, output)
+tokens. The defaults are list prices at the time of writing; override or
+extend them with MODEL_PRICES, e.g.
+    MODEL_PRICES='{"gemini-1.5-pro": [1.25, 5.0], "my-tuned-model": [0.5, 1.5]}'
+Models missing from the table are still counted, at zero cost, with a
+one-time warning. Names are normalized by model_name() before any lookup.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Set, Tuple
+
+from api.utils.token_counter import estimate_tokens
+
+DEFAULT_MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-embedding-001": (0.15, 0.0),
+    # Legacy embedding model still used by the retriever's default config; priced as its successor
+    "embedding-001": (0.15, 0.0),
+}
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    **DEFAULT_MODEL_PRICES,
+    **{model: (float(prices[0]), float(prices[1])) for model, prices in json.loads(os.getenv("MODEL_PRICES", "{}")).items()},
+}
+
+_unpriced_warned: Set[str] = set()
+
+
+def model_name(model: str) -> str:
+    """Bare model name (LangChain reports some models as "models/<name>")."""
+    return model.rsplit("/", 1)[-1]
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """USD cost of a call from the price table (0.0 for unknown models)."""
+    model = model_name(model)
+    if model not in MODEL_PRICES:
+        if model not in _unpriced_warned:
+            _unpriced_warned.add(model)
+            print(f"⚠️ No price for model '{model}'; its cost is counted as $0 (set MODEL_PRICES)")
+        return 0.0
+    input_price, output_price = MODEL_PRICES[model]
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+@dataclass
+class TokenUsage:
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    estimated: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def cost_usd(self) -> float:
+        return estimate_cost(self.model, self.input_tokens, self.output_tokens)
+
+
+def _response_text(response: Any) -> str:
+    content = getattr(response, "content", response)
+    if isinstance(content, list):
+        # Multi-part messages: keep the text parts
+        return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+    return content if isinstance(content, str) else str(content)
+
+
+def usage_from_response(response: Any, model: str, prompt: str) -> Tuple[str, TokenUsage]:
+    """
+    Text and token usage of an LLM result.
+
+    Args:
+        response: AIMessage (with usage_metadata when the provider reports it) or a plain string
+        model: Model that produced it
+        prompt: Rendered prompt, for the estimate when usage isn't reported
+
+    Returns:
+        (response text, usage)
+    """
+    text = _response_text(response)
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata:
+        return text, TokenUsage(model_name(model), int(metadata.get("input_tokens", 0)), int(metadata.get("output_tokens", 0)))
+    return text, TokenUsage(model_name(model), estimate_tokens(prompt), estimate_tokens(text), estimated=True)
+
+
+def embedding_usage(model: str, texts: Iterable[str]) -> TokenUsage:
+    """Estimated input tokens of an embedding call (the embedding API reports none)."""
+    return TokenUsage(model_name(model), sum(estimate_tokens(text) for text in texts), 0, estimated=True)
@@ -0,0 +1,211 @@
+"""
+Local user-profile store.
+
+Authenticated requests resolve first name, last name and email from the
+ragApp.users table through an in-process read-through cache instead of calling
+Clerk's users API. The table is kept fresh by the Clerk webhook
+(api/routes/webhook_routes.py) and lazily filled from Clerk on a miss. If
+Postgres can't be read, profiles come straight from Clerk (and aren't stored),
+so a database outage doesn't log users out.
+"""
+
+import asyncio
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from clerk_backend_api.models import ClerkErrors
+from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError, NoReferenceError, SQLAlchemyError
+
+from api.models import UserModel
+from api.storage.postgres.user_manager import aget_user_by_id, aupsert_user, adelete_user
+from api.utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from api.utils.metrics import record_cache_lookup
+
+load_dotenv()
+
+PROFILE_CACHE_SIZE = int(os.getenv("USER_PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL_SECONDS = int(os.getenv("USER_PROFILE_CACHE_TTL_SECONDS", "900"))
+
+# Clerk's 4xx responses (unknown user, bad request) are the caller's problem, not an outage.
+# Both modules share this breaker, so they must create it with the same arguments
+_clerk_breaker = get_circuit_breaker("clerk", slow_call_seconds=3.0, ignored_exceptions=(ClerkErrors,))
+
+
+class ProfileUnavailableError(Exception):
+    """Neither the local store nor Clerk could provide a profile (infrastructure failure, not bad credentials)."""
+
+
+class UserProfileCache:
+    """Bounded in-process LRU of user profiles with a TTL as a safety net for missed webhooks."""
+
+    def __init__(self, max_size: int = PROFILE_CACHE_SIZE, ttl_seconds: int = PROFILE_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, UserModel]]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[UserModel]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            record_cache_lookup("user_profile", "miss")
+            return None
+        stored_at, profile = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[user_id]
+            record_cache_lookup("user_profile", "expired")
+            return None
+        self._entries.move_to_end(user_id)
+        record_cache_lookup("user_profile", "hit")
+        return profile
+
+    def put(self, profile: UserModel):
+        self._entries[profile.id] = (time.monotonic(), profile)
+        self._entries.move_to_end(profile.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+
+
+_profile_cache = UserProfileCache()
+
+
+def _session():
+    # Imported lazily so importing this module does not create database engines
+    from api.utils.get_pg_database import ASYNC_SESSION
+    return ASYNC_SESSION()
+
+
+async def _load_profile(user_id: str) -> Optional[UserModel]:
+    async with _session() as db:
+        try:
+            db_user = await aget_user_by_id(user_id, db)
+        except NoReferenceError:
+            return None
+        return UserModel(id=db_user.id, email=db_user.email,
+                         first_name=db_user.first_name, last_name=db_user.last_name)
+
+
+async def _store_profile(profile: UserModel):
+    """
+    Upsert a profile. The upsert only resolves conflicts on id, so an email still
+    held by another row (e.g. a deleted account whose webhook never arrived) fails
+    on the unique index; the profile is then stored without an email.
+    """
+    async with _session() as db:
+        try:
+            await aupsert_user(profile, db)
+            return
+        except IntegrityError:
+            if not profile.email:
+                raise
+    print(f"⚠️ Email of user {profile.id} already belongs to another user; storing the profile without it")
+    async with _session() as db:
+        await aupsert_user(profile.model_copy(update={"email": None}), db)
+
+
+async def _remove_profile(user_id: str):
+    async with _session() as db:
+        try:
+            await adelete_user(user_id, db)
+        except NoReferenceError:
+            pass
+
+
+def profile_from_clerk_payload(data: Dict[str, Any]) -> UserModel:
+    """
+    Build a UserModel from a Clerk user object (webhook `data` or users API JSON).
+    Uses the primary email address, falling back to the first one; None if there is none.
+    """
+    emails = data.get("email_addresses") or []
+    primary_id = data.get("primary_email_address_id")
+    email = next((e.get("email_address") for e in emails if e.get("id") == primary_id), None)
+    if email is None and emails:
+        email = emails[0].get("email_address")
+    return UserModel(
+        id=data["id"],
+        email=email or None,
+        first_name=data.get("first_name"),
+        last_name=data.get("last_name"),
+    )
+
+
+async def _fetch_from_clerk(user_id: str) -> UserModel:
+    from api.utils.authenticate_user import get_clerk_client
+    user = await _clerk_breaker.call(lambda: get_clerk_client().users.get_async(user_id=user_id))
+    return profile_from_clerk_payload(user.model_dump())
+
+
+async def _fetch_or_unavailable(user_id: str) -> UserModel:
+    """Fetch from Clerk; outages surface as ProfileUnavailableError, Clerk's own verdicts pass through."""
+    try:
+        return await _fetch_from_clerk(user_id)
+    except (CircuitOpenError, ClerkErrors):
+        raise
+    except Exception as e:
+        raise ProfileUnavailableError(f"Clerk profile lookup failed for {user_id}: {e}") from e
+
+
+async def resolve_user_profile(user_id: str) -> UserModel:
+    """
+    Resolve a user profile: in-process cache -> ragApp.users -> Clerk (lazy fill).
+
+    Args:
+        user_id: Clerk user id (JWT `sub` claim)
+
+    Returns:
+        The user's profile
+
+    Raises:
+        ProfileUnavailableError: Postgres and Clerk both failed, or Clerk failed for a new user
+        CircuitOpenError: The Clerk breaker is open
+        ClerkErrors: Clerk rejected the lookup (e.g. the user no longer exists)
+    """
+    profile = _profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+
+    try:
+        profile = await _load_profile(user_id)
+    except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+        # Local store is down: serve from Clerk without trying to write back
+        print(f"⚠️ Failed to load profile for {user_id} from Postgres ({e}); fetching from Clerk")
+        profile = await _fetch_or_unavailable(user_id)
+        _profile_cache.put(profile)
+        return profile
+
+    if profile is None:
+        # First time we see this user and the webhook hasn't landed yet
+        profile = await _fetch_or_unavailable(user_id)
+        try:
+            await _store_profile(profile)
+        except Exception as e:
+            print(f"⚠️ Failed to persist profile for {user_id}: {e}")
+
+    _profile_cache.put(profile)
+    return profile
+
+
+async def apply_clerk_user_event(event_type: str, data: Dict[str, Any]) -> Optional[str]:
+    """
+    Apply a Clerk `user.*` webhook event to the local store.
+
+    Returns:
+        The affected user id, or None if the event type is ignored
+    """
+    if event_type in ("user.created", "user.updated"):
+        profile = profile_from_clerk_payload(data)
+        await _store_profile(profile)
+        _profile_cache.put(profile)
+        return profile.id
+    if event_type == "user.deleted":
+        user_id = data.get("id")
+        if user_id:
+            await _remove_profile(user_id)
+            _profile_cache.invalidate(user_id)
+        return user_id
+    return None
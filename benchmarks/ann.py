@@ -0,0 +1,198 @@
+"""
+NumPy reference implementations of the retrieval configurations compared by
+benchmarks/bench_retrieval_recall.py.
+
+All vectors are L2-normalized float32, so inner product == cosine similarity.
+
+- exact_top_k: blocked brute-force ground truth that scales past memory-sized
+  score matrices.
+- FlatIndex: exhaustive scan, optionally over quantized codes (int8 scalar or
+  1-bit sign) with the best `candidates` rescored at full precision.
+- IVFIndex: k-means coarse quantizer with inverted lists; a query scans the
+  `nprobe` closest lists, again optionally over quantized codes with rescoring.
+- truncate: Matryoshka-style prefix truncation + renormalization.
+"""
+
+import time
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+QUANTIZATIONS = ("none", "int8", "binary")
+BLOCK_ROWS = 65536
+# int8 scan block: small enough for its float32 staging buffer to stay in cache
+SCAN_BLOCK_ROWS = 256
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def truncate(vectors: np.ndarray, dims: Optional[int]) -> np.ndarray:
+    """First `dims` components, renormalized (no-op when dims is None or the full size)."""
+    if not dims or dims >= vectors.shape[1]:
+        return vectors
+    return normalize(np.ascontiguousarray(vectors[:, :dims]))
+
+
+def _blocks(n: int, size: int = BLOCK_ROWS) -> Iterator[Tuple[int, int]]:
+    for start in range(0, n, size):
+        yield start, min(n, start + size)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores along the last axis, best first."""
+    k = min(k, scores.shape[-1])
+    part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.take_along_axis(scores, part, axis=-1).argsort(axis=-1)[..., ::-1]
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Exact inner-product neighbours of every query, computed block by block so the
+    full (queries x corpus) score matrix is never materialized.
+
+    Returns:
+        (n_queries, k) array of corpus row indices, best first
+    """
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    for start, end in _blocks(len(corpus)):
+        scores = queries @ corpus[start:end].T
+        ids = np.broadcast_to(np.arange(start, end), scores.shape)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_ids, ids], axis=1)
+        keep = _top_k(merged_scores, k)
+        best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+        best_ids = np.take_along_axis(merged_ids, keep, axis=1)
+    return best_ids
+
+
+class _Codes:
+    """Quantized copy of a vector set plus the matching query scorer."""
+
+    def __init__(self, vectors: np.ndarray, quantization: str):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}'")
+        self.quantization = quantization
+        if quantization == "int8":
+            # Symmetric scalar quantization: components of unit vectors lie in [-1, 1]
+            self.scale = float(np.abs(vectors).max()) / 127 or 1.0
+            self.codes = self._quantize(vectors)
+        elif quantization == "binary":
+            self.codes = np.packbits(vectors > 0, axis=1)
+        else:
+            self.codes = vectors
+
+    def _quantize(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def _score_int8(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Code-space inner products with the query quantized to the same scale.
+
+        Codes are widened a small block at a time into one reused buffer, so the
+        scan reads 1 byte per component and never materializes a float copy of
+        the codes; the products of int8 values are summed exactly in float32
+        (up to 1040 dims) by BLAS, which is faster than NumPy's integer matmul.
+        """
+        query_codes = self._quantize(query).astype(np.float32)
+        scores = np.empty(len(codes), dtype=np.float32)
+        buffer = np.empty((min(SCAN_BLOCK_ROWS, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start, end in _blocks(len(codes), SCAN_BLOCK_ROWS):
+            block = buffer[:end - start]
+            np.copyto(block, codes[start:end], casting="unsafe")
+            np.matmul(block, query_codes, out=scores[start:end])
+        return scores * self.scale ** 2
+
+    def score(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.quantization == "int8":
+            return self._score_int8(codes, query)
+        if self.quantization == "binary":
+            query_bits = np.packbits(query > 0)
+            # Fewer differing bits = more similar; negate so higher is better
+            return -_POPCOUNT[np.bitwise_xor(codes, query_bits)].sum(axis=1, dtype=np.int32).astype(np.float32)
+        return codes @ query
+
+
+class FlatIndex:
+    """Exhaustive scan, optionally over quantized codes with full-precision rescoring."""
+
+    def __init__(self, vectors: np.ndarray, quantization: str = "none"):
+        started = time.perf_counter()
+        self.vectors = vectors
+        self.codes = _Codes(vectors, quantization)
+        self.build_seconds = time.perf_counter() - started
+
+    @property
+    def nbytes(self) -> int:
+        # Quantized configurations keep the float vectors for rescoring
+        return self.codes.nbytes + (self.vectors.nbytes if self.codes.quantization != "none" else 0)
+
+    def search(self, query: np.ndarray, k: int, candidates: int) -> np.ndarray:
+        scores = self.codes.score(query)
+        if self.codes.quantization == "none":
+            return _top_k(scores, k)
+        shortlist = _top_k(scores, max(k, candidates))
+        rescored = self.vectors[shortlist] @ query
+        return shortlist[_top_k(rescored, k)]
+
+
+class IVFIndex:
+    """
+    Inverted-file index: vectors grouped by their nearest k-means centroid.
+    """
+
+    def __init__(self, vectors: np.ndarray, nlist: int, quantization: str = "none",
+                 train_size: int = 100_000, iterations: int = 10, seed: int = 0):
+        started = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        nlist = max(1, min(nlist, len(vectors)))
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), max(train_size, nlist)), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = normalize(centroids)
+        self.centroids = centroids
+
+        assignment = np.empty(len(vectors), dtype=np.int32)
+        for start, end in _blocks(len(vectors)):
+            assignment[start:end] = np.argmax(vectors[start:end] @ centroids.T, axis=1)
+        # Store vectors list by list so a probe reads one contiguous slice
+        self.order = np.argsort(assignment, kind="stable")
+        self.offsets = np.searchsorted(assignment[self.order], np.arange(nlist + 1))
+        self.vectors = vectors[self.order]
+        self.codes = _Codes(self.vectors, quantization)
+        self.build_seconds = time.perf_counter() - started
+
+    @property
+    def nbytes(self) -> int:
+        extra = self.vectors.nbytes if self.codes.quantization != "none" else 0
+        return self.codes.nbytes + extra + self.centroids.nbytes + self.order.nbytes
+
+    def search(self, query: np.ndarray, k: int, candidates: int, nprobe: int = 8) -> np.ndarray:
+        lists = _top_k(self.centroids @ query, nprobe)
+        rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in lists])
+        if not len(rows):
+            return np.empty(0, dtype=np.int64)
+        scores = self.codes.score(query, rows)
+        if self.codes.quantization == "none":
+            hits = rows[_top_k(scores, k)]
+        else:
+            shortlist = rows[_top_k(scores, max(k, candidates))]
+            hits = shortlist[_top_k(self.vectors[shortlist] @ query, k)]
+        return self.order[hits]
@@ -0,0 +1,254 @@
+"""
+End-to-end load benchmark for /chat/message without Atlas, Gemini or Clerk.
+
+Boots api.main.app in-process with a benchmark lifespan and local stand-ins
+(see benchmarks/standins.py):
+
+- Mongo: mongomock-motor in memory (--mongo memory, needs `pip install
+  mongomock-motor`) or a local mongod (--mongo mongodb://localhost:27017).
+  Subject/Unit lookups go through Beanie as in production. Vector search is
+  served by an in-memory index, since $vectorSearch is Atlas-only.
+- Gemini: deterministic fake embedder and LLMs with configurable latency.
+- Clerk: a local RSA signer whose key is served through the real JWKS cache.
+  Profiles are pre-seeded, so requests take the real token verification path.
+- Postgres: optional. With --postgres (uses POSTGRES_PSYCOPG_URL) every user
+  gets a real chat session, so conversation memory and write-behind persistence
+  are included. Without it, requests use temporary chat ids and skip both.
+
+Per-stage latencies come from each response's Server-Timing header. Admission
+limits (ADMISSION_*) apply as in production; raise them to measure raw pipeline
+capacity rather than the rate limiter.
+
+Usage:
+    python -m benchmarks.bench_chat_e2e --concurrency 32 --requests 2000 \\
+        --llm-latency lognormal:800:0.4 --search-latency lognormal:60:0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from importlib import import_module
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from beanie import init_beanie
+
+from benchmarks.stats import summarize
+from benchmarks.standins import (
+    FakeResponseGenerator, FakeVectorSearchEngine, LatencyDistribution, LocalJWKS,
+    asgi_request, make_corpus, mongo_client, parse_server_timing
+)
+from api.main import app
+from api.models import UserModel
+from api.models.ai_response_generator import get_ai_response_dependency
+from api.loaders.data_retriever import get_vector_search_dependency
+from api.schemas.mongodb import __beanie_models__
+from api.schemas.mongodb.subject import Subject
+from api.schemas.mongodb.unit import Unit
+from api.utils.user_profile_store import UserProfileCache
+
+# api.utils re-exports the authenticate_user function under the module's name
+auth_module = import_module("api.utils.authenticate_user")
+profile_module = import_module("api.utils.user_profile_store")
+
+
+async def _seed_catalog(run_id: str, units: int):
+    subject = Subject(subject_code=f"BENCH-{run_id}", name=f"Benchmark {run_id}")
+    await subject.insert()
+    unit_docs = []
+    for i in range(units):
+        unit = Unit(subject=subject, title=f"Unit {i + 1}", order_index=i)
+        await unit.insert()
+        unit_docs.append(unit)
+    return subject, unit_docs
+
+
+async def _cleanup_catalog(subject: Subject, units: List[Unit]):
+    for unit in units:
+        await unit.delete()
+    await subject.delete()
+
+
+async def _create_chat_sessions(user_ids: List[str]) -> Dict[str, str]:
+    from api.utils.get_pg_database import ASYNC_SESSION
+    from api.storage.postgres.chat_session_manager import acreate_chat_session
+    chat_ids = {}
+    async with ASYNC_SESSION() as db:
+        for user_id in user_ids:
+            chat = await acreate_chat_session(user_id, "benchmark", db)
+            chat_ids[user_id] = str(chat.id)
+    return chat_ids
+
+
+async def _cleanup_chat_sessions(chat_ids: Dict[str, str]):
+    from sqlalchemy import delete
+    from api.schemas.postgres import ChatSession, ChatMessage
+    from api.utils.get_pg_database import ASYNC_SESSION
+    ids = [int(chat_id) for chat_id in chat_ids.values()]
+    async with ASYNC_SESSION() as db:
+        await db.execute(delete(ChatMessage).where(ChatMessage.chat_id.in_(ids)))
+        await db.execute(delete(ChatSession).where(ChatSession.id.in_(ids)))
+        await db.commit()
+
+
+def _bench_lifespan(mongo_target: str, use_postgres: bool, jwks: LocalJWKS):
+    @asynccontextmanager
+    async def lifespan(_app):
+        client = mongo_client(mongo_target)
+        await init_beanie(database=client["rag_bench"], document_models=__beanie_models__)
+        if use_postgres:
+            from api.utils.get_pg_database import init_pg_database
+            await init_pg_database()
+        auth_module._jwks_cache = jwks.cache()
+        await auth_module.start_auth_caches()
+        try:
+            yield
+        finally:
+            from api.storage.mongodb.query_log import close_query_log_writer
+            await close_query_log_writer()
+            await auth_module.close_auth_caches()
+            if use_postgres:
+                from api.storage.postgres.chat_message_writer import close_chat_message_writer
+                from api.utils.get_pg_database import close_pg_database
+                await close_chat_message_writer()
+                await close_pg_database()
+    return lifespan
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    jwks = LocalJWKS()
+    app.router.lifespan_context = _bench_lifespan(args.mongo, args.postgres, jwks)
+
+    async with app.router.lifespan_context(app):
+        run_id = uuid.uuid4().hex[:8]
+        subject, units = await _seed_catalog(run_id, args.units)
+        corpus = make_corpus(
+            rng, [(str(subject.id), str(unit.id)) for unit in units],
+            pages_per_unit=args.pages_per_unit, chunks_per_page=args.chunks_per_page
+        )
+        search_engine = FakeVectorSearchEngine(
+            corpus,
+            embed_latency=LatencyDistribution(args.embed_latency, seed=args.seed + 1),
+            search_latency=LatencyDistribution(args.search_latency, seed=args.seed + 2),
+        )
+        generator = FakeResponseGenerator(
+            pro_latency=LatencyDistribution(args.llm_latency, seed=args.seed + 3),
+            fast_latency=LatencyDistribution(args.fast_llm_latency, seed=args.seed + 4),
+        )
+        await generator.initialize()
+        app.dependency_overrides[get_vector_search_dependency] = lambda: search_engine
+        app.dependency_overrides[get_ai_response_dependency] = lambda: generator
+
+        # Users: profiles pre-seeded so no Clerk or users-table lookups happen
+        user_ids = [f"bench_{run_id}_{i}" for i in range(args.users)]
+        profile_module._profile_cache = UserProfileCache(ttl_seconds=10 ** 9)
+        for user_id in user_ids:
+            profile_module._profile_cache.put(UserModel(id=user_id, email=f"{user_id}@bench.local"))
+        tokens = {user_id: jwks.sign(user_id) for user_id in user_ids}
+        chat_ids = await _create_chat_sessions(user_ids) if args.postgres else {
+            user_id: f"temp-{user_id}" for user_id in user_ids
+        }
+
+        # A fixed pool of questions; repeats exercise the response cache
+        unit_titles = {str(unit.id): unit.title for unit in units}
+        questions = []
+        for _ in range(args.distinct_questions):
+            chunk = rng.choice(corpus)
+            words = chunk.page_content.split()[:12]
+            questions.append((unit_titles[chunk.metadata["unit_id"]], "What does " + " ".join(words) + " mean?"))
+
+        latencies: List[float] = []
+        stage_latencies: Dict[str, List[float]] = defaultdict(list)
+        statuses: Counter = Counter()
+        degraded = 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(i: int, record: bool):
+            nonlocal degraded
+            user_id = user_ids[i % len(user_ids)]
+            unit_title, question = questions[rng.randrange(len(questions))]
+            body = json.dumps({
+                "message": question,
+                "chat_id": chat_ids[user_id],
+                "subject": subject.name,
+                "unit": unit_title,
+                "timestamp": str(time.time()),
+            }).encode("utf-8")
+            async with semaphore:
+                started = time.perf_counter()
+                status, headers, payload = await asgi_request(app, "POST", "/chat/message", {
+                    "authorization": f"Bearer {tokens[user_id]}",
+                    "content-type": "application/json",
+                }, body)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            if not record:
+                return
+            statuses[status] += 1
+            latencies.append(elapsed_ms)
+            for stage, ms in parse_server_timing(headers.get("server-timing", "")).items():
+                stage_latencies[stage].append(ms)
+            if status == 200 and json.loads(payload).get("degraded"):
+                degraded += 1
+
+        try:
+            await asyncio.gather(*(one(i, record=False) for i in range(args.warmup)))
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i, record=True) for i in range(args.requests)))
+            elapsed = time.perf_counter() - started
+        finally:
+            app.dependency_overrides.clear()
+            await _cleanup_catalog(subject, units)
+            if args.postgres:
+                await _cleanup_chat_sessions(chat_ids)
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "throughput_rps": args.requests / elapsed,
+        "latency": summarize(latencies),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "degraded": degraded,
+        "stages": {stage: summarize(values) for stage, values in sorted(stage_latencies.items())},
+        "response_cache": dict(generator.response_cache.stats) if generator.response_cache else None,
+        "routing": generator.router.summary(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--units", type=int, default=4)
+    parser.add_argument("--pages-per-unit", type=int, default=50)
+    parser.add_argument("--chunks-per-page", type=int, default=4)
+    parser.add_argument("--distinct-questions", type=int, default=500)
+    parser.add_argument("--embed-latency", default="lognormal:40:0.4", help="fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--search-latency", default="lognormal:60:0.5")
+    parser.add_argument("--llm-latency", default="lognormal:1500:0.4", help="Pro tier")
+    parser.add_argument("--fast-llm-latency", default="lognormal:500:0.4", help="Fast tier")
+    parser.add_argument("--mongo", default=os.getenv("BENCH_MONGO_URL", "memory"), help="'memory' or a mongodb:// URL")
+    parser.add_argument("--postgres", action="store_true", help="Create real chat sessions in POSTGRES_PSYCOPG_URL")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    row = report["latency"]
+    print(f"{report['throughput_rps']:.1f} req/s  p50={row['p50_ms']:.1f}ms  p95={row['p95_ms']:.1f}ms  "
+          f"p99={row['p99_ms']:.1f}ms  statuses={report['statuses']}  degraded={report['degraded']}")
+    for stage, row in report["stages"].items():
+        print(f"  {stage:10s} p50={row['p50_ms']:.1f}ms  p95={row['p95_ms']:.1f}ms  p99={row['p99_ms']:.1f}ms")
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,124 @@
+"""
+Chat storage benchmark: blocking Session (run in a threadpool, as FastAPI does
+for sync dependencies) vs. the async engine, under concurrent history reads and
+message writes.
+
+Usage:
+    python -m benchmarks.bench_chat_storage --concurrency 50 --requests 2000
+
+Requires POSTGRES_PSYCOPG_URL (and optionally POSTGRES_ASYNC_URL). All rows are
+created under a throwaway user id and removed afterwards.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Awaitable, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete
+
+from benchmarks.stats import summarize
+from api.schemas.postgres import ChatSession, ChatMessage
+from api.storage.postgres.chat_messages_manager import (
+    create_message, get_messages_by_chat_id, acreate_message, aget_messages_by_chat_id
+)
+from api.storage.postgres.chat_session_manager import create_chat_session
+from api.utils.get_pg_database import SESSION, ASYNC_SESSION, init_pg_database, close_pg_database
+
+
+async def _drive(worker: Callable[[int], Awaitable[None]], total: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await worker(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return {"throughput_rps": total / elapsed, **summarize(latencies)}
+
+
+def _seed(user_id: str, sessions: int, messages_per_session: int) -> List[int]:
+    chat_ids = []
+    with SESSION() as db:
+        for i in range(sessions):
+            chat = create_chat_session(user_id, f"bench-{i}", db)
+            chat_ids.append(chat.id)
+            db.add_all([
+                ChatMessage(chat_id=chat.id, sender="user" if j % 2 == 0 else "ai", content=f"message {j}")
+                for j in range(messages_per_session)
+            ])
+        db.commit()
+    return chat_ids
+
+
+def _cleanup(user_id: str):
+    with SESSION() as db:
+        chat_ids = [c.id for c in db.query(ChatSession.id).filter(ChatSession.user_id == user_id)]
+        if chat_ids:
+            db.execute(delete(ChatMessage).where(ChatMessage.chat_id.in_(chat_ids)))
+            db.execute(delete(ChatSession).where(ChatSession.id.in_(chat_ids)))
+        db.commit()
+
+
+async def run(concurrency: int, total: int, sessions: int, messages_per_session: int, threads: int) -> dict:
+    await init_pg_database()
+    user_id = f"bench-{uuid.uuid4().hex[:8]}"
+    chat_ids = _seed(user_id, sessions, messages_per_session)
+    loop = asyncio.get_running_loop()
+    # Mirrors Starlette's default threadpool limit for sync dependencies
+    executor = ThreadPoolExecutor(max_workers=threads)
+
+    def sync_read(i: int):
+        with SESSION() as db:
+            get_messages_by_chat_id(chat_ids[i % len(chat_ids)], db)
+
+    def sync_write(i: int):
+        with SESSION() as db:
+            create_message(chat_ids[i % len(chat_ids)], "user", f"bench write {i}", db)
+
+    async def async_read(i: int):
+        async with ASYNC_SESSION() as db:
+            await aget_messages_by_chat_id(chat_ids[i % len(chat_ids)], db)
+
+    async def async_write(i: int):
+        async with ASYNC_SESSION() as db:
+            await acreate_message(chat_ids[i % len(chat_ids)], "user", f"bench write {i}", db)
+
+    results = {}
+    try:
+        results["sync_read"] = await _drive(lambda i: loop.run_in_executor(executor, sync_read, i), total, concurrency)
+        results["async_read"] = await _drive(async_read, total, concurrency)
+        results["sync_write"] = await _drive(lambda i: loop.run_in_executor(executor, sync_write, i), total, concurrency)
+        results["async_write"] = await _drive(async_write, total, concurrency)
+    finally:
+        executor.shutdown(wait=True)
+        _cleanup(user_id)
+        await close_pg_database()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--messages-per-session", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=40)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.concurrency, args.requests, args.sessions, args.messages_per_session, args.threads))
+    for name, row in report.items():
+        print(f"{name:12s} {row['throughput_rps']:8.1f} req/s  p50={row['p50_ms']:.1f}ms  p95={row['p95_ms']:.1f}ms  p99={row['p99_ms']:.1f}ms")
+    print(json.dumps(report, indent=2))
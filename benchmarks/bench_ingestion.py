@@ -0,0 +1,226 @@
+"""
+Ingestion micro-benchmarks for the DocumentProcessor stages.
+
+Generates synthetic lecture-note PDFs (benchmarks/lecture_notes.py) with the
+real header/footer patterns and times each stage of process_and_create_chunks
+on them:
+
+    load        PyPDFLoader.load()
+    normalize   TextNormalizer.normalize, per page
+    strip       BoilerplateStripper.strip + blank-line collapse, per page
+    split       StreamingTextSplitter.split_pages over the whole document
+    dedup       MinHash signatures + LSH near-duplicate lookup over the chunks
+    embed       stubbed embedder (local hashing, full dimensionality)
+    chunk_odm   Chunk construction with metadata and token counts
+    total       process_and_create_chunks end to end (same stubbed embedder)
+
+Every stage is timed over --repeat runs (min/median/mean), then run once more
+under tracemalloc for peak and retained memory. The JSON report includes the
+git commit so runs can be compared; pass --compare to diff against a previous
+report.
+
+Usage:
+    python -m benchmarks.bench_ingestion --pages 100 300 600 --output ingestion.json
+    python -m benchmarks.bench_ingestion --pages 300 --compare ingestion.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from beanie import init_beanie
+from langchain_core.documents import Document as LCDocument
+
+from benchmarks.lecture_notes import make_pages, write_pdf
+from benchmarks.standins import StubChunkEmbedder, mongo_client
+from api.processors import document_processor
+from api.processors.document_processor import BoilerplateStripper, DocumentProcessor, TextNormalizer
+from api.processors.near_duplicates import find_near_duplicates
+from api.schemas.mongodb import __beanie_models__, Chunk, SourceDocument, Subject, Unit
+from api.utils.token_counter import estimate_tokens
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Time `fn` `repeat` times, then once under tracemalloc."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.fmean(timings),
+        "peak_kib": (peak - baseline) / 1024,
+        "retained_kib": (retained - baseline) / 1024,
+    }
+
+
+async def _source_documents(paths: List[str]) -> List[SourceDocument]:
+    subject = Subject(subject_code=f"BENCH-INGEST-{os.getpid()}", name="Benchmark ingestion")
+    await subject.insert()
+    unit = Unit(subject=subject, title="Unit 1")
+    await unit.insert()
+    documents = []
+    for path in paths:
+        source = SourceDocument(subject=subject, unit=unit, source_url=path)
+        await source.insert()
+        documents.append(source)
+    return documents
+
+
+def bench_document(processor: DocumentProcessor, path: str, repeat: int) -> Dict[str, Any]:
+    loader = processor._resolve_loader(path)
+    pages: List[LCDocument] = loader.load()
+    raw_texts = [page.page_content for page in pages]
+    normalized = [TextNormalizer.normalize(text) for text in raw_texts]
+
+    def strip_pages():
+        return [re.sub(r"\n{2,}", "\n", BoilerplateStripper.strip(text)).strip() for text in normalized]
+
+    cleaned = strip_pages()
+    page_docs = [
+        LCDocument(page_content=text, metadata={"page_number": i + 1, "source": path})
+        for i, text in enumerate(cleaned) if text
+    ]
+
+    def split_pages():
+        return [c for c in processor._splitter.split_pages(page_docs) if len(c.page_content) >= 200]
+
+    chunks = split_pages()
+    contents = [c.page_content for c in chunks]
+    vectors = asyncio.run(processor.embedder.aembed_documents(contents))
+
+    def build_odms():
+        odms, counters = [], {}
+        for doc, vector in zip(chunks, vectors):
+            page_number = doc.metadata["page_number"]
+            counters[page_number] = counters.get(page_number, 0) + 1
+            meta = dict(doc.metadata)
+            meta["chunk_index_in_page"] = counters[page_number]
+            meta["chunk_id"] = f"{page_number}-{counters[page_number]}"
+            meta["token_count"] = estimate_tokens(doc.page_content)
+            odms.append(Chunk(document=processor.source_doc, subject_id="s", unit_id="u", content=doc.page_content,
+                              vector_embedding=vector, embedding_model="stub", metadata=meta))
+        return odms
+
+    stages = {
+        "load": _measure(lambda: processor._resolve_loader(path).load(), repeat),
+        "normalize": _measure(lambda: [TextNormalizer.normalize(text) for text in raw_texts], repeat),
+        "strip": _measure(strip_pages, repeat),
+        "split": _measure(split_pages, repeat),
+        "dedup": _measure(lambda: find_near_duplicates(contents), repeat),
+        "embed": _measure(lambda: asyncio.run(processor.embedder.aembed_documents(contents)), repeat),
+        "chunk_odm": _measure(build_odms, repeat),
+        "total": _measure(lambda: asyncio.run(processor.process_and_create_chunks()), repeat),
+    }
+    return {
+        "pages": len(pages),
+        "raw_chars": sum(len(text) for text in raw_texts),
+        "clean_chars": sum(len(text) for text in cleaned),
+        "chunks": len(chunks),
+        "near_duplicates": sum(match is not None for match in find_near_duplicates(contents)),
+        "stages": stages,
+    }
+
+
+def _compare(report: Dict, baseline: Dict):
+    print(f"\nvs {baseline['meta']['commit']} (median ms, change)")
+    for pages, current in report["documents"].items():
+        previous = baseline["documents"].get(pages)
+        if not previous:
+            continue
+        print(f"  {pages} pages")
+        for stage, row in current["stages"].items():
+            before = previous["stages"].get(stage)
+            if before:
+                change = (row["median_ms"] - before["median_ms"]) / before["median_ms"] * 100 if before["median_ms"] else 0
+                print(f"    {stage:10s} {before['median_ms']:9.1f} -> {row['median_ms']:9.1f}  {change:+6.1f}%")
+
+
+async def _prepare(mongo: str, paths: List[str]) -> List[DocumentProcessor]:
+    await init_beanie(database=mongo_client(mongo)["rag_bench"], document_models=__beanie_models__)
+    return [DocumentProcessor(source) for source in await _source_documents(paths)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 300])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dimensions", type=int, default=3072, help="Stub embedding size")
+    parser.add_argument("--mongo", default=os.getenv("BENCH_MONGO_URL", "memory"), help="'memory' or a mongodb:// URL")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to diff against")
+    args = parser.parse_args()
+
+    # Chunk/Link construction needs initialized Beanie models; the embedder is local
+    document_processor.ChunkEmbedder = lambda: StubChunkEmbedder(args.dimensions)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = []
+        for count in args.pages:
+            path = os.path.join(workdir, f"notes-{count}.pdf")
+            write_pdf(path, make_pages(count, seed=args.seed))
+            paths.append(path)
+
+        loop = asyncio.new_event_loop()
+        processors = loop.run_until_complete(_prepare(args.mongo, paths))
+        loop.close()
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "dimensions": args.dimensions,
+            },
+            "documents": {},
+        }
+        for count, path, processor in zip(args.pages, paths, processors):
+            result = bench_document(processor, path, args.repeat)
+            report["documents"][str(count)] = result
+            print(f"{count} pages ({result['raw_chars']} chars, {result['chunks']} chunks, "
+                  f"{result['near_duplicates']} near-duplicates)")
+            for stage, row in result["stages"].items():
+                print(f"  {stage:10s} median={row['median_ms']:9.1f}ms  peak={row['peak_kib']:9.0f}KiB  "
+                      f"retained={row['retained_kib']:8.0f}KiB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            _compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Retrieval recall-versus-latency evaluation.
+
+Ground truth is exact cosine top-k at full dimensionality, computed with NumPy.
+Every configuration in the grid is then measured against it. Configurations
+vary index type (flat / ivf), quantization (none / int8 / binary, with
+full-precision rescoring of `candidates`), truncated dimensions (Matryoshka
+prefix), k, candidate count and, for IVF, nlist/nprobe. Reported per
+configuration: recall@k, MRR of the true nearest neighbour, p50/p99 single-query
+latency, build time and index memory.
+
+Data comes from either
+  - a snapshot of one unit's chunks plus an embedded question set:
+        python -m benchmarks.bench_retrieval_recall snapshot --unit-id <id> \\
+            --questions questions.txt --out unit.npz
+        python -m benchmarks.bench_retrieval_recall evaluate --snapshot unit.npz
+  - or a synthetic clustered corpus, generated in blocks so it scales to
+    millions of vectors (its dimensions are isotropic, so truncation numbers
+    are only meaningful on real snapshots):
+        python -m benchmarks.bench_retrieval_recall evaluate --synthetic 1000000 \\
+            --dimensions 768 --index flat ivf --quantization none int8 binary
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.ann import FlatIndex, IVFIndex, QUANTIZATIONS, exact_top_k, normalize, truncate
+from benchmarks.stats import summarize
+
+
+# ---------------------------
+# Data
+# ---------------------------
+
+def synthetic_corpus(n: int, dimensions: int, queries: int, clusters: int = 1000,
+                     spread: float = 0.35, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Clustered unit vectors (topics) plus queries drawn near random corpus points,
+    so every query has genuine close neighbours.
+    """
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.standard_normal((clusters, dimensions), dtype=np.float32))
+    corpus = np.empty((n, dimensions), dtype=np.float32)
+    for start in range(0, n, 65536):
+        end = min(n, start + 65536)
+        block_rng = np.random.default_rng((seed, start))
+        assignment = block_rng.integers(0, clusters, size=end - start)
+        noise = block_rng.standard_normal((end - start, dimensions), dtype=np.float32)
+        corpus[start:end] = normalize(centers[assignment] + spread * noise / np.sqrt(dimensions) * 4)
+    anchors = corpus[rng.choice(n, size=queries, replace=False)]
+    noise = rng.standard_normal(anchors.shape, dtype=np.float32)
+    return corpus, normalize(anchors + spread * noise / np.sqrt(dimensions) * 2)
+
+
+def snapshot_unit(unit_id: str, questions_path: str, out: str):
+    """Save a unit's chunk embeddings and the embedded question set to an .npz file."""
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+    from langchain_google_genai.embeddings import GoogleGenerativeAIEmbeddings
+
+    load_dotenv()
+    collection = MongoClient(os.getenv("MONGO_URL"))[os.getenv("MONGO_DB")]["chunks"]
+    ids, vectors = [], []
+    # Near-duplicates linked to a canonical chunk carry no vector and aren't searchable
+    for doc in collection.find({"unit_id": unit_id, "vector_embedding": {"$ne": None}}, {"vector_embedding": 1}):
+        ids.append(str(doc["_id"]))
+        vectors.append(doc["vector_embedding"])
+    if not vectors:
+        raise SystemExit(f"No chunks found for unit {unit_id}")
+
+    with open(questions_path) as f:
+        questions = [line.strip() for line in f if line.strip()]
+    embedder = GoogleGenerativeAIEmbeddings(
+        model=os.getenv("EMBEDDING_MODEL", "models/embedding-001"),
+        task_type="retrieval_query",
+        google_api_key=os.getenv("GOOGLE_API_KEY")
+    )
+    query_vectors = embedder.embed_documents(questions)
+
+    np.savez_compressed(
+        out,
+        corpus=normalize(np.asarray(vectors, dtype=np.float32)),
+        queries=normalize(np.asarray(query_vectors, dtype=np.float32)),
+        ids=np.asarray(ids),
+        questions=np.asarray(questions),
+    )
+    print(f"Saved {len(ids)} chunks and {len(questions)} questions to {out}")
+
+
+# ---------------------------
+# Evaluation
+# ---------------------------
+
+def recall_and_mrr(retrieved: List[np.ndarray], truth: np.ndarray, k: int) -> Tuple[float, float]:
+    """Mean recall@k against the exact top-k, and MRR of the exact nearest neighbour."""
+    recalls, reciprocal_ranks = [], []
+    for hits, expected in zip(retrieved, truth):
+        hits = list(hits[:k])
+        recalls.append(len(set(hits) & set(expected[:k])) / k)
+        reciprocal_ranks.append(1 / (hits.index(expected[0]) + 1) if expected[0] in hits else 0.0)
+    return float(np.mean(recalls)), float(np.mean(reciprocal_ranks))
+
+
+def evaluate(corpus: np.ndarray, queries: np.ndarray, args) -> List[Dict]:
+    max_k = max(args.k)
+    started = time.perf_counter()
+    truth = exact_top_k(corpus, queries, max_k)
+    print(f"Ground truth for {len(queries)} queries over {len(corpus)} vectors in {time.perf_counter() - started:.1f}s")
+
+    results = []
+    for dims, index_type, quantization in itertools.product(args.dims or [None], args.index, args.quantization):
+        vectors = truncate(corpus, dims)
+        query_vectors = truncate(queries, dims)
+        ivf_params = list(itertools.product(args.nlist, args.nprobe)) if index_type == "ivf" else [(None, None)]
+        for nlist, nprobe in ivf_params:
+            if index_type == "ivf":
+                index = IVFIndex(vectors, nlist=nlist, quantization=quantization, seed=args.seed)
+            else:
+                index = FlatIndex(vectors, quantization=quantization)
+            # Candidate count only matters when quantized codes are rescored
+            candidate_grid = args.candidates if quantization != "none" else [max_k]
+            for k, candidates in itertools.product(args.k, candidate_grid):
+                latencies, retrieved = [], []
+                for query in query_vectors:
+                    query_started = time.perf_counter()
+                    if index_type == "ivf":
+                        hits = index.search(query, k, candidates, nprobe=nprobe)
+                    else:
+                        hits = index.search(query, k, candidates)
+                    latencies.append((time.perf_counter() - query_started) * 1000)
+                    retrieved.append(hits)
+                recall, mrr = recall_and_mrr(retrieved, truth, k)
+                latency = summarize(latencies)
+                row = {
+                    "index": index_type,
+                    "quantization": quantization,
+                    "dims": dims or corpus.shape[1],
+                    "k": k,
+                    "candidates": candidates if quantization != "none" else None,
+                    "nlist": nlist,
+                    "nprobe": nprobe,
+                    "recall": recall,
+                    "mrr": mrr,
+                    "p50_ms": latency["p50_ms"],
+                    "p99_ms": latency["p99_ms"],
+                    "build_s": index.build_seconds,
+                    "index_mib": index.nbytes / 2 ** 20,
+                }
+                results.append(row)
+                print(f"{index_type:4s} {quantization:6s} dims={row['dims']:5d} k={k:3d} "
+                      f"cand={str(row['candidates']):5s} nlist={str(nlist):5s} nprobe={str(nprobe):4s} "
+                      f"recall={recall:.3f} mrr={mrr:.3f} p50={row['p50_ms']:.2f}ms p99={row['p99_ms']:.2f}ms "
+                      f"mem={row['index_mib']:.1f}MiB")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snap = commands.add_parser("snapshot", help="Snapshot a unit's chunk vectors and embed a question set")
+    snap.add_argument("--unit-id", required=True)
+    snap.add_argument("--questions", required=True, help="Text file, one question per line")
+    snap.add_argument("--out", required=True)
+
+    run = commands.add_parser("evaluate", help="Measure recall and latency for a grid of configurations")
+    source = run.add_mutually_exclusive_group(required=True)
+    source.add_argument("--snapshot", help=".npz written by the snapshot command")
+    source.add_argument("--synthetic", type=int, help="Number of synthetic corpus vectors")
+    run.add_argument("--dimensions", type=int, default=768, help="Synthetic vector size")
+    run.add_argument("--queries", type=int, default=200, help="Synthetic query count")
+    run.add_argument("--index", nargs="+", default=["flat", "ivf"], choices=["flat", "ivf"])
+    run.add_argument("--quantization", nargs="+", default=["none", "int8", "binary"], choices=QUANTIZATIONS)
+    run.add_argument("--dims", type=int, nargs="+", help="Truncated dimensions to try (default: full)")
+    run.add_argument("--k", type=int, nargs="+", default=[4, 10])
+    run.add_argument("--candidates", type=int, nargs="+", default=[50, 200], help="Rescored shortlist size")
+    run.add_argument("--nlist", type=int, nargs="+", default=[1024])
+    run.add_argument("--nprobe", type=int, nargs="+", default=[8, 32])
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        snapshot_unit(args.unit_id, args.questions, args.out)
+        return
+
+    if args.snapshot:
+        data = np.load(args.snapshot)
+        corpus, queries = data["corpus"], data["queries"]
+    else:
+        started = time.perf_counter()
+        corpus, queries = synthetic_corpus(args.synthetic, args.dimensions, args.queries, seed=args.seed)
+        print(f"Generated {len(corpus)} x {corpus.shape[1]} corpus in {time.perf_counter() - started:.1f}s")
+
+    results = evaluate(corpus, queries, args)
+    if args.output:
+        config = {k: v for k, v in vars(args).items() if k not in ("output", "command")}
+        with open(args.output, "w") as f:
+            json.dump({"config": config, "corpus": len(corpus), "queries": len(queries), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
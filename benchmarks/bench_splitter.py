@@ -0,0 +1,136 @@
+"""
+Splitter comparison: per-page RecursiveCharacterTextSplitter (the previous
+ingestion path) vs the document-level StreamingTextSplitter.
+
+Both split the same cleaned pages (TextNormalizer + BoilerplateStripper, as in
+DocumentProcessor) with the same chunk size / overlap / minimum chunk length.
+Reported per splitter:
+
+    time        min / median split time over --repeat runs
+    chunks      chunks kept (= embedding inputs)
+    fill        mean chunk length / chunk_size
+    dropped     characters lost in sub-minimum scraps
+    cross_page  chunks spanning a page break (always 0 for the per-page splitter)
+
+Pages come from synthetic lecture notes (benchmarks/lecture_notes.py) or real
+PDFs:
+    python -m benchmarks.bench_splitter --pages 100 500 2000
+    python -m benchmarks.bench_splitter --pdf notes1.pdf notes2.pdf --output splitter.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document as LCDocument
+
+from benchmarks.lecture_notes import make_page_text
+from api.processors.document_processor import BoilerplateStripper, TextNormalizer
+from api.processors.text_splitter import StreamingTextSplitter
+
+
+def clean_pages(raw_pages: List[str]) -> List[LCDocument]:
+    pages = []
+    for i, raw in enumerate(raw_pages):
+        text = BoilerplateStripper.strip(TextNormalizer.normalize(raw))
+        text = re.sub(r"\n{2,}", "\n", text).strip()
+        if text:
+            pages.append(LCDocument(page_content=text, metadata={"page_number": i + 1}))
+    return pages
+
+
+def load_pdf_pages(path: str) -> List[str]:
+    from langchain_community.document_loaders import PyPDFLoader
+    return [page.page_content for page in PyPDFLoader(path).load()]
+
+
+def per_page_splitter(chunk_size: int, overlap: int, min_chars: int) -> Callable[[List[LCDocument]], List[LCDocument]]:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        length_function=len,
+        is_separator_regex=False,
+    )
+    return lambda pages: [c for page in pages for c in splitter.split_documents([page])]
+
+
+def streaming_splitter(chunk_size: int, overlap: int, min_chars: int) -> Callable[[List[LCDocument]], List[LCDocument]]:
+    splitter = StreamingTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap, min_chunk_chars=min_chars)
+    return splitter.split_pages
+
+
+SPLITTERS = {"per_page": per_page_splitter, "streaming": streaming_splitter}
+
+
+def measure(split: Callable, pages: List[LCDocument], args) -> Dict[str, float]:
+    timings, chunks = [], []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        chunks = split(pages)
+        timings.append((time.perf_counter() - started) * 1000)
+    kept = [c for c in chunks if len(c.page_content) >= args.min_chunk_chars]
+    lengths = [len(c.page_content) for c in kept]
+    return {
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "chunks": len(kept),
+        "fill": statistics.fmean(lengths) / args.chunk_size if lengths else 0.0,
+        "dropped_chars": sum(len(c.page_content) for c in chunks if len(c.page_content) < args.min_chunk_chars),
+        "cross_page": sum(1 for c in kept if c.metadata.get("page_end", c.metadata["page_number"]) != c.metadata["page_number"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--pages", type=int, nargs="+", default=[100, 500], help="Synthetic document sizes")
+    source.add_argument("--pdf", nargs="+", help="Real PDFs to split instead")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=180)
+    parser.add_argument("--min-chunk-chars", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.pdf:
+        documents = {os.path.basename(path): load_pdf_pages(path) for path in args.pdf}
+    else:
+        rng = random.Random(args.seed)
+        documents = {f"{n} pages": [make_page_text(rng, i + 1) for i in range(n)] for n in args.pages}
+
+    report = {"config": {k: v for k, v in vars(args).items() if k != "output"}, "documents": {}}
+    for name, raw_pages in documents.items():
+        pages = clean_pages(raw_pages)
+        chars = sum(len(page.page_content) for page in pages)
+        results = {
+            label: measure(factory(args.chunk_size, args.overlap, args.min_chunk_chars), pages, args)
+            for label, factory in SPLITTERS.items()
+        }
+        report["documents"][name] = {"pages": len(pages), "chars": chars, "splitters": results}
+
+        print(f"{name} ({chars} chars)")
+        for label, row in results.items():
+            print(f"  {label:10s} median={row['median_ms']:8.1f}ms  chunks={row['chunks']:6d}  fill={row['fill']:.2f}  "
+                  f"dropped={row['dropped_chars']:7d} chars  cross_page={row['cross_page']}")
+        before, after = results["per_page"], results["streaming"]
+        print(f"  streaming: {before['median_ms'] / max(after['median_ms'], 1e-9):.1f}x faster, "
+              f"{(1 - after['chunks'] / before['chunks']) * 100 if before['chunks'] else 0:.1f}% fewer chunks")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
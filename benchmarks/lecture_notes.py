@@ -0,0 +1,129 @@
+"""
+Synthetic lecture notes for the ingestion benchmarks.
+
+Pages mimic the real class notes: a dynamic subject header
+("ML1703- Image Processing and Vision Techniques 2025-2026 Unit-II Class Notes"),
+the college footer, a loose page number, smart punctuation, bullet lists and
+the odd repeated line. write_pdf() lays the pages out as a plain text PDF
+(Helvetica, WinAnsi) that PyPDFLoader reads back like a real upload.
+"""
+
+import random
+from typing import List
+
+SUBJECTS = [
+    ("ML1703", "Image Processing and Vision Techniques"),
+    ("ML1602", "Deep Learning Architectures"),
+    ("ML1501", "Probabilistic Graphical Models"),
+]
+ROMAN = ["I", "II", "III", "IV", "V"]
+
+_TERMS = [
+    "convolution", "kernel", "gradient", "histogram", "feature map", "pooling", "activation",
+    "backpropagation", "regularization", "edge detection", "segmentation", "entropy",
+    "likelihood", "posterior", "variance", "eigenvector", "transform", "filter", "threshold",
+    "morphology", "optimizer", "dropout", "normalization", "receptive field", "stride",
+]
+_CONNECTIVES = ["Therefore", "However", "In practice", "For example", "Note that", "Consequently"]
+
+LINE_WIDTH = 95
+LINES_PER_PAGE = 52
+
+
+def _sentence(rng: random.Random) -> str:
+    a, b, c = rng.sample(_TERMS, 3)
+    templates = [
+        f"The {a} determines how the {b} responds to changes in {c}.",
+        f"{rng.choice(_CONNECTIVES)}, the {a} – unlike the {b} – is sensitive to {c}.",
+        f"We call this the “{a}” of the {b}; it’s computed from the {c}.",
+        f"A larger {a} increases the {b}, while the {c} stays roughly constant…",
+        f"{rng.choice(_CONNECTIVES)}, the {a} is estimated from the {b} (see the {c} section).",
+    ]
+    return rng.choice(templates)
+
+
+def _wrap(text: str, width: int = LINE_WIDTH) -> List[str]:
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def make_page_text(rng: random.Random, page_number: int, subject_index: int = 0, unit: int = 2) -> str:
+    """One page of extracted-text-like notes, boilerplate included."""
+    code, name = SUBJECTS[subject_index % len(SUBJECTS)]
+    lines = [f"{code}- {name} 2025-2026 Unit-{ROMAN[(unit - 1) % len(ROMAN)]} Class Notes"]
+    while len(lines) < LINES_PER_PAGE - 3:
+        kind = rng.random()
+        if kind < 0.15:
+            lines.append(f"{page_number}.{len(lines)} {rng.choice(_TERMS).title()}")
+        elif kind < 0.35:
+            for _ in range(rng.randint(2, 4)):
+                lines.append(f"• {_sentence(rng)}")
+        else:
+            paragraph = " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+            lines.extend(_wrap(paragraph))
+            lines.append("")
+        if rng.random() < 0.05:
+            # Extraction sometimes duplicates a line
+            lines.append(lines[-2] if len(lines) > 1 else lines[-1])
+    lines = lines[:LINES_PER_PAGE - 3]
+    lines.append(f"St. Joseph’s College of Engineering {page_number} Dept of AML")
+    lines.append(str(page_number))
+    return "\n".join(lines)
+
+
+def make_pages(pages: int, seed: int = 0, subject_index: int = 0, unit: int = 2) -> List[str]:
+    rng = random.Random(seed)
+    return [make_page_text(rng, i + 1, subject_index, unit) for i in range(pages)]
+
+
+def _pdf_string(line: str) -> bytes:
+    raw = line.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def write_pdf(path: str, pages: List[str]):
+    """Write each page's lines as a text-only PDF page."""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = add(b"")  # filled in once the page ids are known
+    page_ids = []
+    for text in pages:
+        stream = [b"BT /F1 9 Tf 11 TL 40 800 Td"]
+        for line in text.split("\n"):
+            stream.append(b"(" + _pdf_string(line) + b") Tj T*")
+        stream.append(b"ET")
+        content = b"\n".join(stream)
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_at)
+    with open(path, "wb") as f:
+        f.write(out)
@@ -0,0 +1,287 @@
+"""
+Local stand-ins for the API's external dependencies, used by the offline
+benchmarks.
+
+- LatencyDistribution: parses "fixed:50", "uniform:20:80" or "lognormal:40:0.5"
+  (median ms, sigma) and samples delays from a seeded RNG.
+- HashingEmbedder / FakeVectorSearchEngine: a deterministic bag-of-words
+  embedder and an in-memory brute-force index with the MongoVectorSearchEngine
+  interface (embed_query, search_by_vector, vector_search, close).
+- FakeResponseGenerator: the real GeminiResponseGenerator (packing, routing,
+  response cache) with the Gemini models swapped for a delayed deterministic LLM.
+- LocalJWKS: an RSA signer plus a JWKSCache that serves its public key, so
+  tokens go through the real verification path without Clerk.
+- StubChunkEmbedder: ChunkEmbedder's interface with local hashing embeddings.
+- mongo_client: mongomock-motor ("memory") or a motor client for a local mongod.
+- asgi_request: a minimal in-process ASGI client.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from api.models.ai_response_generator import GeminiResponseGenerator
+from api.utils.authenticate_user import JWKSCache
+from api.utils.token_counter import estimate_tokens
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class LatencyDistribution:
+    """Seeded delay sampler parsed from a short spec string."""
+
+    def __init__(self, spec: str, seed: int = 0):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(":")] if params else []
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution '{spec}'")
+        self._rng = random.Random(seed)
+
+    def sample_ms(self) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self._rng.uniform(self.params[0], self.params[1])
+        median, sigma = self.params
+        return self._rng.lognormvariate(math.log(median), sigma)
+
+    async def sleep(self):
+        await asyncio.sleep(self.sample_ms() / 1000)
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedding via feature hashing (unit length)."""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in _WORD_RE.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+def make_corpus(rng: random.Random, units: List[Tuple[str, str]], pages_per_unit: int,
+                chunks_per_page: int, words_per_chunk: int = 180) -> List[Document]:
+    """
+    Synthetic chunks for each (subject_id, unit_id), with the same metadata the
+    Atlas results carry (page_number, chunk_index_in_page, chunk_id, source).
+    """
+    vocabulary = [f"term{i}" for i in range(5000)]
+    documents = []
+    for subject_id, unit_id in units:
+        for page in range(1, pages_per_unit + 1):
+            for index in range(chunks_per_page):
+                text = " ".join(rng.choice(vocabulary) for _ in range(words_per_chunk))
+                documents.append(Document(page_content=text, metadata={
+                    "subject_id": subject_id,
+                    "unit_id": unit_id,
+                    "source": f"bench-{unit_id}.pdf",
+                    "page_number": page,
+                    "chunk_index_in_page": index,
+                    "chunk_id": f"{page}-{index}",
+                    "token_count": estimate_tokens(text),
+                }))
+    return documents
+
+
+class StubChunkEmbedder:
+    """Drop-in for ChunkEmbedder (ingestion) that embeds locally at full dimensionality."""
+
+    def __init__(self, dimensions: int = 3072, model_name: str = "stub-embedding"):
+        self.model_name = model_name
+        self._embedder = HashingEmbedder(dimensions)
+
+    def get_model_name(self) -> str:
+        return self.model_name
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embedder.embed(text) for text in texts]
+
+
+def mongo_client(target: str):
+    """'memory' -> mongomock-motor client (pip install mongomock-motor); otherwise a motor client for the URL."""
+    if target == "memory":
+        import mongomock
+        from mongomock_motor import AsyncMongoMockClient
+        list_collection_names = mongomock.database.Database.list_collection_names
+        if not getattr(list_collection_names, "_accepts_extra_kwargs", False):
+            # Beanie 2 passes authorizedCollections/nameOnly, which mongomock rejects
+            def patched(self, filter=None, session=None, **_kwargs):
+                return list_collection_names(self, filter=filter, session=session)
+            patched._accepts_extra_kwargs = True
+            mongomock.database.Database.list_collection_names = patched
+        return AsyncMongoMockClient()
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(target)
+
+
+class FakeVectorSearchEngine:
+    """
+    In-memory stand-in for MongoVectorSearchEngine with configurable delays.
+    """
+
+    def __init__(self, documents: List[Document], embed_latency: LatencyDistribution,
+                 search_latency: LatencyDistribution, embedder: Optional[HashingEmbedder] = None):
+        self.embedder = embedder or HashingEmbedder()
+        self.embed_latency = embed_latency
+        self.search_latency = search_latency
+        self._documents = documents
+        self._vectors = [self.embedder.embed(doc.page_content) for doc in documents]
+
+    async def initialize(self):
+        pass
+
+    async def embed_query(self, query: str) -> List[float]:
+        await self.embed_latency.sleep()
+        return self.embedder.embed(query)
+
+    async def search_by_vector(self, embedding: List[float], filters: Optional[Dict[str, Any]] = None, k: int = 4):
+        await self.search_latency.sleep()
+        filters = filters or {}
+        scored = []
+        for doc, vector in zip(self._documents, self._vectors):
+            if any(doc.metadata.get(key) != value for key, value in filters.items()):
+                continue
+            # Atlas reports cosine similarity rescaled to [0, 1]
+            score = (1 + sum(a * b for a, b in zip(embedding, vector))) / 2
+            scored.append((score, doc))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "score": score})
+            for score, doc in scored[:k]
+        ]
+
+    async def vector_search(self, query: str, filters: Optional[Dict[str, Any]] = None):
+        return await self.search_by_vector(await self.embed_query(query), filters=filters)
+
+    async def close(self):
+        pass
+
+
+class FakeResponseGenerator(GeminiResponseGenerator):
+    """
+    GeminiResponseGenerator whose models are delayed deterministic functions of the prompt.
+    """
+
+    def __init__(self, pro_latency: LatencyDistribution, fast_latency: LatencyDistribution,
+                 response_words: int = 200, **kwargs):
+        super().__init__(**kwargs)
+        self.pro_latency = pro_latency
+        self.fast_latency = fast_latency
+        self.response_words = response_words
+
+    def _build_llm(self, model_name: str):
+        latency = self.fast_latency if model_name == self.fast_model_name else self.pro_latency
+
+        async def respond(prompt_value) -> str:
+            await latency.sleep()
+            digest = hashlib.sha256(prompt_value.to_string().encode("utf-8")).hexdigest()
+            words = [digest[i % 60:i % 60 + 4] for i in range(self.response_words)]
+            return f"[{model_name}] " + " ".join(words)
+
+        return RunnableLambda(respond)
+
+
+class LocalJWKS:
+    """RSA key pair that signs session tokens and serves them through a real JWKSCache."""
+
+    KID = "bench-key"
+
+    def __init__(self):
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self._private_key.public_key()))
+        self.public_key = jwt.PyJWK({**public_jwk, "kid": self.KID, "alg": "RS256", "use": "sig"})
+
+    def sign(self, user_id: str, ttl_seconds: int = 3600) -> str:
+        now = int(time.time())
+        return jwt.encode(
+            {"sub": user_id, "iat": now, "exp": now + ttl_seconds},
+            self._private_key,
+            algorithm="RS256",
+            headers={"kid": self.KID},
+        )
+
+    def cache(self) -> JWKSCache:
+        jwks = self
+
+        class _LocalJWKSCache(JWKSCache):
+            async def _fetch(self):
+                self._keys = {jwks.KID: jwks.public_key}
+                self._fetched_at = time.monotonic()
+
+        return _LocalJWKSCache("http://localhost/.well-known/jwks.json")
+
+
+async def asgi_request(app, method: str, path: str, headers: Dict[str, str],
+                       body: bytes = b"") -> Tuple[int, Dict[str, str], bytes]:
+    """Send one HTTP request through an ASGI app in-process."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("latin-1"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    status = 0
+    response_headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update({k.decode("latin-1"): v.decode("latin-1") for k, v in message["headers"]})
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                response_done.set()
+
+    await app(scope, receive, send)
+    response_done.set()
+    return status, response_headers, b"".join(chunks)
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'auth;dur=1.2, search;dur=30.5' -> {"auth": 1.2, "search": 30.5}"""
+    timings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "dur":
+                timings[name] = float(value)
+    return timings